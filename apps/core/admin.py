@@ -1,20 +1,41 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.utils.translation import gettext_lazy as _, ngettext
 from .models import CustomUser, LookupCategory, LookupValue
 
 # Register your models here.
 
+
+@admin.action(description=_('Soft delete selected %(verbose_name_plural)s'), permissions=['change'])
+def soft_delete_selected(modeladmin, request, queryset):
+    count = queryset.soft_delete()
+    modeladmin.message_user(request, ngettext(
+        '%d row was soft deleted.', '%d rows were soft deleted.', count,
+    ) % count, messages.SUCCESS)
+
+
+@admin.action(description=_('Restore selected %(verbose_name_plural)s'), permissions=['change'])
+def restore_selected(modeladmin, request, queryset):
+    count = queryset.restore()
+    modeladmin.message_user(request, ngettext(
+        '%d row was restored.', '%d rows were restored.', count,
+    ) % count, messages.SUCCESS)
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff')
+    list_display = ('username', 'email', 'first_name', 'last_name', 'weekly_capacity_hours', 'is_staff')
     search_fields = ('username', 'first_name', 'last_name', 'email')
     ordering = ('username',)
+    fieldsets = UserAdmin.fieldsets + (
+        (_('Capacity'), {'fields': ('weekly_capacity_hours',)}),
+    )
 
 
 @admin.register(LookupCategory)
 class LookupCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'is_system', 'is_active', 'created_date')
     list_filter = ('is_system', 'is_active')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('name', 'code', 'description')
     readonly_fields = ('created_date', 'updated_date')
     ordering = ('name',)
@@ -24,6 +45,7 @@ class LookupCategoryAdmin(admin.ModelAdmin):
 class LookupValueAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'code', 'sort_order', 'is_active')
     list_filter = ('category', 'is_active')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('name', 'code', 'description')
     raw_id_fields = ('category', 'parent')
     readonly_fields = ('created_date', 'updated_date', 'created_by', 'updated_by')
@@ -34,7 +56,7 @@ class LookupValueAdmin(admin.ModelAdmin):
             if request.resolver_match.kwargs.get('object_id'):
                 obj = self.get_object(request, request.resolver_match.kwargs['object_id'])
                 if obj:
-                    kwargs["queryset"] = LookupValue.objects.filter(
+                    kwargs["queryset"] = LookupValue.all_objects.filter(
                         category=obj.category
                     ).exclude(id=obj.id)
             else:
@@ -0,0 +1,85 @@
+"""
+Conditional GET support.
+
+A view that can cheaply tell when anything it shows last changed answers
+``If-None-Match``/``If-Modified-Since`` with 304 Not Modified before loading
+or rendering anything else:
+
+    class ProjectDetailView(ConditionalGetMixin, DetailView):
+        def get_last_modified(self):
+            return selectors.project_last_modified(self.kwargs['pk'])
+
+The ETag also covers what the timestamp cannot: the user viewing the page,
+their CSRF token (embedded in forms) and the current date (relative dates
+and overdue badges). Pages with pending flash messages are always rendered
+so the messages are shown. Responses are marked ``private, no-cache``:
+browsers keep them but revalidate on every use.
+"""
+import hashlib
+from calendar import timegm
+
+from asgiref.sync import sync_to_async
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(request, last_modified):
+    user = getattr(request, 'user', None)
+    parts = [
+        str(getattr(user, 'pk', None)),
+        request.META.get('CSRF_COOKIE', ''),
+        timezone.localdate().isoformat(),
+        last_modified.isoformat(),
+    ]
+    return quote_etag(hashlib.md5(':'.join(parts).encode(), usedforsecurity=False).hexdigest())
+
+
+def _check(request, last_modified):
+    """The validators for the page and a 304 response if the client's copy is current."""
+    if last_modified is None or len(get_messages(request)):
+        return None, None
+    validators = (_etag(request, last_modified), timegm(last_modified.utctimetuple()))
+    etag, timestamp = validators
+    return validators, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def _set_validators(response, validators):
+    if validators and response.status_code in (200, 304):
+        etag, timestamp = validators
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(request, last_modified, respond):
+    """
+    ``respond()``, unless the client's copy from ``last_modified`` is still
+    current, in which case a 304 is returned without calling it.
+    """
+    validators, response = _check(request, last_modified)
+    return _set_validators(response or respond(), validators)
+
+
+async def aconditional_get(request, last_modified, respond):
+    """Async ``conditional_get``; ``respond`` is a coroutine function."""
+    # Reading pending messages may load the session
+    validators, response = await sync_to_async(_check)(request, last_modified)
+    return _set_validators(response or await respond(), validators)
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 Not Modified when ``get_last_modified()`` shows the
+    client's cached copy is current. See ``conditional_get``.
+    """
+    def get_last_modified(self):
+        """When anything the page shows last changed, or None to always render."""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        return conditional_get(
+            request, self.get_last_modified(), lambda: super(ConditionalGetMixin, self).get(request, *args, **kwargs)
+        )
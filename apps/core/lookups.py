@@ -0,0 +1,145 @@
+"""
+Process-wide registry of lookup categories and values.
+
+Lookup rows change rarely but are read on almost every request, so the
+registry loads all of them once per process and serves lookups from memory.
+A version key in the shared cache is bumped whenever a lookup row is saved
+or deleted (see ``apps.core.signals``); every process compares its loaded
+version against that key and reloads when it has moved on.
+
+Usage:
+    from apps.core.lookups import lookups
+
+    completed = lookups.get('TASK_STATUS', 'COMPLETED')
+    open_ids = lookups.pks('TASK_STATUS', ['TODO', 'IN_PROGRESS'])
+    Task.objects.filter(status_id__in=open_ids)
+
+Instances returned by the registry are shared between requests and threads
+and must be treated as read-only.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_CACHE_KEY = 'core:lookups:version'
+
+
+class _Snapshot:
+    """Immutable in-memory index of all lookup rows at one version."""
+
+    def __init__(self, version, categories, values):
+        self.version = version
+        self.categories = {category.code: category for category in categories}
+        self.values = {}
+        self.by_pk = {}
+        self.by_category = {}
+        for value in values:
+            category_code = value.category.code
+            self.values[(category_code, value.code)] = value
+            self.by_pk[value.pk] = value
+            self.by_category.setdefault(category_code, []).append(value)
+        for category_values in self.by_category.values():
+            category_values.sort(key=lambda v: (v.sort_order, v.name))
+
+
+class LookupRegistry:
+    """
+    Caches every LookupCategory and LookupValue keyed by code.
+
+    The shared version key is consulted at most once every
+    ``LOOKUP_REGISTRY_CHECK_INTERVAL`` seconds (default 1) per process, so a
+    change made in another process becomes visible within that window.
+    Changes made in this process are visible immediately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    @property
+    def check_interval(self):
+        return getattr(settings, 'LOOKUP_REGISTRY_CHECK_INTERVAL', 1)
+
+    def _shared_version(self):
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_CACHE_KEY)
+        return version
+
+    def _load(self, version):
+        from .models import LookupCategory, LookupValue
+
+        categories = list(LookupCategory.all_objects.all())
+        values = list(LookupValue.all_objects.select_related('category'))
+        return _Snapshot(version, categories, values)
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        version = self._shared_version()
+        if snapshot is not None and snapshot.version == version:
+            self._checked_at = now
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(version)
+                self._snapshot = snapshot
+            self._checked_at = now
+        return snapshot
+
+    def clear(self):
+        """Drop this process's copy; the next access reloads it."""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def invalidate(self):
+        """Force every process to reload on its next version check."""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        self.clear()
+
+    def category(self, category_code):
+        """Get a lookup category by its code."""
+        return self._get_snapshot().categories.get(category_code)
+
+    def get(self, category_code, value_code):
+        """Get a lookup value by category and value codes, or None."""
+        return self._get_snapshot().values.get((category_code, value_code))
+
+    def pk(self, category_code, value_code):
+        """Get the primary key of a lookup value, or None if it does not exist."""
+        value = self.get(category_code, value_code)
+        return value.pk if value is not None else None
+
+    def pks(self, category_code, value_codes):
+        """Get the primary keys of the given value codes, skipping unknown codes."""
+        values = self._get_snapshot().values
+        return [
+            values[(category_code, code)].pk
+            for code in value_codes
+            if (category_code, code) in values
+        ]
+
+    def values(self, category_code, active_only=True):
+        """Get the values of a category ordered by sort order and name."""
+        category_values = self._get_snapshot().by_category.get(category_code, [])
+        if active_only:
+            return [value for value in category_values if value.is_active]
+        return list(category_values)
+
+    def by_pk(self, pk):
+        """Get a lookup value by primary key, or None."""
+        return self._get_snapshot().by_pk.get(pk)
+
+
+lookups = LookupRegistry()
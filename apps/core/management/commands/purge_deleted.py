@@ -0,0 +1,80 @@
+"""
+Permanently delete soft-deleted rows older than their retention window.
+
+Retention windows come from ``SOFT_DELETE_RETENTION`` (see
+``apps.core.purge``); ``--days`` overrides them for one run, but models
+kept forever stay untouched. Schedule the command outside busy hours, e.g.
+nightly from cron:
+
+    30 2 * * * manage.py purge_deleted --time-limit 1800 --vacuum
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.purge import purge, soft_delete_models, vacuum
+
+
+def _size(value):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024 or unit == 'GiB':
+            return f'{value:.0f} {unit}' if unit == 'B' else f'{value:.1f} {unit}'
+        value /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Permanently deletes soft-deleted rows whose retention window has passed, in dependency order '
+        'and in throttled batches, and reports what was reclaimed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', default=[], help='Only this model label, e.g. project.task (repeatable)')
+        parser.add_argument('--days', type=int, help='Retention in days for every model that has a retention window')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per batch and transaction')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--lock-timeout', type=int, default=2000, help='Milliseconds a batch waits for a lock before retrying')
+        parser.add_argument('--time-limit', type=float, help='Stop starting batches after this many seconds')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be purged without deleting anything')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE the purged tables afterwards')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days cannot be negative')
+        models = None
+        if options['model']:
+            known = {model._meta.label_lower: model for model in soft_delete_models()}
+            unknown = {label.lower() for label in options['model']} - set(known)
+            if unknown:
+                raise CommandError(f'Unknown or not soft-deletable models: {", ".join(sorted(unknown))}')
+            models = [known[label.lower()] for label in options['model']]
+
+        reports = purge(
+            models,
+            days=options['days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            lock_timeout=options['lock_timeout'],
+            time_limit=options['time_limit'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'Would purge' if options['dry_run'] else 'Purged'
+        for report in reports:
+            line = f"{report['model']:<24} {verb.lower()} {report['purged']:>9}  kept {report['kept']:>7}"
+            if not options['dry_run']:
+                line += (
+                    f"  cascaded {report['cascaded']:>7}  nulled {report['nulled']:>6}"
+                    f"  in {report['batches']} batch(es)  ~{_size(report['reclaimed_bytes'])}"
+                )
+            self.stdout.write(line)
+
+        purged = [report for report in reports if report['purged']]
+        if options['vacuum'] and purged and not options['dry_run']:
+            vacuum([report['model'] for report in purged])
+        total = sum(report['purged'] for report in reports)
+        reclaimed = sum(report['reclaimed_bytes'] for report in reports)
+        summary = f'{verb} {total} row(s) from {len(purged)} model(s)'
+        if not options['dry_run']:
+            summary += f', about {_size(reclaimed)} reclaimed'
+        self.stdout.write(self.style.SUCCESS(summary))
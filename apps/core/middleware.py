@@ -0,0 +1,172 @@
+"""
+Per-request SQL instrumentation.
+
+``QueryInstrumentationMiddleware`` hooks every database connection with
+``connection.execute_wrapper`` for the duration of a request and records
+the number of queries, the time spent in them and how often each query
+shape (its SQL with parameters left out) was repeated. Repeated shapes are
+the signature of N+1 queries.
+
+For each request it then:
+
+* adds a ``Server-Timing`` header (``db`` and ``app`` durations), which
+  browser developer tools show next to the request;
+* logs one structured line to the ``apps.core.sql`` logger;
+* checks the request against ``SQL_QUERY_BUDGETS`` for its URL name and,
+  depending on ``SQL_QUERY_BUDGET_MODE``, logs a warning (``warn``) or
+  raises ``QueryBudgetExceeded`` (``fail``).
+
+Budgets apply to GET and HEAD requests, whose cost should not depend on
+how much data there is. They are keyed by namespaced URL name and are
+either a maximum number of queries or a dict with ``queries`` and/or
+``duplicates`` (the number of extra executions of repeated query shapes):
+
+    SQL_QUERY_BUDGETS = {
+        'project:task_list': 8,
+        'project:project_detail': {'queries': 10, 'duplicates': 0},
+    }
+
+Queries run while a streaming response is consumed are not counted.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('apps.core.sql')
+
+BUDGET_MODES = ('off', 'warn', 'fail')
+# Lists of placeholders vary in length with their parameters
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)*\s*%s\s*\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """The shape of ``sql``: the statement without its parameters."""
+    return _PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """An ``execute_wrapper`` that counts and times the queries it sees."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Executions of a query shape beyond its first."""
+        return sum(count - 1 for count in self.shapes.values())
+
+    def repeated(self, limit=3):
+        """The most repeated query shapes with their execution counts."""
+        return [(sql, count) for sql, count in self.shapes.most_common(limit) if count > 1]
+
+    def hooks(self):
+        """Context manager installing the recorder on every connection."""
+        stack = ExitStack()
+        for connection in connections.all(initialized_only=False):
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def _budget(url_name):
+    budget = settings.SQL_QUERY_BUDGETS.get(url_name)
+    if budget is None:
+        return {}
+    if isinstance(budget, int):
+        return {'queries': budget}
+    return budget
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the SQL of each request; see the module docstring. Disabled when
+    ``SQL_INSTRUMENTATION`` is False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        if settings.SQL_QUERY_BUDGET_MODE not in BUDGET_MODES:
+            raise ValueError(f'SQL_QUERY_BUDGET_MODE must be one of {", ".join(BUDGET_MODES)}')
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.hooks():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.hooks():
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def finish(self, request, response, recorder, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;desc="{recorder.count} queries";dur={recorder.duration * 1000:.1f}',
+            f'app;dur={elapsed * 1000:.1f}',
+        ])
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'duplicates': recorder.duplicates,
+            'sql_ms': round(recorder.duration * 1000, 1),
+            'total_ms': round(elapsed * 1000, 1),
+        }
+        logger.info(json.dumps(record), extra={'sql': record})
+        self.check_budget(request, url_name, recorder)
+        return response
+
+    def check_budget(self, request, url_name, recorder):
+        if settings.SQL_QUERY_BUDGET_MODE == 'off' or not url_name or request.method not in ('GET', 'HEAD'):
+            return
+        budget = _budget(url_name)
+        over = [
+            f'{measure} {actual} > {budget[measure]}'
+            for measure, actual in (('queries', recorder.count), ('duplicates', recorder.duplicates))
+            if measure in budget and actual > budget[measure]
+        ]
+        if not over:
+            return
+        message = f'{url_name} exceeded its SQL budget: {", ".join(over)}'
+        repeated = recorder.repeated()
+        if repeated:
+            message += '; most repeated: ' + '; '.join(f'{count}x {sql[:200]}' for sql, count in repeated)
+        if settings.SQL_QUERY_BUDGET_MODE == 'fail':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
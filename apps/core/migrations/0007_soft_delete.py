@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:05
+
+import apps.core.softdelete
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_remove_lookupvalue_core_lookup_categor_6727b5_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='lookupcategory',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='lookupvalue',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='lookupcategory',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='lookupvalue',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+    ]
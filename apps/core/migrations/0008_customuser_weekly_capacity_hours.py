@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:40
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='weekly_capacity_hours',
+            field=models.DecimalField(decimal_places=2, default=Decimal('40.00'), help_text='Hours a week this user can work on tasks; 0 for users who do not take assignments', max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('168.00'))], verbose_name='Weekly Capacity'),
+        ),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
+from decimal import Decimal
 import uuid
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from .lookups import lookups
+from .softdelete import ActiveManager, SoftDeleteQuerySet
 
 
 class BaseModel(models.Model):
@@ -17,9 +21,20 @@ class BaseModel(models.Model):
         created_by (ForeignKey): User who created the object
         updated_by (ForeignKey): User who last updated the object
         is_active (BooleanField): Soft deletion status
+        deleted_date (DateTimeField): When the object was soft deleted
         notes (TextField): Optional notes about the object
         metadata (JSONField): Flexible field for additional data
+
+    ``objects`` returns active rows only and ``all_objects`` (the default
+    manager) every row; see ``apps.core.softdelete``. Subclasses list the
+    reverse relations whose rows are soft deleted and restored along with
+    theirs in ``soft_delete_cascade``.
     """
+    all_objects = SoftDeleteQuerySet.as_manager()
+    objects = ActiveManager()
+
+    soft_delete_cascade = ()
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_date = models.DateTimeField(
         auto_now_add=True,
@@ -56,6 +71,14 @@ class BaseModel(models.Model):
         verbose_name=_('Active'),
         help_text=_('Whether this object is active. Inactive objects are treated as deleted.')
     )
+
+    deleted_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('Deleted Date'),
+        help_text=_('Date and time when this object was soft deleted')
+    )
     
     notes = models.TextField(
         blank=True,
@@ -73,28 +96,74 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so signal handlers can compute deltas
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    @property
+    def is_new(self):
+        """Whether this object has not been saved to or loaded from the database."""
+        return not hasattr(self, '_loaded_values')
+
+    def get_loaded_value(self, attname, default=None):
+        """Value of ``attname`` as last loaded from or saved to the database."""
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def has_changed(self, *attnames):
+        """Whether any of the given fields differ from their loaded values."""
+        if self.is_new:
+            return True
+        return any(
+            attname in self._loaded_values and self._loaded_values[attname] != getattr(self, attname)
+            for attname in attnames
+        )
+
     def save(self, *args, **kwargs):
         # Ensure metadata is a dict
         if self.metadata is None:
             self.metadata = {}
-        super().save(*args, **kwargs)
+        # Deactivating through a form or the admin counts as a soft delete
+        if self.is_active:
+            self.deleted_date = None
+        elif self.deleted_date is None:
+            self.deleted_date = timezone.now()
+        # Keep the row and anything signal handlers derive from it in one transaction
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
 
     def delete(self, using=None, keep_parents=False):
         """
-        Soft delete the object by setting is_active to False.
+        Soft delete the object and the rows in its ``soft_delete_cascade``.
         Use force_delete() for actual deletion.
         """
-        self.is_active = False
-        self.save(using=using)
+        self._set_active(type(self).all_objects.using(using or self._state.db).filter(pk=self.pk).soft_delete)
 
     def force_delete(self, using=None, keep_parents=False):
         """Actually delete the object from the database."""
-        super().delete(using=using, keep_parents=keep_parents)
+        with transaction.atomic(using=using, savepoint=False):
+            return super().delete(using=using, keep_parents=keep_parents)
 
     def restore(self):
-        """Restore a soft-deleted object."""
-        self.is_active = True
-        self.save()
+        """Restore a soft-deleted object and the rows deleted along with it."""
+        self._set_active(type(self).all_objects.using(self._state.db).filter(pk=self.pk).restore)
+
+    def _set_active(self, change):
+        change()
+        fields = ('is_active', 'deleted_date', 'updated_date')
+        values = type(self).all_objects.using(self._state.db).filter(pk=self.pk).values(*fields).get()
+        for attname, value in values.items():
+            setattr(self, attname, value)
+        # The row changed without a save(); signal handlers must not see it again
+        if not self.is_new:
+            self._loaded_values.update(values)
 
 
 class CustomUser(AbstractUser):
@@ -122,6 +191,15 @@ class CustomUser(AbstractUser):
         help_text=_('Date and time when this user was last updated')
     )
     
+    weekly_capacity_hours = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal('40.00'),
+        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('168.00'))],
+        verbose_name=_('Weekly Capacity'),
+        help_text=_('Hours a week this user can work on tasks; 0 for users who do not take assignments')
+    )
+
     notes = models.TextField(
         blank=True,
         verbose_name=_('Notes'),
@@ -283,6 +361,8 @@ class LookupValue(BaseModel):
 class LookupManager:
     """
     Helper class to manage and access lookup values throughout the system.
+    Values are served from the process-wide registry in ``apps.core.lookups``
+    so repeated lookups do not hit the database.
     Usage:
         # In models.py:
         status = models.ForeignKey(
@@ -303,31 +383,25 @@ class LookupManager:
     @staticmethod
     def get_category(category_code):
         """Get a lookup category by its code."""
-        return LookupCategory.objects.filter(code=category_code).first()
+        return lookups.category(category_code)
     
     @staticmethod
     def get_value(category_code, value_code):
         """Get a specific lookup value by category and value codes."""
-        return LookupValue.objects.filter(
-            category__code=category_code,
-            code=value_code
-        ).first()
+        return lookups.get(category_code, value_code)
     
     @staticmethod
     def get_values(category_code, active_only=True):
-        """Get all lookup values for a category."""
-        queryset = LookupValue.objects.filter(category__code=category_code)
-        if active_only:
-            queryset = queryset.filter(is_active=True)
-        return queryset.order_by('sort_order', 'name')
+        """Get all lookup values for a category, ordered by sort order and name."""
+        return lookups.values(category_code, active_only=active_only)
     
     @staticmethod
     def get_default(category_code):
-        """Get the default value for a category."""
-        return LookupValue.objects.filter(
-            category__code=category_code,
-            is_default=True
-        ).first()
+        """Get the default value for a category (flagged with ``is_default`` in metadata)."""
+        for value in LookupManager.get_values(category_code):
+            if value.metadata.get('is_default'):
+                return value
+        return None
     
     @staticmethod
     def get_choices(category_code, include_blank=True):
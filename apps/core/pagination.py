@@ -0,0 +1,230 @@
+"""
+Keyset (seek) pagination.
+
+Offset pagination makes the database read and discard every row before the
+requested page, and needs a COUNT for the page links. Keyset pagination
+instead remembers the ordering values of the last row shown and asks for
+the rows after it:
+
+    WHERE (date, id) < (:last_date, :last_id) ORDER BY date DESC, id DESC
+
+which an index on the ordering columns answers directly at any depth.
+
+Usage:
+    from apps.core.pagination import KeysetPaginator
+
+    paginator = KeysetPaginator(TimeEntry.objects.all(), ('-date', '-id'), per_page=50)
+    page = paginator.page(request.GET.get('cursor'))
+    page.object_list, page.next_cursor, page.previous_cursor
+
+The ordering must end with a unique, non-null field. Other fields may be
+NULL (PostgreSQL sorts NULLs after every value ascending, before every value
+descending) and may follow relations (``project__created_date``). Cursors
+are opaque URL-safe strings; a malformed cursor raises ``InvalidCursor``.
+
+ListViews opt in with ``KeysetPaginationMixin`` and a ``keyset_ordering``.
+"""
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds times to milliseconds; a cursor needs the
+    # exact value or the equality half of the seek never matches
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def approximate_count(queryset):
+    """
+    The planner's row estimate for ``queryset``: no rows are read, so it is
+    as cheap for millions of rows as for ten, but only roughly right.
+    """
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, ordering, per_page):
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.descending = [name.startswith('-') for name in self.ordering]
+        self.keys, self.fields, self.nullable = [], [], []
+        annotations = {}
+        for index, name in enumerate(self.ordering):
+            path = name.lstrip('-')
+            chain = self._resolve(queryset.model, path)
+            self.fields.append(chain[-1])
+            self.nullable.append(any(field.null for field in chain))
+            if len(chain) > 1:
+                # Values across relations are read back through an annotation
+                key = f'keyset_{index}'
+                annotations[key] = F(path)
+            else:
+                key = chain[0].attname
+            self.keys.append(key)
+        self.queryset = queryset.annotate(**annotations) if annotations else queryset
+
+    @staticmethod
+    def _resolve(model, path):
+        chain = []
+        for part in path.split('__'):
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+            chain.append(field)
+            model = field.related_model
+        return chain
+
+    def approximate_count(self):
+        return approximate_count(self.queryset)
+
+    def encode_cursor(self, obj, backwards=False):
+        values = [getattr(obj, key) for key in self.keys]
+        payload = json.dumps({'v': values, 'b': backwards}, cls=_CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values = [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, payload['v'], strict=True)
+            ]
+            return values, bool(payload.get('b'))
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as error:
+            raise InvalidCursor(str(error))
+
+    def _beyond(self, index, value, backwards):
+        """Rows whose ``index``-th key sorts after ``value`` (before, if ``backwards``)."""
+        key = self.keys[index]
+        # Moving forwards through an ascending key, or backwards through a
+        # descending one, means larger values; NULL is larger than any value.
+        larger = self.descending[index] == backwards
+        if value is None:
+            return None if larger else Q(**{f'{key}__isnull': False})
+        condition = Q(**{f'{key}__{"gt" if larger else "lt"}': value})
+        if larger and self.nullable[index]:
+            condition |= Q(**{f'{key}__isnull': True})
+        return condition
+
+    def _equal(self, index, value):
+        key = self.keys[index]
+        return Q(**{f'{key}__isnull': True}) if value is None else Q(**{key: value})
+
+    def _seek(self, values, backwards):
+        """Rows strictly after ``values`` in ordering (before, if ``backwards``)."""
+        conditions = []
+        for index, value in enumerate(values):
+            condition = self._beyond(index, value, backwards)
+            if condition is None:
+                continue
+            for previous in range(index):
+                condition &= self._equal(previous, values[previous])
+            conditions.append(condition)
+        seek = reduce(or_, conditions)
+        if values[0] is not None and not self.nullable[0]:
+            # Redundant, but a plain range on the leading key lets the planner
+            # start an index scan at the cursor instead of filtering every row
+            larger = self.descending[0] == backwards
+            seek &= Q(**{f'{self.keys[0]}__{"gte" if larger else "lte"}': values[0]})
+        return seek
+
+    def seek(self, cursor=None):
+        """
+        The queryset of the rows after (or, for a previous-page cursor,
+        before) ``cursor`` in page order, and whether it runs backwards.
+        """
+        backwards = False
+        queryset = self.queryset
+        if cursor:
+            values, backwards = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._seek(values, backwards))
+        ordering = [
+            f'-{key}' if descending != backwards else key
+            for key, descending in zip(self.keys, self.descending)
+        ]
+        return queryset.order_by(*ordering), backwards
+
+    def page(self, cursor=None):
+        """The page after (or, for a previous-page cursor, before) ``cursor``."""
+        queryset, backwards = self.seek(cursor)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return KeysetPage(rows)
+
+        has_next = has_more if not backwards else True
+        has_previous = has_more if backwards else bool(cursor)
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], backwards=True) if has_previous else None,
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Page a ListView by ``?cursor=`` over ``keyset_ordering`` instead of by
+    page number: no COUNT query and no OFFSET, so every page costs the same.
+
+    ``page_obj`` is a ``KeysetPage`` (``has_next``/``next_cursor``,
+    ``has_previous``/``previous_cursor``). With ``approximate_count`` set the
+    context also gets the planner's estimate of the total as
+    ``approximate_count``.
+    """
+    keyset_ordering = None
+    cursor_kwarg = 'cursor'
+    approximate_count = False
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404(_('Invalid page cursor'))
+        return paginator, page, page.object_list, page.has_next or page.has_previous
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.approximate_count and context.get('paginator') is not None:
+            context['approximate_count'] = context['paginator'].approximate_count()
+        return context
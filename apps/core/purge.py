@@ -0,0 +1,225 @@
+"""
+Hard delete of soft-deleted rows whose retention window has passed.
+
+``SOFT_DELETE_RETENTION`` maps model labels (``project.timeentry``) to the
+number of days a soft-deleted row is kept; ``default`` covers every other
+``BaseModel`` and ``None`` keeps rows forever. ``purge()`` removes the
+expired rows of each model in batches of raw DELETEs, without loading them
+or going through the deletion collector:
+
+* models are purged in dependency order, referencing models first, so time
+  entries go before their tasks and tasks before their projects;
+* a row still referenced through a PROTECT, RESTRICT or CASCADE foreign key
+  (a task whose time entries are within their own window, a time entry on
+  an invoice) is left for a later run;
+* SET_NULL references to a purged row are cleared, and rows of models
+  without soft delete that cascade from it (project rollups, invoice lines)
+  are deleted in the same batch;
+* each batch is a transaction of its own with a ``lock_timeout``, claims its
+  rows with ``FOR UPDATE SKIP LOCKED`` and is followed by a ``pause``, so a
+  purge never holds locks for long or queues behind rows in use. A batch
+  that still runs into a lock (or a concurrent insert) is retried.
+
+``post_purge`` is sent once per batch with the sender model and the primary
+keys of the purged rows. The ``purge_deleted`` command runs a purge; it is
+meant to be scheduled (cron, systemd timer) outside busy hours.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+from graphlib import TopologicalSorter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, connections, transaction
+from django.db.models import CASCADE, SET_NULL, Exists, OuterRef
+from django.dispatch import Signal
+from django.utils import timezone
+
+logger = logging.getLogger('apps.core.purge')
+
+# Sent with sender (model), pks and using
+post_purge = Signal()
+
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def soft_delete_models():
+    """Every concrete model with soft delete."""
+    from .models import BaseModel
+    return [
+        model for model in apps.get_models()
+        if issubclass(model, BaseModel) and not model._meta.proxy
+    ]
+
+
+def retention(model):
+    """Days a soft-deleted ``model`` row is kept, or None to keep it forever."""
+    windows = settings.SOFT_DELETE_RETENTION
+    return windows.get(model._meta.label_lower, windows.get('default'))
+
+
+def purge_order(candidates):
+    """``candidates`` ordered so that every model comes before the models it references."""
+    candidates = list(candidates)
+    referenced_by = {model: set() for model in candidates}
+    for model in candidates:
+        for field in model._meta.concrete_fields:
+            target = field.related_model
+            if field.is_relation and target in referenced_by and target is not model:
+                referenced_by[target].add(model)
+    return list(TopologicalSorter(referenced_by).static_order())
+
+
+def _references_to(model):
+    """The reverse foreign key and one-to-one relations of ``model``."""
+    return [
+        relation for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete and (relation.one_to_many or relation.one_to_one)
+    ]
+
+
+def _references(model):
+    """
+    The relations pointing at ``model`` split into those that block a purge,
+    those whose rows are deleted along and those that are set to NULL.
+    """
+    from .models import BaseModel
+    blocking, cascade, set_null = [], [], []
+    for relation in _references_to(model):
+        related = relation.related_model
+        if relation.on_delete is SET_NULL:
+            set_null.append(relation)
+        elif (relation.on_delete is CASCADE and not issubclass(related, BaseModel)
+                and not _references_to(related)):
+            cascade.append(relation)
+        else:
+            blocking.append(relation)
+    return blocking, cascade, set_null
+
+
+def _expired(model, cutoff, blocking, using):
+    """Soft-deleted rows older than ``cutoff`` that nothing in ``blocking`` references."""
+    rows = model.all_objects.using(using).filter(is_active=False, deleted_date__lt=cutoff)
+    for relation in blocking:
+        rows = rows.exclude(Exists(
+            relation.related_model._base_manager.filter(**{relation.field.name: OuterRef('pk')})
+        ))
+    return rows
+
+
+def _raw_delete(cursor, model, column, pks):
+    quote = cursor.db.ops.quote_name
+    cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} = ANY(%s)', [pks])
+    return cursor.rowcount
+
+
+def _row_size(model, using):
+    """
+    Average bytes per row of ``model``'s table, indexes and TOAST included,
+    over all of its partitions if it is partitioned.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT sum(pg_total_relation_size(oid)), sum(greatest(reltuples, 0)) FROM pg_class '
+            'WHERE oid = %s::regclass OR oid IN (SELECT relid FROM pg_partition_tree(%s::regclass))',
+            [model._meta.db_table] * 2,
+        )
+        size, rows = cursor.fetchone()
+    return float(size) / rows if rows > 0 else 0
+
+
+def _purge_batch(model, expired, cascade, set_null, batch_size, lock_timeout, using):
+    """Purge up to ``batch_size`` rows; returns (purged, cascaded, nulled)."""
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [f'{lock_timeout}ms'])
+        pks = list(
+            expired.order_by('deleted_date').select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return 0, 0, 0
+        nulled = sum(
+            relation.related_model._base_manager.using(using)
+            .filter(**{f'{relation.field.name}__in': pks}).update(**{relation.field.name: None})
+            for relation in set_null
+        )
+        cascaded = sum(_raw_delete(cursor, relation.related_model, relation.field.column, pks) for relation in cascade)
+        purged = _raw_delete(cursor, model, model._meta.pk.column, pks)
+        post_purge.send(sender=model, pks=pks, using=using)
+    return purged, cascaded, nulled
+
+
+def purge(models=None, days=None, now=None, batch_size=1000, pause=0.0, lock_timeout=2000,
+          time_limit=None, retries=3, dry_run=False, using=DEFAULT_DB_ALIAS):
+    """
+    Purge the expired soft-deleted rows of ``models`` (default: every model
+    with soft delete); see the module docstring. ``days`` replaces the
+    retention window of every model that has one. Stops starting batches
+    after ``time_limit`` seconds.
+
+    Returns one dict per model, in purge order: the retention in days, the
+    rows ``purged`` (with ``dry_run``, the rows that would be), rows of
+    other tables ``cascaded`` and references ``nulled``, the expired rows
+    ``kept`` because they are still referenced or were busy, the number of
+    ``batches`` and the approximate ``reclaimed_bytes``, which become
+    reusable once the table is vacuumed.
+    """
+    now = now or timezone.now()
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    reports = []
+    for model in purge_order(models or soft_delete_models()):
+        window = retention(model)
+        if window is None:
+            continue
+        if days is not None:
+            window = days
+        cutoff = now - timedelta(days=window)
+        blocking, cascade, set_null = _references(model)
+        expired = _expired(model, cutoff, blocking, using)
+        report = {
+            'model': model._meta.label_lower, 'retention_days': window, 'purged': 0, 'cascaded': 0,
+            'nulled': 0, 'kept': 0, 'batches': 0, 'reclaimed_bytes': 0,
+        }
+        if dry_run:
+            report['purged'] = expired.count()
+        else:
+            row_size = _row_size(model, using)
+            failures = 0
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    purged, cascaded, nulled = _purge_batch(
+                        model, expired, cascade, set_null, batch_size, lock_timeout, using,
+                    )
+                except (OperationalError, IntegrityError) as error:
+                    # Rows locked or referenced by a concurrent transaction
+                    lock_error = getattr(error.__cause__, 'pgcode', None) == LOCK_NOT_AVAILABLE
+                    if not (lock_error or isinstance(error, IntegrityError)):
+                        raise
+                    failures += 1
+                    if failures > retries:
+                        break
+                    time.sleep(max(pause, 0.1) * 2 ** failures)
+                    continue
+                if not purged:
+                    break
+                report['purged'] += purged
+                report['cascaded'] += cascaded
+                report['nulled'] += nulled
+                report['batches'] += 1
+                if pause:
+                    time.sleep(pause)
+            report['reclaimed_bytes'] = round(report['purged'] * row_size)
+        report['kept'] = _expired(model, cutoff, [], using).count() - (report['purged'] if dry_run else 0)
+        logger.info(json.dumps(report), extra={'purge': report})
+        reports.append(report)
+    return reports
+
+
+def vacuum(model_labels, using=DEFAULT_DB_ALIAS):
+    """VACUUM ANALYZE the tables of ``model_labels``; needs autocommit."""
+    with connections[using].cursor() as cursor:
+        for label in model_labels:
+            table = connections[using].ops.quote_name(apps.get_model(label)._meta.db_table)
+            cursor.execute(f'VACUUM (ANALYZE) {table}')
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lookups import lookups
+from .models import LookupCategory, LookupValue
+from .purge import post_purge
+from .softdelete import post_restore, post_soft_delete
+
+
+@receiver(post_save, sender=LookupCategory)
+@receiver(post_delete, sender=LookupCategory)
+@receiver(post_save, sender=LookupValue)
+@receiver(post_delete, sender=LookupValue)
+@receiver(post_soft_delete, sender=LookupCategory)
+@receiver(post_soft_delete, sender=LookupValue)
+@receiver(post_restore, sender=LookupCategory)
+@receiver(post_restore, sender=LookupValue)
+@receiver(post_purge, sender=LookupCategory)
+@receiver(post_purge, sender=LookupValue)
+def invalidate_lookup_registry(sender, **kwargs):
+    """Reload lookups locally now and in every process once the change commits."""
+    lookups.clear()
+    transaction.on_commit(lookups.invalidate)
@@ -0,0 +1,105 @@
+"""
+Set-based soft delete for ``BaseModel``.
+
+Every ``BaseModel`` has two managers:
+
+* ``all_objects``: every row. It is the default manager, so the admin,
+  uniqueness checks, related managers and forward relations keep seeing
+  soft-deleted rows.
+* ``objects``: active rows only (``is_active=True``).
+
+``SoftDeleteQuerySet.soft_delete()`` deactivates rows with a single UPDATE
+per model. It first deactivates the active rows reached through the model's
+``soft_delete_cascade`` relations, recursively. All of these rows get the
+same ``deleted_date``.
+
+``restore()`` reactivates rows in the same way, together with the related
+rows whose ``deleted_date`` equals their parent's. Those are the rows the
+parent's soft delete took with it; rows deleted on their own earlier stay
+deleted.
+
+Neither method sends ``post_save``. Instead they send ``post_soft_delete``
+or ``post_restore`` once per call, with the sender model and the primary
+keys of the rows the call was made on. Receivers use this to refresh
+derived data such as totals and caches.
+
+``QuerySet.delete()`` and ``BaseModel.force_delete()`` still delete rows
+for real.
+"""
+from django.db import models, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Sent with sender (model), pks, deleted_date and using
+post_soft_delete = Signal()
+# Sent with sender (model), pks and using
+post_restore = Signal()
+
+
+def _cascade(model, parents, select, update):
+    """Update the rows related to ``parents`` through ``soft_delete_cascade``, deepest first."""
+    for name in model.soft_delete_cascade:
+        relation = model._meta.get_field(name)
+        children = relation.related_model.all_objects.using(parents.db).filter(
+            **{f'{relation.field.name}__in': parents}
+        )
+        children = select(children, relation.field.name)
+        # Grandchildren first: they are found through children not yet updated
+        _cascade(relation.related_model, children, select, update)
+        update(children)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        Deactivate the active rows of this queryset and the rows cascading
+        from them; returns the number of rows deactivated directly.
+        """
+        now = timezone.now()
+        changes = {'is_active': False, 'deleted_date': now, 'updated_date': now}
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.filter(is_active=True).values_list('pk', flat=True))
+            if not pks:
+                return 0
+            rows = self.model.all_objects.using(self.db).filter(pk__in=pks)
+            _cascade(
+                self.model, rows,
+                select=lambda children, parent: children.filter(is_active=True),
+                update=lambda children: children.update(**changes),
+            )
+            rows.update(**changes)
+            post_soft_delete.send(sender=self.model, pks=pks, deleted_date=now, using=self.db)
+        return len(pks)
+
+    def restore(self):
+        """
+        Reactivate the soft-deleted rows of this queryset and the rows that
+        were soft deleted with them; returns the number of rows reactivated
+        directly.
+        """
+        changes = {'is_active': True, 'deleted_date': None, 'updated_date': timezone.now()}
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.filter(is_active=False).values_list('pk', flat=True))
+            if not pks:
+                return 0
+            rows = self.model.all_objects.using(self.db).filter(pk__in=pks)
+            _cascade(
+                self.model, rows,
+                select=lambda children, parent: children.filter(
+                    is_active=False, deleted_date=F(f'{parent}__deleted_date'),
+                ),
+                update=lambda children: children.update(**changes),
+            )
+            rows.update(**changes)
+            post_restore.send(sender=self.model, pks=pks, using=self.db)
+        return len(pks)
+
+
+class ActiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Manager of the active (not soft-deleted) rows."""
+    # Data migrations keep finding rows through ``objects``
+    use_in_migrations = True
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
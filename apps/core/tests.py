@@ -1,3 +1,98 @@
-from django.test import TestCase
-
-# Create your tests here.
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .lookups import lookups
+from .middleware import QueryBudgetExceeded, fingerprint
+from .pagination import InvalidCursor, KeysetPaginator
+from .models import LookupCategory, LookupManager, LookupValue
+
+
+class LookupRegistryTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+
+    def test_resolves_seeded_values_without_queries(self):
+        lookups.get('TASK_STATUS', 'TODO')
+        with self.assertNumQueries(0):
+            todo = lookups.get('TASK_STATUS', 'TODO')
+            self.assertEqual(todo.code, 'TODO')
+            self.assertEqual(lookups.pk('TASK_STATUS', 'TODO'), todo.pk)
+            self.assertEqual(lookups.by_pk(todo.pk), todo)
+            self.assertEqual(
+                [v.code for v in LookupManager.get_values('PROJECT_STATUS')],
+                ['DRAFT', 'ACTIVE', 'ON_HOLD', 'COMPLETED', 'CANCELLED'],
+            )
+
+    def test_pks_skips_unknown_codes(self):
+        pks = lookups.pks('TASK_STATUS', ['TODO', 'NOPE'])
+        self.assertEqual(pks, [lookups.pk('TASK_STATUS', 'TODO')])
+
+    def test_saving_a_value_invalidates_the_registry(self):
+        category = LookupCategory.objects.get(code='PRIORITY')
+        self.assertIsNone(lookups.get('PRIORITY', 'TRIVIAL'))
+        LookupValue.objects.create(category=category, code='trivial', name='Trivial', sort_order=5)
+        self.assertEqual(lookups.get('PRIORITY', 'TRIVIAL').name, 'Trivial')
+
+    def test_inactive_values_are_hidden_from_choices(self):
+        value = lookups.get('PRIORITY', 'LOW')
+        LookupValue.objects.filter(pk=value.pk).update(is_active=False)
+        lookups.invalidate()
+        self.assertNotIn(value.pk, [pk for pk, _ in LookupManager.get_choices('PRIORITY')])
+        self.assertIsNotNone(lookups.get('PRIORITY', 'LOW'))
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.paginator = KeysetPaginator(
+            LookupValue.objects.filter(category__code='BILLING_STATUS'), ('sort_order', 'id'), per_page=2
+        )
+
+    def test_walks_forwards_and_back(self):
+        first = self.paginator.page()
+        self.assertFalse(first.has_previous)
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+        self.assertFalse(third.has_next)
+        self.assertEqual(
+            [value.code for page in (first, second, third) for value in page],
+            ['UNBILLED', 'READY', 'BILLED', 'PAID', 'NON_BILLABLE', 'DISPUTED'],
+        )
+        self.assertEqual(list(self.paginator.page(third.previous_cursor)), list(second))
+
+    def test_rejects_malformed_cursors(self):
+        for cursor in ('not-a-cursor', 'e30'):
+            with self.assertRaises(InvalidCursor):
+                self.paginator.page(cursor)
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        self.url = reverse('core:category-list')
+
+    def test_fingerprints_ignore_parameter_list_lengths(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s) AND a = %s'),
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s) AND a = %s'),
+        )
+
+    def test_reports_queries_in_header_and_log(self):
+        with self.assertLogs('apps.core.sql', 'INFO') as logs:
+            response = self.client.get(self.url)
+        self.assertRegex(response['Server-Timing'], r'^db;desc="\d+ queries";dur=[\d.]+, app;dur=[\d.]+$')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['url_name'], 'core:category-list')
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(SQL_QUERY_BUDGETS={'core:category-list': 1})
+    def test_budget_overruns_warn_or_fail(self):
+        with self.assertLogs('apps.core.sql', 'WARNING') as logs:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIn('exceeded its SQL budget', logs.output[-1])
+        with override_settings(SQL_QUERY_BUDGET_MODE='fail'):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(self.url)
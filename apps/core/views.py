@@ -165,7 +165,7 @@ class ValueCreateView(LoginRequiredMixin, SuperUserRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['category'] = LookupCategory.objects.get(id=self.kwargs['category_id'])
+        context['category'] = LookupCategory.all_objects.get(id=self.kwargs['category_id'])
         return context
 
     def form_valid(self, form):
@@ -178,7 +178,7 @@ class ValueCreateView(LoginRequiredMixin, SuperUserRequiredMixin, CreateView):
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
         category_id = self.kwargs['category_id']
-        form.fields['parent'].queryset = LookupValue.objects.filter(category_id=category_id)
+        form.fields['parent'].queryset = LookupValue.all_objects.filter(category_id=category_id)
         return form
 
 
@@ -202,7 +202,7 @@ class ValueUpdateView(LoginRequiredMixin, SuperUserRequiredMixin, UpdateView):
 
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
-        form.fields['parent'].queryset = LookupValue.objects.filter(
+        form.fields['parent'].queryset = LookupValue.all_objects.filter(
             category=self.object.category
         ).exclude(pk=self.object.pk)
         return form
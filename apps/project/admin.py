@@ -1,13 +1,16 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Sum, Count
+from django.db.models import Count
 from django.utils.html import format_html
+from apps.core.admin import restore_selected, soft_delete_selected
 from . import models
+from .billing import with_billing_amounts
 
 @admin.register(models.Client)
 class ClientAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'industry', 'primary_contact_name', 'project_count', 'is_active')
     list_filter = ('industry', 'is_active')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('name', 'code', 'primary_contact_name', 'primary_contact_email')
     readonly_fields = ('created_date', 'updated_date', 'created_by', 'updated_by')
     fieldsets = (
@@ -52,6 +55,7 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'client', 'manager', 'status', 'priority', 
                    'start_date', 'end_date', 'budget_status', 'is_active')
     list_filter = ('status', 'priority', 'client', 'is_active')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('name', 'code', 'description')
     readonly_fields = ('created_date', 'updated_date', 'created_by', 'updated_by')
     inlines = [ProjectMemberInline]
@@ -81,15 +85,17 @@ class ProjectAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'client', 'manager', 'status', 'priority', 'rollup'
+        )
+
     def budget_status(self, obj):
         if not obj.budget_amount:
             return '-'
-        actual_amount = obj.tasks.aggregate(
-            total=Sum('time_entries__hours', 
-                     filter={'time_entries__billable': True})
-        )['total'] or 0
+        rollup = getattr(obj, 'rollup', None)
         budget = float(obj.budget_amount)
-        actual = float(actual_amount * (obj.billing_rate or 0))
+        actual = float(rollup.billable_amount) if rollup else 0
         percentage = (actual / budget * 100) if budget else 0
         
         if percentage > 90:
@@ -100,8 +106,8 @@ class ProjectAdmin(admin.ModelAdmin):
             color = 'green'
         
         return format_html(
-            '<span style="color: {}">${:,.2f} / ${:,.2f} ({:.1f}%)</span>',
-            color, actual, budget, percentage
+            '<span style="color: {}">${} / ${} ({}%)</span>',
+            color, f'{actual:,.2f}', f'{budget:,.2f}', f'{percentage:.1f}'
         )
     budget_status.short_description = _('Budget Status')
 
@@ -118,14 +124,30 @@ class SubtaskInline(admin.TabularInline):
     fields = ('title', 'status', 'priority', 'assigned_to', 'due_date', 'estimated_hours')
     readonly_fields = ('actual_hours',)
 
+class PredecessorInline(admin.TabularInline):
+    model = models.TaskDependency
+    fk_name = 'successor'
+    extra = 0
+    fields = ('predecessor', 'type', 'lag_days')
+    raw_id_fields = ('predecessor',)
+    verbose_name = _('Predecessor')
+    verbose_name_plural = _('Predecessors')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(is_active=True)
+
 @admin.register(models.Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'project', 'status', 'priority', 'assigned_to', 
                    'due_date', 'progress', 'is_active')
     list_filter = ('project', 'status', 'priority', 'assigned_to', 'is_active', 'billable')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('title', 'description', 'project__name', 'project__code')
-    readonly_fields = ('actual_hours', 'created_date', 'updated_date', 'created_by', 'updated_by')
-    inlines = [SubtaskInline]
+    readonly_fields = (
+        'actual_hours', 'early_start', 'early_finish', 'late_start', 'late_finish', 'total_slack',
+        'created_date', 'updated_date', 'created_by', 'updated_by',
+    )
+    inlines = [SubtaskInline, PredecessorInline]
     fieldsets = (
         (None, {
             'fields': ('project', 'parent_task', 'title', 'description', 'is_active')
@@ -134,7 +156,11 @@ class TaskAdmin(admin.ModelAdmin):
             'fields': ('status', 'priority', 'assigned_to')
         }),
         (_('Schedule & Effort'), {
-            'fields': ('due_date', 'estimated_hours', 'actual_hours')
+            'fields': ('due_date', 'estimated_hours', 'actual_hours', 'duration_days')
+        }),
+        (_('Critical Path'), {
+            'fields': ('early_start', 'early_finish', 'late_start', 'late_finish', 'total_slack'),
+            'classes': ('collapse',)
         }),
         (_('Billing'), {
             'fields': ('billable', 'billing_rate')
@@ -160,8 +186,8 @@ class TaskAdmin(admin.ModelAdmin):
         else:
             color = 'green'
         return format_html(
-            '<span style="color: {}">{:.1f}h / {:.1f}h ({:.1f}%)</span>',
-            color, float(obj.actual_hours), float(obj.estimated_hours), percentage
+            '<span style="color: {}">{}h / {}h ({}%)</span>',
+            color, f'{obj.actual_hours:.1f}', f'{obj.estimated_hours:.1f}', f'{percentage:.1f}'
         )
     progress.short_description = _('Progress')
 
@@ -176,6 +202,7 @@ class TimeEntryAdmin(admin.ModelAdmin):
     list_display = ('date', 'user', 'task', 'project_code', 'hours', 
                    'billable_amount', 'billing_status', 'is_active')
     list_filter = ('date', 'user', 'task__project', 'billable', 'billing_status', 'is_active')
+    actions = [soft_delete_selected, restore_selected]
     search_fields = ('description', 'task__title', 'task__project__name', 'task__project__code')
     readonly_fields = ('created_date', 'updated_date', 'created_by', 'updated_by')
     fieldsets = (
@@ -200,6 +227,11 @@ class TimeEntryAdmin(admin.ModelAdmin):
     project_code.short_description = _('Project')
     project_code.admin_order_field = 'task__project__code'
 
+    def billable_amount(self, obj):
+        return obj.billing_amount
+    billable_amount.short_description = _('Billable Amount')
+    billable_amount.admin_order_field = 'billing_amount'
+
     def save_model(self, request, obj, form, change):
         if not change:
             obj.created_by = request.user
@@ -207,6 +239,78 @@ class TimeEntryAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'task', 'task__project', 'user'
+        return with_billing_amounts(super().get_queryset(request).select_related(
+            'task', 'task__project', 'user', 'billing_status'
+        ))
+
+class InvoiceLineInline(admin.TabularInline):
+    model = models.InvoiceLine
+    extra = 0
+    fields = ('date', 'project', 'entry', 'description', 'hours', 'rate', 'amount')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def entry(self, obj):
+        try:
+            return obj.time_entry
+        except models.TimeEntry.DoesNotExist:
+            # Entries of archived projects are in the archive tables
+            return _('Archived')
+    entry.short_description = _('Time Entry')
+
+    def get_queryset(self, request):
+        # Prefetched rather than joined: the line's time entry may be archived
+        return super().get_queryset(request).select_related('project').prefetch_related(
+            'time_entry__user', 'time_entry__task__project'
         )
+
+@admin.register(models.Invoice)
+class InvoiceAdmin(admin.ModelAdmin):
+    list_display = ('number', 'client', 'issue_date', 'due_date', 'period_end', 'hours', 'total_amount')
+    list_filter = ('client', 'issue_date')
+    search_fields = ('number', 'client__name', 'client__code')
+    readonly_fields = ('number', 'client', 'period_end', 'hours', 'total_amount',
+                       'created_date', 'updated_date', 'created_by', 'updated_by')
+    inlines = [InvoiceLineInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('client')
+
+    def has_add_permission(self, request):
+        # Invoices are created by the generate_invoices command
+        return False
+
+class ArchivedModelAdmin(admin.ModelAdmin):
+    """Read-only admin of an archive table (see apps.project.archive)."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(models.ArchivedTask)
+class ArchivedTaskAdmin(ArchivedModelAdmin):
+    list_display = ('title', 'project', 'status', 'assigned_to', 'due_date', 'actual_hours', 'is_active')
+    list_filter = ('project', 'is_active')
+    search_fields = ('title', 'project__code', 'project__name')
+    list_select_related = ('project', 'status', 'assigned_to')
+
+@admin.register(models.ArchivedTimeEntry)
+class ArchivedTimeEntryAdmin(ArchivedModelAdmin):
+    list_display = ('date', 'user', 'task', 'hours', 'billable', 'billing_status', 'is_active')
+    list_filter = ('date', 'task__project', 'billable', 'is_active')
+    search_fields = ('description', 'task__title', 'task__project__code')
+    list_select_related = ('task__project', 'user', 'billing_status')
+
+@admin.register(models.ArchivedTaskDependency)
+class ArchivedTaskDependencyAdmin(ArchivedModelAdmin):
+    list_display = ('predecessor', 'successor', 'type', 'lag_days', 'is_active')
+    list_filter = ('successor__project', 'is_active')
+    list_select_related = ('predecessor', 'successor', 'type')
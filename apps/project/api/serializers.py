@@ -1,3 +1,216 @@
-from rest_framework import serializers
-
-# Create your serializers here
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from apps.core.lookups import lookups
+from apps.project import scheduling, tasktree
+from apps.project.models import Client, Project, ProjectMember, ProjectRollup, Task, TaskDependency, TimeEntry
+
+# Create your serializers here
+
+# A relation that ``?include=`` expands in place of its primary key. ``path``
+# is the model relation; ``many`` relations are prefetched, others joined.
+Include = namedtuple('Include', ['path', 'serializer', 'many'], defaults=[False])
+
+
+class LookupField(serializers.Field):
+    """
+    A LookupValue foreign key read and written as its code.
+
+    Reads use the ``<field>_id`` column and the lookup registry, so neither
+    a join nor a query per row is needed.
+    """
+    default_error_messages = {
+        'invalid': _('"{code}" is not a valid {category} code.'),
+    }
+
+    def __init__(self, category, **kwargs):
+        self.category = category
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, pk):
+        value = lookups.by_pk(pk)
+        return value.code if value else None
+
+    def to_internal_value(self, code):
+        value = lookups.get(self.category, code)
+        if value is None or not value.is_active:
+            self.fail('invalid', code=code, category=self.category)
+        return value
+
+
+class ExpandableModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer whose output is narrowed by ``fields`` and expanded by
+    ``include`` (see ``Meta.includes``). ``id`` is always kept.
+    """
+    def __init__(self, *args, fields=None, include=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        includes = getattr(self.Meta, 'includes', {})
+        for name in include:
+            relation = includes[name]
+            source = {} if relation.path == name else {'source': relation.path}
+            self.fields[name] = relation.serializer(many=relation.many, read_only=True, **source)
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(include) - {'id'}:
+                self.fields.pop(name)
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'first_name', 'last_name', 'email']
+
+
+class ClientSerializer(ExpandableModelSerializer):
+    industry = LookupField('INDUSTRY', required=False, allow_null=True)
+
+    class Meta:
+        model = Client
+        fields = [
+            'id', 'name', 'code', 'industry', 'primary_contact_name',
+            'primary_contact_email', 'primary_contact_phone', 'billing_address',
+            'billing_email', 'default_billing_rate', 'payment_terms',
+            'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['is_active']
+
+
+class ProjectRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectRollup
+        fields = [
+            'hours', 'billable_hours', 'billable_amount', 'unbilled_amount',
+            'task_count', 'task_status_counts', 'updated_date',
+        ]
+
+
+class ProjectMemberSerializer(ExpandableModelSerializer):
+    role = LookupField('PROJECT_ROLE')
+
+    class Meta:
+        model = ProjectMember
+        fields = [
+            'id', 'project', 'user', 'role', 'join_date', 'end_date', 'billing_rate',
+            'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['is_active']
+        includes = {
+            'user': Include('user', UserSerializer),
+        }
+
+
+class ProjectSerializer(ExpandableModelSerializer):
+    status = LookupField('PROJECT_STATUS')
+    priority = LookupField('PRIORITY')
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'code', 'name', 'client', 'description', 'status', 'priority',
+            'start_date', 'end_date', 'manager', 'budget_amount', 'billing_rate',
+            'estimated_hours', 'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['is_active']
+        includes = {
+            'client': Include('client', ClientSerializer),
+            'manager': Include('manager', UserSerializer),
+            'rollup': Include('rollup', ProjectRollupSerializer),
+            'members': Include('memberships', ProjectMemberSerializer, many=True),
+        }
+
+
+class TaskSerializer(ExpandableModelSerializer):
+    status = LookupField('TASK_STATUS')
+    priority = LookupField('PRIORITY')
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'project', 'parent_task', 'title', 'description', 'status', 'priority',
+            'assigned_to', 'due_date', 'estimated_hours', 'actual_hours', 'duration_days',
+            'early_start', 'early_finish', 'late_start', 'late_finish', 'total_slack', 'billable',
+            'billing_rate', 'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['actual_hours', 'is_active']
+        includes = {
+            'project': Include('project', ProjectSerializer),
+            'assigned_to': Include('assigned_to', UserSerializer),
+        }
+
+    def validate_parent_task(self, parent):
+        if self.instance is not None:
+            try:
+                tasktree.check_parent(self.instance, parent)
+            except DjangoValidationError as error:
+                raise serializers.ValidationError(error.message_dict['parent_task'])
+        return parent
+
+
+class TaskDependencySerializer(ExpandableModelSerializer):
+    type = LookupField('DEPENDENCY_TYPE')
+
+    class Meta:
+        model = TaskDependency
+        fields = [
+            'id', 'predecessor', 'successor', 'type', 'lag_days', 'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['is_active']
+        includes = {
+            'predecessor': Include('predecessor', TaskSerializer),
+            'successor': Include('successor', TaskSerializer),
+        }
+
+    def validate(self, attrs):
+        dependency = TaskDependency() if self.instance is None else TaskDependency(pk=self.instance.pk)
+        for name in ('predecessor', 'successor'):
+            setattr(dependency, name, attrs.get(name, getattr(self.instance, name, None)))
+        try:
+            scheduling.check_dependency(dependency)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.message_dict)
+        return attrs
+
+
+class TimeEntrySerializer(ExpandableModelSerializer):
+    billing_status = LookupField('BILLING_STATUS', required=False)
+    # Present when the queryset is annotated by billing.with_billing_amounts
+    effective_rate = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    billing_amount = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = TimeEntry
+        fields = [
+            'id', 'task', 'user', 'date', 'hours', 'description', 'billable',
+            'billing_rate', 'billing_status', 'effective_rate', 'billing_amount',
+            'is_active', 'created_date', 'updated_date',
+        ]
+        read_only_fields = ['user', 'is_active']
+        includes = {
+            'task': Include('task', TaskSerializer),
+            'user': Include('user', UserSerializer),
+        }
+
+
+class TimesheetEntrySerializer(serializers.Serializer):
+    task_id = serializers.UUIDField()
+    date = serializers.DateField()
+    hours = serializers.DecimalField(max_digits=6, decimal_places=2)
+    description = serializers.CharField()
+    billable = serializers.BooleanField(required=False)
+
+
+class TimesheetSerializer(serializers.Serializer):
+    entries = TimesheetEntrySerializer(many=True, allow_empty=False, max_length=200)
+
+
+class TimeEntrySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TimeEntry
+        fields = ['id', 'task', 'date', 'hours', 'description', 'billable']
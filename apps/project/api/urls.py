@@ -1,7 +1,19 @@
-from django.urls import path
-
-app_name = 'api'
-
-urlpatterns = [
-    # Add your API URL patterns here
-]
\ No newline at end of file
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('clients', views.ClientViewSet, basename='client')
+router.register('projects', views.ProjectViewSet, basename='project')
+router.register('tasks', views.TaskViewSet, basename='task')
+router.register('task-dependencies', views.TaskDependencyViewSet, basename='taskdependency')
+router.register('members', views.ProjectMemberViewSet, basename='member')
+router.register('time-entries', views.TimeEntryViewSet, basename='timeentry')
+
+urlpatterns = [
+    path('timesheet/', views.TimesheetSubmitView.as_view(), name='timesheet'),
+    path('', include(router.urls)),
+]
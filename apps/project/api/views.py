@@ -1,3 +1,247 @@
-from rest_framework import viewsets, permissions
-
-# Create your API views here
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.conditional import conditional_get
+from apps.core.lookups import lookups
+from apps.project import selectors, services
+from apps.project.billing import with_billing_amounts
+from apps.project.models import (
+    CLIENT_SEARCH_VECTOR, PROJECT_SEARCH_VECTOR, Client, Project, ProjectMember, Task, TaskDependency, TimeEntry,
+)
+from . import serializers
+from .pagination import KeysetPagination
+
+# Create your API views here
+
+
+class TimesheetSubmitView(APIView):
+    """
+    Log a batch of time entries (typically a week) for the current user.
+
+    POST {"entries": [{"task_id", "date", "hours", "description", "billable"}]}
+    Either every entry is created or none is; validation errors are keyed
+    by the index of the offending entry.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = serializers.TimesheetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            created = services.submit_time_entries(request.user, serializer.validated_data['entries'])
+        except DjangoValidationError as error:
+            return Response({'entries': error.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'entries': serializers.TimeEntrySummarySerializer(created, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ExpandableModelViewSet(viewsets.ModelViewSet):
+    """
+    CRUD endpoint with sparse fields, inline relations and keyset paging.
+
+    ``?fields=name,code`` narrows the serialized fields and, on reads, the
+    columns loaded (``QuerySet.only()``). ``?include=client,members`` expands
+    relations listed in the serializer's ``Meta.includes``: single-valued ones
+    are joined, many-valued ones prefetched, so a page costs the same number
+    of queries whatever its size. Lists are paginated by cursor over
+    ``ordering``, which must end with a unique field. Single objects answer
+    conditional GETs from ``get_last_modified()``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    lookup_value_regex = '[0-9a-f-]{36}'
+    ordering = ('-created_date', '-id')
+    # Includes whose changes get_last_modified() accounts for
+    last_modified_includes = ()
+
+    def _list_param(self, name):
+        value = self.request.query_params.get(name, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    @cached_property
+    def requested_fields(self):
+        """Requested field names, or None for every field."""
+        return self._list_param('fields') or None
+
+    @cached_property
+    def requested_includes(self):
+        names = self._list_param('include')
+        includes = getattr(self.get_serializer_class().Meta, 'includes', {})
+        unknown = [name for name in names if name not in includes]
+        if unknown:
+            raise ValidationError({'include': _('Unknown relation(s): %s.') % ', '.join(unknown)})
+        return [(name, includes[name]) for name in names]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields)
+        kwargs.setdefault('include', [name for name, _relation in self.requested_includes])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for _name, relation in self.requested_includes:
+            if relation.many:
+                queryset = queryset.prefetch_related(relation.path)
+            else:
+                queryset = queryset.select_related(relation.path)
+        if self.request.method in permissions.SAFE_METHODS and self.requested_fields:
+            queryset = queryset.only(*self.get_only_fields())
+        return queryset
+
+    def get_only_fields(self):
+        """Columns needed for the requested fields, includes and ordering."""
+        concrete = {field.name for field in self.queryset.model._meta.concrete_fields}
+        names = {'id'} | {name.lstrip('-') for name in self.ordering}
+        names |= {name for name in self.requested_fields if name in concrete}
+        names |= {relation.path for _name, relation in self.requested_includes if not relation.many}
+        return sorted(names)
+
+    def get_last_modified(self):
+        """When the requested object last changed, for conditional GETs."""
+        return self.filter_queryset(self.get_queryset()).filter(
+            pk=self.kwargs[self.lookup_field]
+        ).values_list('updated_date', flat=True).first()
+
+    def retrieve(self, request, *args, **kwargs):
+        def respond():
+            return super(ExpandableModelViewSet, self).retrieve(request, *args, **kwargs)
+
+        if any(name not in self.last_modified_includes for name, _relation in self.requested_includes):
+            return respond()
+        return conditional_get(request, self.get_last_modified(), respond)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user, updated_by=self.request.user)
+
+    def perform_update(self, serializer):
+        serializer.save(updated_by=self.request.user)
+
+
+class ClientViewSet(ExpandableModelViewSet):
+    """Active clients; ``?search=`` is a full-text search over name, code, contact and notes."""
+    queryset = Client.objects.all()
+    serializer_class = serializers.ClientSerializer
+
+    def get_last_modified(self):
+        return selectors.client_last_modified(self.kwargs['pk'])
+
+    def filter_queryset(self, queryset):
+        search = self.request.query_params.get('search', '')
+        if search:
+            queryset = selectors.search_filter(queryset, search, CLIENT_SEARCH_VECTOR)
+        return queryset
+
+
+class ProjectViewSet(ExpandableModelViewSet):
+    """Active projects, filtered like the project list page."""
+    queryset = Project.objects.all()
+    serializer_class = serializers.ProjectSerializer
+    last_modified_includes = ('client', 'rollup', 'members')
+
+    def get_last_modified(self):
+        return selectors.project_last_modified(self.kwargs['pk'])
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        search = params.get('search', '')
+        if search:
+            queryset = selectors.search_filter(
+                queryset, search, PROJECT_SEARCH_VECTOR, client=(Client, CLIENT_SEARCH_VECTOR)
+            )
+        if params.get('status'):
+            queryset = queryset.filter(status_id=lookups.pk('PROJECT_STATUS', params['status']))
+        if params.get('client'):
+            queryset = queryset.filter(client_id=params['client'])
+        return queryset
+
+
+class TaskViewSet(ExpandableModelViewSet):
+    """Active tasks, filtered like the task list page (``selectors.filter_tasks``)."""
+    queryset = Task.objects.all()
+    serializer_class = serializers.TaskSerializer
+    last_modified_includes = ('project',)
+
+    def get_last_modified(self):
+        return selectors.task_last_modified(self.kwargs['pk'])
+
+    def filter_queryset(self, queryset):
+        return selectors.filter_tasks(queryset, self.request.query_params, self.request.user)
+
+
+class TaskDependencyViewSet(ExpandableModelViewSet):
+    """Active task dependencies; ``?project=`` and ``?task=`` (either end) filter by id."""
+    queryset = TaskDependency.objects.all()
+    serializer_class = serializers.TaskDependencySerializer
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('project'):
+            queryset = queryset.filter(successor__project_id=params['project'])
+        if params.get('task'):
+            queryset = queryset.filter(Q(predecessor_id=params['task']) | Q(successor_id=params['task']))
+        return queryset
+
+
+class ProjectMemberViewSet(ExpandableModelViewSet):
+    """Active project memberships; ``?project=`` and ``?user=`` filter by id."""
+    queryset = ProjectMember.objects.all()
+    serializer_class = serializers.ProjectMemberSerializer
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('project'):
+            queryset = queryset.filter(project_id=params['project'])
+        if params.get('user'):
+            queryset = queryset.filter(user_id=params['user'])
+        return queryset
+
+
+class TimeEntryViewSet(ExpandableModelViewSet):
+    """
+    Time entries, newest first, filtered by ``selectors.filter_time_entries``.
+    Staff see everyone's entries, other users only their own.
+    """
+    queryset = TimeEntry.all_objects.all()
+    serializer_class = serializers.TimeEntrySerializer
+    ordering = ('-date', '-id')
+    billing_fields = {'effective_rate', 'billing_amount'}
+
+    def get_last_modified(self):
+        # The billing amounts change with the rates, not only with the entry
+        return selectors.time_entry_last_modified(
+            self.filter_queryset(self.get_queryset()).filter(pk=self.kwargs[self.lookup_field])
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        if self.requested_fields is None or self.billing_fields & set(self.requested_fields):
+            queryset = with_billing_amounts(queryset)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        try:
+            return selectors.filter_time_entries(queryset, self.request.query_params)
+        except DjangoValidationError as error:
+            raise ValidationError(error.messages)
+
+    def perform_create(self, serializer):
+        billing_status = serializer.validated_data.get('billing_status')
+        if billing_status is None:
+            billable = serializer.validated_data.get('billable', True)
+            billing_status = lookups.get('BILLING_STATUS', 'UNBILLED' if billable else 'NON_BILLABLE')
+        serializer.save(
+            user=self.request.user,
+            billing_status=billing_status,
+            created_by=self.request.user,
+            updated_by=self.request.user,
+        )
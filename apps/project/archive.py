@@ -0,0 +1,163 @@
+"""
+Archival of completed projects.
+
+A completed project that has been finished for longer than
+``ARCHIVE_COMPLETED_PROJECTS_AFTER_DAYS`` keeps no work in the hot tables:
+``archive_projects`` moves its team, tasks, task dependencies and time
+entries (soft-deleted rows included) into ``ArchivedProjectMember``,
+``ArchivedTask``, ``ArchivedTaskDependency`` and ``ArchivedTimeEntry``,
+and ``restore_projects`` moves them back. The archive tables have the
+columns of the hot ones, so each move is one set-based statement per table:
+
+    WITH moved AS (DELETE FROM hot WHERE ... RETURNING ...)
+    INSERT INTO archive (...) SELECT ... FROM moved
+
+Rows keep their ids, so restoring brings back exactly what was archived,
+and a batch of projects moves in a single transaction with a
+``lock_timeout``. Foreign keys are checked at commit, so the order of the
+moves within it does not matter to the database.
+
+What stays behind:
+
+* the project row, with ``archived_date`` set: invoice lines and the
+  project list still refer to it, and its pages render the archive tables
+  read-only (``selectors.project_detail``) and export them;
+* its rollup, frozen at archival: ``rebuild_project_rollups`` skips
+  archived projects, whose hot tables are empty.
+
+A project is only archived once nothing is left to invoice and no time was
+logged within the age window, so invoicing, the dashboard and timesheets
+never need the archive tables.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.core.lookups import lookups
+from .cache import invalidate_all_dashboards
+from .models import (
+    ArchivedProjectMember, ArchivedTask, ArchivedTaskDependency, ArchivedTimeEntry, Project, ProjectMember, Task,
+    TaskDependency, TimeEntry,
+)
+from .services import rebuild_project_rollups
+
+logger = logging.getLogger('apps.project.archive')
+
+# (hot model, archive model), in the order rows are moved either way: time
+# entries and dependencies are found through their tasks, so they move first
+ARCHIVED_MODELS = [
+    (TimeEntry, ArchivedTimeEntry),
+    (TaskDependency, ArchivedTaskDependency),
+    (Task, ArchivedTask),
+    (ProjectMember, ArchivedProjectMember),
+]
+
+
+def archivable_projects(days=None, today=None):
+    """
+    Active, completed, not yet archived projects that ended (or, without an
+    end date, were last updated) more than ``days`` ago, with no time logged
+    since then and no billable time left unbilled.
+    """
+    days = settings.ARCHIVE_COMPLETED_PROJECTS_AFTER_DAYS if days is None else days
+    cutoff = (today or timezone.localdate()) - timedelta(days=days)
+    entries = TimeEntry.objects.filter(task__project=OuterRef('pk'))
+    return (
+        Project.objects.filter(
+            status_id=lookups.pk('PROJECT_STATUS', 'COMPLETED'),
+            archived_date__isnull=True,
+        )
+        .alias(finished=Coalesce('end_date', TruncDate('updated_date')))
+        .filter(finished__lt=cutoff)
+        .exclude(Exists(entries.filter(date__gte=cutoff)))
+        .exclude(Exists(entries.filter(
+            billable=True, billing_status_id=lookups.pk('BILLING_STATUS', 'UNBILLED'),
+        )))
+    )
+
+
+def _project_rows(model):
+    """SQL condition selecting the rows of ``model`` belonging to the projects ``%s``."""
+    if model in (TimeEntry, ArchivedTimeEntry):
+        tasks = Task if model is TimeEntry else ArchivedTask
+        return f'task_id IN (SELECT id FROM {tasks._meta.db_table} WHERE project_id = ANY(%s))'
+    if model in (TaskDependency, ArchivedTaskDependency):
+        tasks = Task if model is TaskDependency else ArchivedTask
+        return f'successor_id IN (SELECT id FROM {tasks._meta.db_table} WHERE project_id = ANY(%s))'
+    return 'project_id = ANY(%s)'
+
+
+def _move(cursor, source, target, project_ids):
+    """Move the rows of ``project_ids`` from ``source`` to ``target``; returns the row count."""
+    quote = cursor.db.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in source._meta.concrete_fields)
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {quote(source._meta.db_table)} WHERE {_project_rows(source)} '
+        f'RETURNING {columns}) '
+        f'INSERT INTO {quote(target._meta.db_table)} ({columns}) SELECT {columns} FROM moved',
+        [project_ids],
+    )
+    return cursor.rowcount
+
+
+def _run(project_ids, archive, lock_timeout, using):
+    """Archive (or restore) ``project_ids`` in one transaction; returns the counts moved."""
+    now = timezone.now()
+    moves = ARCHIVED_MODELS if archive else [(target, source) for source, target in ARCHIVED_MODELS]
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [f'{lock_timeout}ms'])
+        # Locking the projects serializes concurrent archive and restore runs
+        project_ids = list(
+            Project.all_objects.using(using).select_for_update()
+            .filter(pk__in=project_ids, archived_date__isnull=archive)
+            .values_list('pk', flat=True)
+        )
+        report = {'projects': len(project_ids)}
+        if not project_ids:
+            return report
+        for source, target in moves:
+            report[(source if archive else target)._meta.model_name] = _move(cursor, source, target, project_ids)
+        Project.all_objects.using(using).filter(pk__in=project_ids).update(
+            archived_date=now if archive else None, updated_date=now,
+        )
+        if not archive:
+            rebuild_project_rollups(project_ids)
+        invalidate_all_dashboards()
+    record = {'action': 'archive' if archive else 'restore', **report}
+    logger.info(json.dumps(record), extra={'archive': record})
+    return report
+
+
+def _batches(project_ids, batch_size):
+    project_ids = list(project_ids)
+    for start in range(0, len(project_ids), batch_size):
+        yield project_ids[start:start + batch_size]
+
+
+def archive_projects(project_ids, batch_size=50, lock_timeout=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Move the team, tasks and time entries of ``project_ids`` to the archive
+    tables, ``batch_size`` projects per transaction. Projects already
+    archived are skipped. Returns the rows moved per model, and the number
+    of ``projects`` archived.
+    """
+    totals = {'projects': 0}
+    for batch in _batches(project_ids, batch_size):
+        for key, count in _run(batch, True, lock_timeout, using).items():
+            totals[key] = totals.get(key, 0) + count
+    return totals
+
+
+def restore_projects(project_ids, lock_timeout=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Move the archived rows of ``project_ids`` back into the hot tables and
+    rebuild their rollups, in one transaction. Returns the rows moved per
+    model, and the number of ``projects`` restored.
+    """
+    return _run(list(project_ids), False, lock_timeout, using)
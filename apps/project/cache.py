@@ -0,0 +1,108 @@
+"""
+Per-user dashboard cache with write-driven invalidation.
+
+Each user's dashboard summary is cached together with the versions of the
+data it was built from: a per-user version, bumped when that user's tasks
+or time entries change, and a global version, bumped when projects change
+or a bulk operation touches many users (see ``signals.py``). An entry whose
+versions are current and which is younger than ``DASHBOARD_CACHE_FRESH``
+seconds is served as is.
+
+Otherwise the entry is stale. The first request to notice takes a short
+rebuild lock and recomputes the summary; concurrent requests keep serving
+the stale copy for up to ``DASHBOARD_CACHE_STALE`` seconds instead of all
+hitting the database at once (stale-while-revalidate).
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import selectors
+
+GLOBAL_VERSION_KEY = 'project:dashboard:version'
+REBUILD_LOCK_TIMEOUT = 30
+
+
+def _entry_key(user_id):
+    return f'project:dashboard:{user_id}'
+
+
+def _version_key(user_id):
+    return f'project:dashboard:{user_id}:version'
+
+
+def _lock_key(user_id):
+    return f'project:dashboard:{user_id}:lock'
+
+
+def _is_fresh(entry, versions):
+    return entry['versions'] == versions and time.time() < entry['fresh_until']
+
+
+def _new_entry(data, versions):
+    return {
+        'data': data,
+        'versions': versions,
+        'fresh_until': time.time() + settings.DASHBOARD_CACHE_FRESH,
+    }
+
+
+def _entry_timeout():
+    return settings.DASHBOARD_CACHE_FRESH + settings.DASHBOARD_CACHE_STALE
+
+
+def get_dashboard(user):
+    """The dashboard summary of ``user``, from the cache where possible."""
+    entry_key, version_key = _entry_key(user.pk), _version_key(user.pk)
+    cached = cache.get_many([entry_key, version_key, GLOBAL_VERSION_KEY])
+    entry = cached.get(entry_key)
+    versions = (cached.get(version_key), cached.get(GLOBAL_VERSION_KEY))
+
+    if entry is not None:
+        if _is_fresh(entry, versions) or not cache.add(_lock_key(user.pk), 1, REBUILD_LOCK_TIMEOUT):
+            return entry['data']
+
+    try:
+        data = selectors.dashboard_summary(user)
+        cache.set(entry_key, _new_entry(data, versions), _entry_timeout())
+    finally:
+        if entry is not None:
+            cache.delete(_lock_key(user.pk))
+    return data
+
+
+async def aget_dashboard(user):
+    """Async ``get_dashboard``."""
+    entry_key, version_key = _entry_key(user.pk), _version_key(user.pk)
+    cached = await cache.aget_many([entry_key, version_key, GLOBAL_VERSION_KEY])
+    entry = cached.get(entry_key)
+    versions = (cached.get(version_key), cached.get(GLOBAL_VERSION_KEY))
+
+    if entry is not None:
+        if _is_fresh(entry, versions) or not await cache.aadd(_lock_key(user.pk), 1, REBUILD_LOCK_TIMEOUT):
+            return entry['data']
+
+    try:
+        data = await selectors.adashboard_summary(user)
+        await cache.aset(entry_key, _new_entry(data, versions), _entry_timeout())
+    finally:
+        if entry is not None:
+            await cache.adelete(_lock_key(user.pk))
+    return data
+
+
+def invalidate_dashboards(*user_ids):
+    """Mark the given users' dashboards stale once the transaction commits."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        transaction.on_commit(lambda: cache.set_many(
+            {_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None
+        ))
+
+
+def invalidate_all_dashboards():
+    """Mark every dashboard stale once the transaction commits."""
+    transaction.on_commit(lambda: cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None))
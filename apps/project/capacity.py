@@ -0,0 +1,188 @@
+"""
+Resource capacity and utilization.
+
+Every user can work ``weekly_capacity_hours`` a week. ``utilization()``
+lays the load of a list of users over a range of ISO weeks (Monday to
+Sunday) out as dense user × week matrices, from two aggregate queries:
+
+* ``logged``: the hours of their time entries, grouped by user and week;
+* ``planned``: the remaining estimate (estimated less actual hours) of the
+  open tasks assigned to them, grouped by user and by the weeks the tasks
+  are planned in: from their early start to their early finish or due
+  date, whichever comes first (see ``scheduling``). Remaining work cannot
+  be done in the past, so it starts in the current week at the earliest,
+  and each group is spread evenly over its weeks.
+
+A week's ``load`` is the sum of both, so past weeks show the time logged
+and the weeks ahead the forecast. ``utilization`` is the load as a
+percentage of capacity (None for users without capacity), ``over`` the
+hours beyond capacity and ``heat`` the level of the heatmap cell.
+
+Rows follow the order of the users and columns the weeks; the matrices
+are lists of float rows, and everything past the two queries is
+arithmetic over them, so the cost grows with users × weeks rather than
+with the number of time entries or tasks (500 users over 52 weeks take a
+few milliseconds).
+"""
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast, Least, TruncWeek
+from django.utils import timezone
+
+from apps.core.lookups import lookups
+from .constants import OPEN_TASK_STATUSES
+
+WEEK = timedelta(days=7)
+# Utilization percentages separating the heatmap levels: a week with any
+# load is level 1 up to the first threshold, and so on; level 0 is idle
+HEAT_LEVELS = (50, 80, 100, 120)
+
+
+def week_start(day):
+    """The Monday of the ISO week of ``day``."""
+    return day - timedelta(days=day.weekday())
+
+
+def _logged(user_ids, first, end, using):
+    from .models import TimeEntry
+    return (
+        TimeEntry.objects.using(using)
+        .filter(user_id__in=user_ids, date__gte=first, date__lt=end)
+        .annotate(week=TruncWeek('date'))
+        .values('user_id', 'week')
+        .annotate(hours=Cast(Sum('hours'), FloatField()))
+        .values_list('user_id', 'week', 'hours')
+        .order_by()
+    )
+
+
+def _planned(user_ids, using):
+    from .models import Task
+    return (
+        Task.objects.using(using)
+        .filter(
+            assigned_to_id__in=user_ids,
+            status_id__in=lookups.pks('TASK_STATUS', OPEN_TASK_STATUSES),
+            estimated_hours__gt=F('actual_hours'),
+        )
+        # LEAST skips NULLs on PostgreSQL: the earlier of the two dates
+        .annotate(start=TruncWeek('early_start'), finish=TruncWeek(Least('early_finish', 'due_date')))
+        .values('assigned_to_id', 'start', 'finish')
+        .annotate(remaining=Cast(Sum(F('estimated_hours') - F('actual_hours')), FloatField()))
+        .values_list('assigned_to_id', 'start', 'finish', 'remaining')
+        .order_by()
+    )
+
+
+def utilization(users, start, weeks, today=None, using=DEFAULT_DB_ALIAS):
+    """
+    The utilization of ``users`` over ``weeks`` weeks from the week of
+    ``start``, as of ``today`` (default: the current date). Returns a dict
+    with:
+
+    * ``users`` and ``weeks`` (their Mondays), and ``current``, the index
+      of the current week (None outside the range);
+    * ``capacity``, per user;
+    * the ``logged``, ``planned``, ``load``, ``utilization``, ``over`` and
+      ``heat`` matrices;
+    * ``totals``: ``capacity``, ``load``, ``utilization`` and ``over`` of
+      the whole list per week;
+    * the forecast per user: ``backlog``, the remaining hours of their
+      open tasks (also those planned after the range), ``backlog_weeks``
+      at full capacity, and ``overbooked``, the weeks from the current one
+      on in which their load exceeds their capacity.
+    """
+    users = list(users)
+    first = week_start(start)
+    this_week = week_start(today or timezone.localdate())
+    week_list = [first + WEEK * column for column in range(weeks)]
+    current = (this_week - first).days // 7
+    current = current if 0 <= current < weeks else None
+    rows = {user.pk: row for row, user in enumerate(users)}
+    user_ids = list(rows)
+
+    capacity = [float(user.weekly_capacity_hours) for user in users]
+    logged = [[0.0] * weeks for _ in users]
+    planned = [[0.0] * weeks for _ in users]
+    backlog = [0.0] * len(users)
+
+    for user_id, week, hours in _logged(user_ids, first, first + WEEK * weeks, using):
+        logged[rows[user_id]][(week - first).days // 7] += hours
+
+    for user_id, start_week, finish_week, remaining in _planned(user_ids, using):
+        row = rows[user_id]
+        backlog[row] += remaining
+        start_week = max(start_week or this_week, this_week)
+        finish_week = max(finish_week or start_week, start_week)
+        share = remaining / ((finish_week - start_week).days // 7 + 1)
+        cells = planned[row]
+        for column in range(max((start_week - first).days // 7, 0), min((finish_week - first).days // 7 + 1, weeks)):
+            cells[column] += share
+
+    load = [[done + todo for done, todo in zip(done_row, todo_row)] for done_row, todo_row in zip(logged, planned)]
+    over = [[max(hours - available, 0.0) for hours in row] for row, available in zip(load, capacity)]
+    percent = [
+        [100 * hours / available for hours in row] if available else [None] * weeks
+        for row, available in zip(load, capacity)
+    ]
+    top = len(HEAT_LEVELS) + 1
+    heat = [
+        [
+            0 if not hours else top if value is None else bisect_right(HEAT_LEVELS, value) + 1
+            for hours, value in zip(load_row, percent_row)
+        ]
+        for load_row, percent_row in zip(load, percent)
+    ]
+
+    total_capacity = sum(capacity)
+    total_load = [sum(column) for column in zip(*load)] if users else [0.0] * weeks
+    ahead = slice(max((this_week - first).days // 7, 0), weeks)
+    return {
+        'users': users,
+        'weeks': week_list,
+        'current': current,
+        'capacity': capacity,
+        'logged': logged,
+        'planned': planned,
+        'load': load,
+        'utilization': percent,
+        'over': over,
+        'heat': heat,
+        'totals': {
+            'capacity': total_capacity,
+            'load': total_load,
+            'utilization': [100 * hours / total_capacity if total_capacity else None for hours in total_load],
+            'over': [sum(column) for column in zip(*over)] if users else [0.0] * weeks,
+        },
+        'backlog': backlog,
+        'backlog_weeks': [
+            hours / available if available else None
+            for hours, available in zip(backlog, capacity)
+        ],
+        'overbooked': [sum(1 for hours in row[ahead] if hours) for row in over],
+    }
+
+
+def heatmap(report):
+    """
+    The rows of a ``utilization()`` report for display: per user, the user,
+    capacity, forecast and ``cells`` of (week, load, utilization, over, heat).
+    """
+    weeks = report['weeks']
+    return [
+        {
+            'user': user,
+            'capacity': available,
+            'backlog': backlog,
+            'backlog_weeks': backlog_weeks,
+            'overbooked': overbooked,
+            'cells': list(zip(weeks, load, percent, over, heat)),
+        }
+        for user, available, backlog, backlog_weeks, overbooked, load, percent, over, heat in zip(
+            report['users'], report['capacity'], report['backlog'], report['backlog_weeks'],
+            report['overbooked'], report['load'], report['utilization'], report['over'], report['heat'],
+        )
+    ]
@@ -1 +1,6 @@
-# Define your app constants here
+# Define your app constants here
+
+# Lookup value codes grouped by meaning, resolved to primary keys through
+# apps.core.lookups so view filters do not need to join the lookup tables.
+OPEN_PROJECT_STATUSES = ('DRAFT', 'ACTIVE', 'ON_HOLD')
+OPEN_TASK_STATUSES = ('TODO', 'IN_PROGRESS', 'REVIEW')
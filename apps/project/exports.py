@@ -0,0 +1,227 @@
+"""
+Streaming CSV and XLSX exports of projects, tasks and time entries.
+
+Rows are read with ``values_list().iterator()``, which uses a server-side
+cursor on PostgreSQL, and encoded one at a time, so memory use does not
+depend on the size of the export. XLSX files are written with the standard
+library as a zip stream of a single worksheet with inline strings.
+"""
+import csv
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from apps.core.lookups import lookups
+from .billing import with_billing_amounts
+from .models import ArchivedProjectMember
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _lookup_code(pk):
+    value = lookups.by_pk(pk)
+    return value.code if value else ''
+
+
+# (header, values_list path, optional converter)
+PROJECT_COLUMNS = [
+    ('Code', 'code', None),
+    ('Name', 'name', None),
+    ('Client', 'client__code', None),
+    ('Status', 'status_id', _lookup_code),
+    ('Priority', 'priority_id', _lookup_code),
+    ('Manager', 'manager__username', None),
+    ('Start Date', 'start_date', None),
+    ('End Date', 'end_date', None),
+    ('Budget', 'budget_amount', None),
+    ('Hours', 'rollup__hours', None),
+    ('Billable Amount', 'rollup__billable_amount', None),
+]
+
+TASK_COLUMNS = [
+    ('Project', 'project__code', None),
+    ('Title', 'title', None),
+    ('Status', 'status_id', _lookup_code),
+    ('Priority', 'priority_id', _lookup_code),
+    ('Assigned To', 'assigned_to__username', None),
+    ('Due Date', 'due_date', None),
+    ('Estimated Hours', 'estimated_hours', None),
+    ('Actual Hours', 'actual_hours', None),
+    ('Billable', 'billable', None),
+]
+
+TIME_ENTRY_COLUMNS = [
+    ('Date', 'date', None),
+    ('User', 'user__username', None),
+    ('Client', 'task__project__client__code', None),
+    ('Project', 'task__project__code', None),
+    ('Task', 'task__title', None),
+    ('Description', 'description', None),
+    ('Hours', 'hours', None),
+    ('Billable', 'billable', None),
+    ('Billing Status', 'billing_status_id', _lookup_code),
+    ('Rate', 'effective_rate', None),
+    ('Amount', 'billing_amount', None),
+]
+
+
+def export_rows(queryset, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the header and then one tuple per row of ``queryset``."""
+    yield tuple(header for header, _, _ in columns)
+    converters = [convert for _, _, convert in columns]
+    rows = queryset.values_list(*[path for _, path, _ in columns]).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield tuple(
+            convert(value) if convert else value
+            for convert, value in zip(converters, row)
+        )
+
+
+def project_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    return export_rows(queryset.order_by('code', 'pk'), PROJECT_COLUMNS, chunk_size)
+
+
+def task_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    return export_rows(queryset.order_by('project__code', 'due_date', 'pk'), TASK_COLUMNS, chunk_size)
+
+
+def time_entry_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    queryset = with_billing_amounts(queryset).order_by('date', 'pk')
+    return export_rows(queryset, TIME_ENTRY_COLUMNS, chunk_size)
+
+
+def archived_time_entry_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """``time_entry_rows`` of an ArchivedTimeEntry queryset."""
+    queryset = with_billing_amounts(queryset, ArchivedProjectMember).order_by('date', 'pk')
+    return export_rows(queryset, TIME_ENTRY_COLUMNS, chunk_size)
+
+
+def stream(rows, export_format):
+    """Encode rows as chunks of bytes in ``export_format`` (``csv`` or ``xlsx``)."""
+    if export_format == 'xlsx':
+        return stream_xlsx(rows)
+    return stream_csv(rows)
+
+
+class _Echo:
+    """File-like object that returns what is written instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable file that hands written bytes to a generator."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '<Relationship Id="rId2" Target="styles.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+        '</Relationships>'
+    ),
+    # Style 1 formats date cells as dates (built-in number format 14)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font/></fonts>'
+        '<fills count="1"><fill/></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+        '<cellXfs count="2"><xf/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+_EXCEL_EPOCH = date(1899, 12, 30)
+# Control characters other than tab, newline and carriage return are not valid XML
+_INVALID_XML = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+    text = escape(str(value).translate(_INVALID_XML))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(rows):
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            for row in rows:
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode('utf-8'))
+                data = buffer.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
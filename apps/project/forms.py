@@ -1,8 +1,12 @@
+import uuid
+from datetime import timedelta
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Field, Submit, HTML
 from . import models
+from .constants import OPEN_TASK_STATUSES
+from apps.core.lookups import lookups
 from django.contrib.auth import get_user_model
 
 class ClientForm(forms.ModelForm):
@@ -107,7 +111,7 @@ class TaskForm(forms.ModelForm):
         fields = [
             'project', 'parent_task', 'title', 'description',
             'status', 'priority', 'assigned_to', 'due_date',
-            'estimated_hours', 'billable', 'billing_rate', 'notes'
+            'estimated_hours', 'duration_days', 'billable', 'billing_rate', 'notes'
         ]
         widgets = {
             'due_date': forms.DateInput(attrs={'type': 'date'}),
@@ -136,9 +140,10 @@ class TaskForm(forms.ModelForm):
                 Column('due_date', css_class='col-md-3'),
             ),
             Row(
-                Column('estimated_hours', css_class='col-md-4'),
-                Column('billable', css_class='col-md-4'),
-                Column('billing_rate', css_class='col-md-4'),
+                Column('estimated_hours', css_class='col-md-3'),
+                Column('duration_days', css_class='col-md-3'),
+                Column('billable', css_class='col-md-3'),
+                Column('billing_rate', css_class='col-md-3'),
             ),
             'description',
             'notes',
@@ -169,8 +174,7 @@ class TimeEntryForm(forms.ModelForm):
             # Only show tasks assigned to the user
             self.fields['task'].queryset = models.Task.objects.filter(
                 assigned_to=user,
-                status__category__code='TASK_STATUS',
-                status__code__in=['TODO', 'IN_PROGRESS', 'REVIEW']
+                status_id__in=lookups.pks('TASK_STATUS', OPEN_TASK_STATUSES)
             )
         
         self.helper.layout = Layout(
@@ -195,3 +199,91 @@ class TimeEntryForm(forms.ModelForm):
         if hours > 24:
             raise forms.ValidationError(_('Hours cannot exceed 24'))
         return hours
+
+class TimesheetRowForm(forms.Form):
+    """One task row of the weekly timesheet grid with an hours cell per day."""
+    DAYS = 7
+
+    task = forms.TypedChoiceField(
+        coerce=uuid.UUID,
+        label=_('Task'),
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    description = forms.CharField(
+        label=_('Description'),
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm'})
+    )
+    billable = forms.BooleanField(
+        label=_('Billable'),
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def __init__(self, *args, task_choices=(), week_start=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.week_start = week_start
+        self.fields['task'].choices = [('', '---------')] + list(task_choices)
+        for day in range(self.DAYS):
+            self.fields[f'day_{day}'] = forms.DecimalField(
+                required=False,
+                min_value=0,
+                max_value=24,
+                decimal_places=2,
+                widget=forms.NumberInput(attrs={'step': '0.25', 'class': 'form-control form-control-sm'}),
+            )
+
+    def has_changed(self):
+        # Unticking billable on an otherwise blank row does not make it an entry
+        return any(name != 'billable' for name in self.changed_data)
+
+    @property
+    def day_fields(self):
+        return [self[f'day_{day}'] for day in range(self.DAYS)]
+
+    def entries(self):
+        """Time entries described by this row, one per day with hours."""
+        if not self.has_changed() or not self.cleaned_data.get('task'):
+            return []
+        entries = []
+        for day in range(self.DAYS):
+            hours = self.cleaned_data.get(f'day_{day}')
+            if hours:
+                entries.append({
+                    'task_id': self.cleaned_data['task'],
+                    'date': self.week_start + timedelta(days=day),
+                    'hours': hours,
+                    'description': self.cleaned_data['description'],
+                    'billable': self.cleaned_data['billable'],
+                })
+        return entries
+
+
+class BaseTimesheetFormSet(forms.BaseFormSet):
+    def __init__(self, *args, task_choices=(), week_start=None, **kwargs):
+        self.task_choices = list(task_choices)
+        self.week_start = week_start
+        super().__init__(*args, **kwargs)
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        kwargs['task_choices'] = self.task_choices
+        kwargs['week_start'] = self.week_start
+        return kwargs
+
+    @property
+    def days(self):
+        return [self.week_start + timedelta(days=day) for day in range(TimesheetRowForm.DAYS)]
+
+    def entries(self):
+        """All entries of the grid with the index of the row they came from."""
+        return [
+            (index, entry)
+            for index, form in enumerate(self.forms)
+            for entry in form.entries()
+        ]
+
+
+TimesheetFormSet = forms.formset_factory(
+    TimesheetRowForm, formset=BaseTimesheetFormSet, extra=5, max_num=50
+)
@@ -0,0 +1,52 @@
+"""
+Move completed projects out of the hot tables; see ``apps.project.archive``.
+
+Projects finished longer ago than ``ARCHIVE_COMPLETED_PROJECTS_AFTER_DAYS``
+(or ``--days``) are archived, a batch at a time. Schedule it like
+purge_deleted, e.g. weekly from cron:
+
+    0 3 * * 0 manage.py archive_projects
+
+``restore_project`` brings a project back.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.project import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves the team, tasks and time entries of completed projects past the archival age '
+        'into the archive tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='*', help='Only these project codes, if they are archivable')
+        parser.add_argument('--days', type=int, help='Archive projects finished more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=50, help='Projects moved per transaction')
+        parser.add_argument('--lock-timeout', type=int, default=5000, help='Milliseconds to wait for row locks')
+        parser.add_argument('--dry-run', action='store_true', help='List the projects that would be archived')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days cannot be negative')
+        projects = archive.archivable_projects(days=options['days']).order_by('code')
+        if options['projects']:
+            projects = projects.filter(code__in=options['projects'])
+        projects = list(projects.values_list('pk', 'code'))
+
+        if options['dry_run']:
+            for _, code in projects:
+                self.stdout.write(code)
+            self.stdout.write(self.style.SUCCESS(f'Would archive {len(projects)} project(s)'))
+            return
+
+        moved = archive.archive_projects(
+            [pk for pk, _ in projects], batch_size=options['batch_size'], lock_timeout=options['lock_timeout'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved['projects']} project(s): members {moved.get('projectmember', 0)}, "
+            f"tasks {moved.get('task', 0)}, time entries {moved.get('timeentry', 0)}"
+        ))
@@ -0,0 +1,125 @@
+import asyncio
+import importlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from apps.project.models import Project
+
+
+def _summary(latencies, elapsed):
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the dashboard and project detail pages served through the WSGI handler '
+        'with sync views against the ASGI handler with their async variants'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='User to request the pages as')
+        parser.add_argument('--project', help='Project code for the detail page (default: most recent active)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and handler')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once')
+        parser.add_argument('--cold', action='store_true', help='Rebuild the dashboard cache on every request')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown user {options['username']}")
+        projects = Project.objects.filter(is_active=True)
+        if options['project']:
+            projects = projects.filter(code=options['project'])
+        project = projects.order_by('-created_date').first()
+        if project is None:
+            raise CommandError('No matching active project')
+
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'DEBUG': False}
+        if options['cold']:
+            overrides['DASHBOARD_CACHE_FRESH'] = 0
+        with override_settings(**overrides):
+            for name, path in (
+                ('dashboard', reverse('project:dashboard')),
+                ('project_detail', reverse('project:project_detail', args=[project.pk])),
+            ):
+                with self._views(async_views=False):
+                    wsgi = self._run_wsgi(user, path, options['requests'], options['concurrency'])
+                with self._views(async_views=True):
+                    asgi = asyncio.run(self._run_asgi(user, path, options['requests'], options['concurrency']))
+                for handler, result in (('wsgi', wsgi), ('asgi', asgi)):
+                    self.stdout.write(
+                        f"{name:<16} {handler}  p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                        f"{result['requests_per_second']:>8} req/s"
+                    )
+
+    @contextmanager
+    def _views(self, async_views):
+        """Re-import the URLconf so it routes to the sync or async views."""
+        def reload_urls():
+            clear_url_caches()
+            importlib.reload(importlib.import_module('apps.project.urls'))
+            importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+
+        try:
+            with override_settings(ASYNC_VIEWS=async_views):
+                reload_urls()
+                yield
+        finally:
+            reload_urls()
+
+    def _run_wsgi(self, user, path, count, concurrency):
+        def worker(requests):
+            client = Client()
+            client.force_login(user)
+            latencies = []
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.get(path)
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise CommandError(f'{path} returned {response.status_code}')
+            finally:
+                connection.close()
+            return latencies
+
+        shares = [count // concurrency + (1 if i < count % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = [value for result in pool.map(worker, shares) for value in result]
+        return _summary(latencies, time.perf_counter() - start)
+
+    async def _run_asgi(self, user, path, count, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}')
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(count)))
+        return _summary(latencies, time.perf_counter() - start)
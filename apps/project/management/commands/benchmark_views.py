@@ -0,0 +1,245 @@
+"""
+Benchmark the application's pages route by route.
+
+Every route is requested through the test client, so the full middleware,
+view and template stack runs against whatever data is in the database
+(see ``seed_benchmark_data``). For each route the command reports latency
+percentiles, the number of SQL queries and the memory allocated while the
+request was handled, and can save the results as JSON.
+
+Given a ``--baseline`` (a JSON file saved by an earlier run) it flags
+routes that got slower or allocate more by more than ``--threshold``, and
+any route that runs more queries than before. Writes made by the
+benchmark (time entry creation) are rolled back at the end.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.lookups import lookups
+from apps.core.middleware import QueryRecorder
+from apps.project.models import Project, Task, TimeEntry
+
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def _percentiles(values):
+    cuts = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+    return {
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+    }
+
+
+def compare(results, baseline, threshold=0.2, min_delta_ms=2.0):
+    """
+    Regressions of ``results`` against ``baseline`` (both as saved by this
+    command): a list of ``(route, metric, baseline value, current value)``.
+
+    Latency and allocations regress when they grow by more than
+    ``threshold`` (a fraction) and, for latency, by at least
+    ``min_delta_ms``; query counts regress on any increase.
+    """
+    regressions = []
+    for name, current in results['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if before is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if (current[metric] > before[metric] * (1 + threshold)
+                    and current[metric] - before[metric] >= min_delta_ms):
+                regressions.append((name, metric, before[metric], current[metric]))
+        if current['queries'] > before['queries']:
+            regressions.append((name, 'queries', before['queries'], current['queries']))
+        if current['alloc_kib'] > before['alloc_kib'] * (1 + threshold):
+            regressions.append((name, 'alloc_kib', before['alloc_kib'], current['alloc_kib']))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests the dashboard, lists, detail pages, time entry creation and admin changelists and '
+        'reports latency percentiles, query counts and allocations per route'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to request the pages as (default: the first superuser)')
+        parser.add_argument('--requests', type=int, default=30, help='Measured requests per route')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per route before measuring')
+        parser.add_argument('--alloc-requests', type=int, default=3, help='Requests per route traced for allocations')
+        parser.add_argument('--route', action='append', default=[], help='Only this route (repeatable)')
+        parser.add_argument('--output', help='Save the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare against the results saved in this file')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative growth before a regression (default: 0.2)')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Smallest latency increase that counts as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a regression is found')
+        parser.add_argument('--cold', action='store_true', help='Rebuild the dashboard cache on every request')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {error}")
+
+        user = self.get_user(options['username'])
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'DEBUG': False, 'SQL_QUERY_BUDGET_MODE': 'off'}
+        if options['cold']:
+            overrides['DASHBOARD_CACHE_FRESH'] = 0
+
+        results = {
+            'created': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {
+                'projects': Project.objects.count(),
+                'tasks': Task.objects.count(),
+                'time_entries': TimeEntry.objects.count(),
+            },
+            'requests': options['requests'],
+            'routes': {},
+        }
+        with override_settings(**overrides), transaction.atomic():
+            client = Client()
+            client.force_login(user)
+            routes = self.get_routes(user)
+            unknown = set(options['route']) - {name for name, *_ in routes}
+            if unknown:
+                raise CommandError(f'Unknown routes: {", ".join(sorted(unknown))}')
+            for name, method, path, data in routes:
+                if options['route'] and name not in options['route']:
+                    continue
+                result = self.measure(client, method, path, data, options)
+                results['routes'][name] = result
+                self.stdout.write(
+                    f"{name:<28} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                    f"p99 {result['p99_ms']:>8} ms  {result['queries']:>3} queries  {result['alloc_kib']:>9} KiB"
+                )
+            transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}"))
+        if baseline is not None:
+            self.report(compare(results, baseline, options['threshold'], options['min_delta_ms']), options)
+
+    def get_user(self, username):
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError(f'Unknown user {username}' if username else 'No superuser to request the pages as')
+        return user
+
+    def get_routes(self, user):
+        """``(name, method, path, data)`` of every benchmarked request."""
+        # The busiest active project, its client and its busiest task
+        project = (
+            Project.objects.filter(is_active=True, rollup__isnull=False)
+            .select_related('client').order_by('-rollup__hours', 'pk').first()
+        )
+        if project is None:
+            raise CommandError('No active projects; load data with seed_benchmark_data first')
+        task = Task.objects.filter(project=project, is_active=True).order_by('-actual_hours', 'pk').first()
+        if task is None:
+            raise CommandError(f'Project {project.code} has no tasks')
+        word = project.name.split()[0]
+        entry = {
+            'task': task.pk,
+            'date': timezone.localdate().isoformat(),
+            'hours': '1.50',
+            'description': 'Benchmark entry',
+            'billable': 'on',
+            'billing_status': lookups.pk('BILLING_STATUS', 'UNBILLED'),
+        }
+        return [
+            ('home', 'get', reverse('core:home'), None),
+            ('dashboard', 'get', reverse('project:dashboard'), None),
+            ('search', 'get', f"{reverse('project:search')}?q={word}", None),
+            ('client_list', 'get', reverse('project:client_list'), None),
+            ('client_detail', 'get', reverse('project:client_detail', args=[project.client_id]), None),
+            ('project_list', 'get', reverse('project:project_list'), None),
+            ('project_list_search', 'get', f"{reverse('project:project_list')}?search={word}&status=ACTIVE", None),
+            ('project_list_client', 'get', f"{reverse('project:project_list')}?client={project.client_id}", None),
+            ('project_detail', 'get', reverse('project:project_detail', args=[project.pk]), None),
+            ('task_list', 'get', reverse('project:task_list'), None),
+            ('task_list_filtered', 'get', f"{reverse('project:task_list')}?status=IN_PROGRESS&project={project.pk}", None),
+            ('task_list_mine', 'get', f"{reverse('project:task_list')}?assigned=me", None),
+            ('task_detail', 'get', reverse('project:task_detail', args=[task.pk]), None),
+            ('timesheet', 'get', reverse('project:timesheet'), None),
+            ('utilization', 'get', reverse('project:utilization'), None),
+            ('timeentry_form', 'get', reverse('project:timeentry_create'), None),
+            ('timeentry_create', 'post', reverse('project:task_timeentry_create', kwargs={'task_id': task.pk}), entry),
+            ('api_projects', 'get', reverse('project:api:project-list'), None),
+            ('api_time_entries', 'get', f"{reverse('project:api:timeentry-list')}?project={project.pk}", None),
+            ('admin_projects', 'get', reverse('admin:project_project_changelist'), None),
+            ('admin_tasks', 'get', reverse('admin:project_task_changelist'), None),
+            ('admin_time_entries', 'get', reverse('admin:project_timeentry_changelist'), None),
+            ('admin_users', 'get', reverse('admin:core_customuser_changelist'), None),
+        ]
+
+    def measure(self, client, method, path, data, options):
+        def request():
+            response = getattr(client, method)(path, data)
+            if response.status_code >= 400 or (method == 'post' and response.status_code != 302):
+                raise CommandError(f'{method.upper()} {path} returned {response.status_code}')
+            return response
+
+        for _ in range(options['warmup']):
+            request()
+
+        latencies, query_counts, sql_times = [], [], []
+        for _ in range(options['requests']):
+            recorder = QueryRecorder()
+            with recorder.hooks():
+                start = time.perf_counter()
+                request()
+                latencies.append(time.perf_counter() - start)
+            query_counts.append(recorder.count)
+            sql_times.append(recorder.duration)
+
+        # Tracing slows every allocation down, so it gets requests of its own
+        allocations = []
+        tracemalloc.start()
+        try:
+            for _ in range(max(options['alloc_requests'], 1)):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                request()
+                allocations.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'method': method.upper(),
+            'path': path,
+            **_percentiles(latencies),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+            'queries': max(query_counts),
+            'sql_p50_ms': round(statistics.median(sql_times) * 1000, 2),
+            'alloc_kib': round(statistics.median(allocations) / 1024, 1),
+        }
+
+    def report(self, regressions, options):
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+            return
+        for name, metric, before, after in regressions:
+            self.stdout.write(self.style.ERROR(f'REGRESSION {name} {metric}: {before} -> {after}'))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
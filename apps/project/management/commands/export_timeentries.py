@@ -0,0 +1,64 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.project import exports
+from apps.project.models import ArchivedTimeEntry, Project, TimeEntry
+from apps.project.selectors import filter_time_entries
+
+
+class Command(BaseCommand):
+    help = 'Streams time entries with their effective rates and amounts to a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', default='-', help='File to write (default: stdout)')
+        parser.add_argument('--date-from', help='First date to include, YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Last date to include, YYYY-MM-DD')
+        parser.add_argument('--user', help='Only entries of this username')
+        parser.add_argument('--project', help='Only entries of this project code')
+        parser.add_argument('--billing-status', help='Only entries with this billing status code')
+        parser.add_argument('--billable', choices=['yes', 'no'])
+        parser.add_argument('--include-inactive', action='store_true', help='Include soft-deleted entries')
+        parser.add_argument('--archived', action='store_true', help='Export the entries of archived projects instead')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'billing_status': options['billing_status'],
+        }
+        if options['billable']:
+            params['billable'] = '1' if options['billable'] == 'yes' else '0'
+        if options['include_inactive']:
+            params['is_active'] = 'all'
+        try:
+            if options['user']:
+                params['user'] = get_user_model().objects.get(username=options['user']).pk
+            if options['project']:
+                params['project'] = Project.objects.get(code=options['project']).pk
+            model = ArchivedTimeEntry if options['archived'] else TimeEntry
+            queryset = filter_time_entries(model.all_objects.all(), params)
+        except (get_user_model().DoesNotExist, Project.DoesNotExist) as error:
+            raise CommandError(str(error))
+        except ValidationError as error:
+            raise CommandError('; '.join(error.messages))
+        if options['archived']:
+            rows = exports.archived_time_entry_rows(queryset, chunk_size=options['chunk_size'])
+        else:
+            rows = exports.time_entry_rows(queryset, chunk_size=options['chunk_size'])
+
+        if options['output'] == '-':
+            self._write(sys.stdout.buffer, rows, options['format'])
+        else:
+            with open(options['output'], 'wb') as output:
+                self._write(output, rows, options['format'])
+            self.stderr.write(self.style.SUCCESS(f"Exported time entries to {options['output']}"))
+
+    def _write(self, output, rows, export_format):
+        for chunk in exports.stream(rows, export_format):
+            output.write(chunk)
+        output.flush()
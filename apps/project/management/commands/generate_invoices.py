@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.project.models import Client
+from apps.project.services import generate_invoices, preview_invoices
+
+
+class Command(BaseCommand):
+    help = 'Creates one invoice per client for unbilled billable time and marks the entries billed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', type=date.fromisoformat, help='Invoice time up to this date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--issue-date', type=date.fromisoformat, help='Issue date of the invoices (default: today)')
+        parser.add_argument('--client', action='append', default=[], help='Only this client code (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Time entries fetched and updated per chunk')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be invoiced without writing anything')
+
+    def handle(self, *args, **options):
+        period_end = options['through'] or timezone.localdate()
+        clients = None
+        if options['client']:
+            codes = set(options['client'])
+            clients = list(Client.objects.filter(code__in=codes))
+            missing = codes - {client.code for client in clients}
+            if missing:
+                raise CommandError(f'Unknown client codes: {", ".join(sorted(missing))}')
+
+        if options['dry_run']:
+            for row in preview_invoices(period_end, clients):
+                self.stdout.write(
+                    f"{row['task__project__client__code']}: {row['entries']} entries, "
+                    f"{row['hours']}h, {row['amount']}"
+                )
+            return
+
+        try:
+            invoices = generate_invoices(
+                period_end,
+                clients,
+                issue_date=options['issue_date'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValidationError as error:
+            raise CommandError('; '.join(error.messages))
+        for invoice in invoices:
+            self.stdout.write(f'{invoice.number} {invoice.client.code}: {invoice.hours}h, {invoice.total_amount}')
+        self.stdout.write(self.style.SUCCESS(f'Created {len(invoices)} invoice(s) through {period_end}'))
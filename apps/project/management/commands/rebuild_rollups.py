@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.project.models import Project
+from apps.project.services import rebuild_project_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes project rollups (hours, amounts and task counts) from time entries and tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='*', help='Project codes to rebuild (default: all projects)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Projects aggregated per batch')
+
+    def handle(self, *args, **options):
+        project_ids = None
+        if options['projects']:
+            codes = options['projects']
+            project_ids = list(Project.objects.filter(code__in=codes).values_list('pk', flat=True))
+            if len(project_ids) != len(set(codes)):
+                found = set(Project.objects.filter(code__in=codes).values_list('code', flat=True))
+                raise CommandError(f'Unknown project codes: {", ".join(sorted(set(codes) - found))}')
+
+        written = rebuild_project_rollups(project_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} project rollup(s)'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.project.models import Task
+from apps.project.services import recalculate_task_hours
+
+
+class Command(BaseCommand):
+    help = 'Resets Task.actual_hours to the sum of active time entry hours where it has drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', action='append', default=[], help='Only tasks of this project code (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks checked per batch')
+
+    def handle(self, *args, **options):
+        task_ids = None
+        if options['project']:
+            task_ids = Task.objects.filter(project__code__in=options['project']).values('pk')
+
+        corrected = recalculate_task_hours(task_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Corrected actual hours on {corrected} task(s)'))
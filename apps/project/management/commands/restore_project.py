@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.project import archive
+from apps.project.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Moves the team, tasks and time entries of archived projects back into the hot tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='+', help='Codes of the archived projects to restore')
+        parser.add_argument('--lock-timeout', type=int, default=5000, help='Milliseconds to wait for row locks')
+
+    def handle(self, *args, **options):
+        codes = set(options['projects'])
+        projects = dict(Project.all_objects.filter(code__in=codes).values_list('code', 'archived_date'))
+        if codes - set(projects):
+            raise CommandError(f'Unknown project codes: {", ".join(sorted(codes - set(projects)))}')
+        live = sorted(code for code, archived_date in projects.items() if archived_date is None)
+        if live:
+            raise CommandError(f'Not archived: {", ".join(live)}')
+
+        moved = archive.restore_projects(
+            Project.all_objects.filter(code__in=codes).values_list('pk', flat=True),
+            lock_timeout=options['lock_timeout'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {moved['projects']} project(s): members {moved.get('projectmember', 0)}, "
+            f"tasks {moved.get('task', 0)}, time entries {moved.get('timeentry', 0)}"
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.project.models import Project
+from apps.project.scheduling import reschedule
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the critical path schedule (early and late dates, slack) of every task of projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='*', help='Project codes to schedule (default: all active projects)')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.filter(archived_date__isnull=True)
+        if options['projects']:
+            codes = options['projects']
+            projects = projects.filter(code__in=codes)
+            found = set(projects.values_list('code', flat=True))
+            if len(found) != len(set(codes)):
+                raise CommandError(f'Unknown project codes: {", ".join(sorted(set(codes) - found))}')
+
+        project_ids = list(projects.values_list('pk', flat=True))
+        written = sum(reschedule(project_id, tasks=None) for project_id in project_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rescheduled {written} task(s) in {len(project_ids)} project(s)'
+        ))
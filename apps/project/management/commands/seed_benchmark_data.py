@@ -0,0 +1,430 @@
+"""
+Generate a large, realistic and reproducible dataset for load tests and
+benchmarks.
+
+Every random choice comes from one ``random.Random(seed)``, including the
+primary keys, so the same ``--seed``, sizes and ``--end-date`` always
+produce the same rows. Codes and usernames carry the seed (``S1-P00042``,
+``s1-user0007``), so datasets of different seeds can live side by side.
+
+Rows are written with PostgreSQL ``COPY ... FROM STDIN`` in batches, which
+loads ten million time entries in minutes; ``--no-copy`` (and any other
+database) falls back to ``bulk_create``. Signals do not run for either, so
+task hours and project rollups are recomputed once at the end.
+"""
+import io
+import json
+import random
+import time
+import uuid
+from bisect import bisect
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.lookups import lookups
+from apps.project import cache, partitions
+from apps.project.models import Client, Project, ProjectMember, Task, TimeEntry
+from apps.project.services import rebuild_project_rollups, recalculate_task_hours
+
+# Lookup codes of 0002_add_initial_lookup_data with their relative weights
+INDUSTRIES = {'TECH': 30, 'FIN': 15, 'HEALTH': 12, 'RETAIL': 10, 'MFG': 10, 'EDU': 8, 'GOV': 6, 'NPO': 4, 'OTHER': 5}
+PROJECT_STATUSES = {'ACTIVE': 50, 'COMPLETED': 28, 'ON_HOLD': 8, 'DRAFT': 8, 'CANCELLED': 6}
+PRIORITIES = {'LOW': 20, 'MEDIUM': 45, 'HIGH': 22, 'URGENT': 8, 'CRITICAL': 5}
+ROLES = {'DEV': 45, 'QA': 15, 'DESIGNER': 10, 'BA': 10, 'CONSULTANT': 8, 'TECH_LEAD': 12}
+# Task statuses by the status of their project
+TASK_STATUSES = {
+    'DRAFT': {'TODO': 100},
+    'ACTIVE': {'TODO': 30, 'IN_PROGRESS': 25, 'REVIEW': 10, 'BLOCKED': 5, 'COMPLETED': 28, 'CANCELLED': 2},
+    'ON_HOLD': {'TODO': 40, 'IN_PROGRESS': 20, 'BLOCKED': 20, 'COMPLETED': 20},
+    'COMPLETED': {'COMPLETED': 92, 'CANCELLED': 8},
+    'CANCELLED': {'CANCELLED': 60, 'COMPLETED': 30, 'TODO': 10},
+}
+# How much time is logged against a project of each status, relative to its size
+ACTIVITY = {'DRAFT': 0, 'ACTIVE': 1.0, 'ON_HOLD': 0.5, 'COMPLETED': 1.0, 'CANCELLED': 0.3}
+HOURS = {'0.25': 3, '0.50': 10, '1.00': 18, '1.50': 12, '2.00': 16, '2.50': 7, '3.00': 10,
+         '4.00': 10, '5.00': 5, '6.00': 4, '8.00': 5}
+BILLING_RATES = ['95.00', '110.00', '125.00', '150.00', '175.00', '200.00', '225.00']
+PAYMENT_TERMS = ['Net 15', 'Net 30', 'Net 30', 'Net 45', 'Net 60']
+
+WORDS = {
+    'client': ['Acme', 'Blue', 'Summit', 'Northwind', 'Harbor', 'Vertex', 'Granite', 'Cedar', 'Pioneer', 'Atlas',
+               'Beacon', 'Silver', 'Crescent', 'Evergreen', 'Falcon', 'Orchid'],
+    'client_suffix': ['Labs', 'Partners', 'Holdings', 'Group', 'Systems', 'Health', 'Foods', 'Logistics', 'Bank'],
+    'project': ['Platform', 'Portal', 'Migration', 'Integration', 'Analytics', 'Mobile App', 'Redesign',
+                'Data Warehouse', 'Billing', 'Onboarding', 'Compliance', 'Search'],
+    'project_prefix': ['Customer', 'Partner', 'Internal', 'Payments', 'Supply Chain', 'Claims', 'Inventory',
+                       'Reporting', 'Identity', 'Marketing'],
+    'task_verb': ['Design', 'Implement', 'Review', 'Test', 'Document', 'Refactor', 'Deploy', 'Estimate',
+                  'Migrate', 'Prototype', 'Fix', 'Automate'],
+    'task_object': ['login flow', 'invoice export', 'REST endpoints', 'database schema', 'search index',
+                    'dashboard widgets', 'user permissions', 'CI pipeline', 'data import', 'email templates',
+                    'audit log', 'reporting views', 'caching layer', 'error handling'],
+    'entry': ['Development', 'Code review', 'Client meeting', 'Testing', 'Bug fixing', 'Documentation',
+              'Planning', 'Pairing session', 'Deployment', 'Research', 'Support', 'Design work'],
+    'first': ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+              'Drew', 'Robin', 'Kai', 'Noor', 'Ana', 'Lee', 'Mika', 'Sasha', 'Theo', 'Priya'],
+    'last': ['Smith', 'Garcia', 'Chen', 'Novak', 'Okafor', 'Silva', 'Kowalski', 'Nguyen', 'Haddad', 'Jensen',
+             'Rossi', 'Tanaka', 'Moreau', 'Kumar', 'Brown', 'Schmidt', 'Larsen', 'Ivanova'],
+}
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+_COPY_FORMATS = {
+    type(None): lambda value: '\\N',
+    bool: lambda value: 't' if value else 'f',
+    str: lambda value: value.translate(_COPY_ESCAPES),
+    dict: lambda value: json.dumps(value).translate(_COPY_ESCAPES) if value else '{}',
+    list: lambda value: json.dumps(value).translate(_COPY_ESCAPES),
+    # Tuples are PostgreSQL arrays (of UUIDs or numbers, which need no quoting)
+    tuple: lambda value: '{' + ','.join(map(str, value)) + '}',
+}
+
+
+def _copy_value(value):
+    """``value`` in the text format of COPY."""
+    return _COPY_FORMATS.get(type(value), str)(value)
+
+
+class Weighted:
+    """Draws keys of a ``{key: weight}`` dict in proportion to their weights."""
+    def __init__(self, weights):
+        self.keys = list(weights)
+        self.cumulative = list(accumulate(weights.values()))
+        self.total = self.cumulative[-1]
+
+    def __call__(self, rng):
+        return self.keys[bisect(self.cumulative, rng.random() * self.total)]
+
+
+class Loader:
+    """Writes rows of one model at a time with COPY, or ``bulk_create``."""
+    def __init__(self, use_copy, batch_size):
+        self.use_copy = use_copy
+        self.batch_size = batch_size
+
+    def load(self, model, columns, rows):
+        """Insert ``rows`` (tuples of values for the ``columns`` attnames); returns the count."""
+        count, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                count += self._write(model, columns, batch)
+                batch = []
+        if batch:
+            count += self._write(model, columns, batch)
+        return count
+
+    def _write(self, model, columns, rows):
+        with transaction.atomic():
+            if not self.use_copy:
+                model.objects.bulk_create([model(**dict(zip(columns, row))) for row in rows])
+                return len(rows)
+            db_columns = [model._meta.get_field(name).column for name in columns]
+            buffer = io.StringIO()
+            buffer.writelines('\t'.join(map(_copy_value, row)) + '\n' for row in rows)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                # Losing the last batches in a crash is fine for generated data
+                cursor.execute('SET LOCAL synchronous_commit = off')
+                cursor.copy_expert(
+                    f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                    f'({", ".join(map(connection.ops.quote_name, db_columns))}) FROM STDIN',
+                    buffer,
+                )
+        return len(rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates clients, projects, members, nested tasks and time entries with realistic '
+        'distributions for load tests; the same seed always generates the same data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; also namespaces codes and usernames')
+        parser.add_argument('--time-entries', type=int, default=1_000_000, help='Number of time entries')
+        parser.add_argument('--users', type=int, help='Number of users (default: one per 1,500 time entries, at least 20)')
+        parser.add_argument('--clients', type=int, default=60, help='Number of clients')
+        parser.add_argument('--projects', type=int, default=600, help='Number of projects')
+        parser.add_argument('--tasks-per-project', type=int, default=40, help='Average number of tasks per project')
+        parser.add_argument('--months', type=int, default=24, help='Months of history to generate')
+        parser.add_argument('--end-date', type=date.fromisoformat, help='Last day of generated time, YYYY-MM-DD (default: today)')
+        parser.add_argument('--batch-size', type=int, default=50_000, help='Rows written per COPY or bulk_create')
+        parser.add_argument('--password', default='benchmark', help='Password of the generated users')
+        parser.add_argument('--no-copy', action='store_true', help='Insert with bulk_create instead of COPY')
+        parser.add_argument('--skip-rollups', action='store_true', help='Do not recompute task hours and project rollups')
+
+    def handle(self, *args, **options):
+        if options['time_entries'] < 0:
+            raise CommandError('--time-entries cannot be negative')
+        for name in ('clients', 'projects', 'tasks_per_project', 'months', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        self.seed = options['seed']
+        self.prefix = f'S{self.seed}-'
+        if Client.objects.filter(code__startswith=self.prefix).exists():
+            raise CommandError(f'Data of seed {self.seed} already exists; choose another --seed')
+
+        self.rng = random.Random(self.seed)
+        self.end = options['end_date'] or timezone.localdate()
+        self.start = self.end - timedelta(days=round(options['months'] * 30.44))
+        self.loader = Loader(
+            use_copy=connection.vendor == 'postgresql' and not options['no_copy'],
+            batch_size=options['batch_size'],
+        )
+        user_count = options['users'] or max(20, options['time_entries'] // 1500)
+
+        started = time.perf_counter()
+        users = self._stage('users', self.create_users, user_count, options['password'])
+        clients = self._stage('clients', self.create_clients, options['clients'])
+        projects = self._stage('projects', self.create_projects, options['projects'], clients, users)
+        self._stage('project members', self.create_members, projects, users)
+        tasks = self._stage('tasks', self.create_tasks, projects, options['tasks_per_project'])
+        if connection.vendor == 'postgresql' and partitions.is_partitioned():
+            # Months outside the partitioned range would all land in a catch-all
+            self._stage('time entry partitions', partitions.ensure_partitions, self.start, self.end)
+        self._stage('time entries', self.create_time_entries, tasks, options['time_entries'])
+
+        if not options['skip_rollups']:
+            self._stage('task hour totals corrected', recalculate_task_hours)
+            self._stage('project rollups rebuilt', rebuild_project_rollups)
+        with connection.cursor() as cursor:
+            for model in (get_user_model(), Client, Project, ProjectMember, Task, TimeEntry):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        cache.invalidate_all_dashboards()
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded dataset {self.seed} in {time.perf_counter() - started:.1f}s; '
+            f'{self.prefix.lower()}user0001 is a superuser; all users have password {options["password"]!r}'
+        ))
+
+    def _stage(self, label, create, *args):
+        started = time.perf_counter()
+        result = create(*args)
+        count = len(result) if isinstance(result, (list, dict)) else result
+        counted = f'{count:,} ' if count is not None else ''
+        self.stdout.write(f'{counted}{label} in {time.perf_counter() - started:.1f}s')
+        return result
+
+    # Deterministic values
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def moment(self, day, hour=9, spread=9 * 60):
+        """A time on ``day`` between ``hour`` and ``spread`` minutes later, in UTC."""
+        minutes = self.rng.randrange(spread)
+        return datetime(day.year, day.month, day.day, hour, tzinfo=dt_timezone.utc) + timedelta(minutes=minutes)
+
+    def day_between(self, first, last):
+        return first + timedelta(days=self.rng.randint(0, max((last - first).days, 0)))
+
+    # Stages
+
+    def create_users(self, count, password):
+        rng = self.rng
+        encoded = make_password(password, salt=f'seed{self.seed}benchmark')
+        users = []
+        for n in range(1, count + 1):
+            first, last = rng.choice(WORDS['first']), rng.choice(WORDS['last'])
+            username = f'{self.prefix.lower()}user{n:04d}'
+            joined = self.moment(self.start - timedelta(days=rng.randrange(365)))
+            users.append(get_user_model()(
+                username=username, email=f'{username}@example.com', first_name=first, last_name=last,
+                password=encoded, uuid=self.uuid(), date_joined=joined, created_date=joined,
+                is_staff=n == 1, is_superuser=n == 1,
+            ))
+        return get_user_model().objects.bulk_create(users, batch_size=self.loader.batch_size)
+
+    def create_clients(self, count):
+        rng, industry = self.rng, Weighted(INDUSTRIES)
+        columns = (
+            'id', 'created_date', 'updated_date', 'is_active', 'notes', 'metadata', 'name', 'code', 'industry_id',
+            'primary_contact_name', 'primary_contact_email', 'primary_contact_phone', 'billing_address',
+            'billing_email', 'default_billing_rate', 'payment_terms',
+        )
+        rows = []
+        for n in range(1, count + 1):
+            name = f"{rng.choice(WORDS['client'])} {rng.choice(WORDS['client_suffix'])} {n}"
+            domain = f'client{n}.example.com'
+            created = self.moment(self.day_between(self.start - timedelta(days=365), self.start))
+            rows.append((
+                self.uuid(), created, created, rng.random() > 0.03, '', {}, name, f'{self.prefix}C{n:04d}',
+                lookups.pk('INDUSTRY', industry(rng)),
+                f"{rng.choice(WORDS['first'])} {rng.choice(WORDS['last'])}", f'contact@{domain}',
+                f'555-{rng.randrange(10000):04d}', f'{rng.randint(1, 999)} Main Street', f'billing@{domain}',
+                rng.choice(BILLING_RATES) if rng.random() < 0.9 else None, rng.choice(PAYMENT_TERMS),
+            ))
+        self.loader.load(Client, columns, rows)
+        return [{'id': row[0], 'active': row[3]} for row in rows]
+
+    def create_projects(self, count, clients, users):
+        rng, status, priority = self.rng, Weighted(PROJECT_STATUSES), Weighted(PRIORITIES)
+        # A few large clients own most of the projects
+        client_weights = Weighted({index: 1 / (index + 1) ** 0.8 for index in range(len(clients))})
+        managers = users[:max(1, len(users) // 10)]
+        columns = (
+            'id', 'created_date', 'updated_date', 'is_active', 'notes', 'metadata', 'name', 'code', 'client_id',
+            'description', 'status_id', 'priority_id', 'start_date', 'end_date', 'manager_id', 'budget_amount',
+            'billing_rate', 'estimated_hours',
+        )
+        rows, projects = [], []
+        for n in range(1, count + 1):
+            code = status(rng)
+            client = clients[client_weights(rng)]
+            if code in ('COMPLETED', 'CANCELLED'):
+                end = self.day_between(self.start + timedelta(days=30), self.end - timedelta(days=1))
+                start = end - timedelta(days=rng.randint(30, 365))
+            else:
+                start = self.day_between(self.start, self.end - timedelta(days=14))
+                if code == 'DRAFT':
+                    start = self.day_between(self.end - timedelta(days=60), self.end + timedelta(days=60))
+                end = start + timedelta(days=rng.randint(30, 365))
+            size = rng.lognormvariate(0, 0.7)
+            estimated = Decimal(round(size * 800, -1) or 10)
+            created = self.moment(start - timedelta(days=rng.randint(0, 30)))
+            name = f"{rng.choice(WORDS['project_prefix'])} {rng.choice(WORDS['project'])} {n}"
+            rows.append((
+                self.uuid(), created, created, client['active'] and rng.random() > 0.02, '', {}, name,
+                f'{self.prefix}P{n:05d}', client['id'], f'{name} for client {client["id"].hex[:8]}.',
+                lookups.pk('PROJECT_STATUS', code), lookups.pk('PRIORITY', priority(rng)), start,
+                end if code != 'DRAFT' or rng.random() < 0.5 else None, rng.choice(managers).pk,
+                estimated * rng.choice([100, 125, 150]) if rng.random() < 0.8 else None,
+                rng.choice(BILLING_RATES) if rng.random() < 0.4 else None, estimated,
+            ))
+            projects.append({
+                'id': rows[-1][0], 'status': code, 'start': start, 'end': end, 'created': created,
+                'size': size, 'manager': rows[-1][14],
+            })
+        self.loader.load(Project, columns, rows)
+        return projects
+
+    def create_members(self, projects, users):
+        rng, role = self.rng, Weighted(ROLES)
+        columns = (
+            'id', 'created_date', 'updated_date', 'is_active', 'notes', 'metadata', 'project_id', 'user_id',
+            'role_id', 'join_date', 'end_date', 'billing_rate',
+        )
+        people = [user.pk for user in users]
+        rows = []
+        for project in projects:
+            team = [project['manager']] + [
+                pk for pk in rng.sample(people, min(len(people), rng.randint(3, 12))) if pk != project['manager']
+            ]
+            project['members'] = team
+            for index, user_id in enumerate(team):
+                left = project['status'] == 'ACTIVE' and index and rng.random() < 0.08
+                rows.append((
+                    self.uuid(), project['created'], project['created'], True, '', {}, project['id'], user_id,
+                    lookups.pk('PROJECT_ROLE', 'PM' if index == 0 else role(rng)), project['start'],
+                    self.day_between(project['start'], self.end) if left else None,
+                    rng.choice(BILLING_RATES) if rng.random() < 0.2 else None,
+                ))
+        return self.loader.load(ProjectMember, columns, rows)
+
+    def create_tasks(self, projects, per_project):
+        rng, priority = self.rng, Weighted(PRIORITIES)
+        columns = (
+            'id', 'created_date', 'updated_date', 'is_active', 'notes', 'metadata', 'project_id', 'parent_task_id',
+            'title', 'description', 'status_id', 'priority_id', 'assigned_to_id', 'due_date', 'estimated_hours',
+            'actual_hours', 'billable', 'billing_rate', 'tree_path',
+        )
+        rows, tasks, paths = [], [], {}
+        for project in projects:
+            status = Weighted(TASK_STATUSES[project['status']])
+            count = max(1, round(per_project * project['size']))
+            # Parents come before their subtasks; at most three levels
+            levels = [[], [], []]
+            for _ in range(count):
+                depth = 0 if not levels[0] else rng.choices((0, 1, 2), (70, 24, 6))[0]
+                while depth and not levels[depth - 1]:
+                    depth -= 1
+                parent = rng.choice(levels[depth - 1]) if depth else None
+                task_id = self.uuid()
+                paths[task_id] = paths[parent] + (task_id,) if parent else (task_id,)
+                levels[depth].append(task_id)
+                estimate = Decimal(rng.choice((2, 4, 6, 8, 12, 16, 24, 40, 80)))
+                created = self.moment(self.day_between(project['start'], min(project['end'], self.end)))
+                billable = rng.random() < 0.88
+                rows.append((
+                    task_id, created, created, rng.random() > 0.01, '', {}, project['id'], parent,
+                    f"{rng.choice(WORDS['task_verb'])} {rng.choice(WORDS['task_object'])}", '',
+                    lookups.pk('TASK_STATUS', status(rng)), lookups.pk('PRIORITY', priority(rng)),
+                    rng.choice(project['members']) if rng.random() < 0.9 else None,
+                    created.date() + timedelta(days=rng.randint(3, 60)) if rng.random() < 0.8 else None,
+                    estimate if rng.random() < 0.85 else None, Decimal('0.00'), billable,
+                    rng.choice(BILLING_RATES) if rng.random() < 0.05 else None, paths[task_id],
+                ))
+                tasks.append((
+                    task_id, rows[-1][12], billable, project,
+                    float(estimate) * ACTIVITY[project['status']] * (1 if rows[-1][3] else 0.05),
+                ))
+        self.loader.load(Task, columns, rows)
+        return tasks
+
+    def create_time_entries(self, tasks, count):
+        # Keys as strings: formatting UUIDs per row dominates the COPY otherwise
+        tasks = [(str(task[0]), *task[1:]) for task in tasks if task[4] > 0]
+        if not tasks or not count:
+            return 0
+        rng, hours = self.rng, Weighted({Decimal(value): weight for value, weight in HOURS.items()})
+        cumulative = list(accumulate(task[4] for task in tasks))
+        descriptions = WORDS['entry']
+        status_pks = {code: str(lookups.pk('BILLING_STATUS', code)) for code in
+                      ('UNBILLED', 'READY', 'BILLED', 'PAID', 'NON_BILLABLE', 'DISPUTED')}
+        # Billing progresses with age: recent time is unbilled, old time paid
+        by_age = [
+            (30, Weighted({'UNBILLED': 90, 'READY': 10})),
+            (60, Weighted({'UNBILLED': 20, 'READY': 20, 'BILLED': 60})),
+            (None, Weighted({'PAID': 82, 'BILLED': 13, 'READY': 3, 'DISPUTED': 2})),
+        ]
+        end_ordinal = self.end.toordinal()
+        windows = {}
+        for task in tasks:
+            project = task[3]
+            if project['id'] not in windows:
+                first = max(project['start'], self.start).toordinal()
+                last = min(project['end'], self.end).toordinal()
+                windows[project['id']] = (first, max(last - first, 0))
+        columns = (
+            'id', 'created_date', 'updated_date', 'is_active', 'notes', 'metadata', 'task_id', 'user_id',
+            'date', 'hours', 'description', 'billable', 'billing_rate', 'billing_status_id',
+        )
+
+        def rows():
+            for _ in range(count):
+                task_id, assignee, billable_task, project, _weight = tasks[
+                    bisect(cumulative, rng.random() * cumulative[-1])
+                ]
+                first, span = windows[project['id']]
+                ordinal = first + int(rng.random() * (span + 1))
+                weekday = (ordinal - 1) % 7  # date.fromordinal(1) is a Monday
+                if weekday > 4 and rng.random() < 0.9:
+                    ordinal = max(first, ordinal - (weekday - 4))
+                day = date.fromordinal(ordinal)
+                user_id = assignee if assignee and rng.random() < 0.8 else rng.choice(project['members'])
+                billable = billable_task and rng.random() < 0.95
+                if billable:
+                    age = end_ordinal - ordinal
+                    for limit, billing_status in by_age:
+                        if limit is None or age < limit:
+                            break
+                    status_pk = status_pks[billing_status(rng)]
+                else:
+                    status_pk = status_pks['NON_BILLABLE']
+                created = datetime(day.year, day.month, day.day, 16, tzinfo=dt_timezone.utc) + timedelta(
+                    seconds=rng.randrange(6 * 3600)
+                )
+                yield (
+                    uuid.UUID(int=rng.getrandbits(128), version=4), created, created, rng.random() > 0.01,
+                    '', {}, task_id, user_id, day, hours(rng), rng.choice(descriptions), billable, None, status_pk,
+                )
+
+        return self.loader.load(TimeEntry, columns, rows())
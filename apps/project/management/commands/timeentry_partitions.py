@@ -0,0 +1,72 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.project import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the monthly time entry partitions for the coming months, optionally detaches old ones, '
+        'and checks that the dashboard, invoicing and export queries prune partitions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help='Months after the current one to create partitions for')
+        parser.add_argument(
+            '--detach-before', metavar='YYYY-MM',
+            help='Detach the partitions of the months before this one; their entries leave the application',
+        )
+        parser.add_argument('--drop', action='store_true', help='Drop the partitions detached by --detach-before')
+        parser.add_argument('--check', action='store_true', help='Fail if a checked query reads partitions outside its date window')
+        parser.add_argument('--lock-timeout', type=int, default=5000, help='Milliseconds to wait for table locks')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError(f'{partitions.TABLE} is not partitioned; run the migrations first')
+        if options['ahead'] < 0:
+            raise CommandError('--ahead cannot be negative')
+        if options['drop'] and not options['detach_before']:
+            raise CommandError('--drop needs --detach-before')
+
+        this_month = partitions.month_start(timezone.localdate())
+        created = partitions.ensure_partitions(
+            this_month, partitions.add_months(this_month, options['ahead']), lock_timeout=options['lock_timeout'],
+        )
+        for name in created:
+            self.stdout.write(f'Created {name}')
+
+        if options['detach_before']:
+            try:
+                before = date.fromisoformat(f"{options['detach_before']}-01")
+            except ValueError:
+                raise CommandError(f"--detach-before must be a month as YYYY-MM, not {options['detach_before']}")
+            if before > this_month:
+                raise CommandError('--detach-before cannot be later than the current month')
+            detached = partitions.detach_partitions(before, drop=options['drop'], lock_timeout=options['lock_timeout'])
+            for name in detached:
+                self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+
+        current = partitions.list_partitions()
+        monthly = [partition for partition in current if partition.name not in (partitions.BEFORE, partitions.AFTER)]
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(monthly)} monthly partitions from {monthly[0].start:%Y-%m} to {monthly[-1].start:%Y-%m}'
+        ))
+
+        if options['check']:
+            self.check_pruning()
+
+    def check_pruning(self):
+        failures = 0
+        for name, scanned, outside in partitions.check_pruning():
+            if outside:
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: reads {len(scanned)} partition(s), outside its window: {", ".join(sorted(outside))}'
+                ))
+            else:
+                self.stdout.write(f'{name}: reads {len(scanned)} partition(s)')
+        if failures:
+            raise CommandError(f'{failures} quer(ies) read partitions outside their date window')
+        self.stdout.write(self.style.SUCCESS('Every checked query is pruned to its date window'))
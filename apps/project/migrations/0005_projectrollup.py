@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0004_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRollup',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='project.project', verbose_name='Project')),
+                ('hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Hours logged on active time entries', max_digits=12, verbose_name='Hours')),
+                ('billable_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Billable Hours')),
+                ('billable_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Billable hours at their effective billing rates', max_digits=14, verbose_name='Billable Amount')),
+                ('unbilled_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Billable amount of time entries that are still unbilled', max_digits=14, verbose_name='Unbilled Amount')),
+                ('task_count', models.PositiveIntegerField(default=0, help_text='Number of active tasks', verbose_name='Task Count')),
+                ('task_status_counts', models.JSONField(blank=True, default=dict, help_text='Number of active tasks keyed by status code', verbose_name='Task Status Counts')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+            ],
+            options={
+                'verbose_name': 'Project Rollup',
+                'verbose_name_plural': 'Project Rollups',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:49
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0005_projectrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('number', models.CharField(max_length=50, unique=True, verbose_name='Invoice Number')),
+                ('issue_date', models.DateField(default=django.utils.timezone.now, verbose_name='Issue Date')),
+                ('due_date', models.DateField(blank=True, null=True, verbose_name='Due Date')),
+                ('period_end', models.DateField(help_text='Last date of the time entries included on this invoice', verbose_name='Period End')),
+                ('hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Hours')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total Amount')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='invoices', to='project.client', verbose_name='Client')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Invoice',
+                'verbose_name_plural': 'Invoices',
+                'ordering': ['-issue_date', '-number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('hours', models.DecimalField(decimal_places=2, max_digits=6, verbose_name='Hours')),
+                ('rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Rate')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Amount')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='project.invoice', verbose_name='Invoice')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='invoice_lines', to='project.project', verbose_name='Project')),
+                ('time_entry', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='invoice_line', to='project.timeentry', verbose_name='Time Entry')),
+            ],
+            options={
+                'verbose_name': 'Invoice Line',
+                'verbose_name_plural': 'Invoice Lines',
+                'ordering': ['invoice', 'date', 'id'],
+            },
+        ),
+    ]
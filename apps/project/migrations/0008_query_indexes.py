@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:56
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to large tables
+    atomic = False
+
+
+    dependencies = [
+        ('project', '0007_search_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status'], name='project_active_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_date'], name='project_active_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['assigned_to', 'status'], name='task_active_assignee_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['project', 'status'], name='task_active_project_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(fields=['user', '-date'], name='timeentry_user_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(condition=models.Q(('billable', True), ('is_active', True)), fields=['billing_status', 'date'], name='timeentry_billable_idx'),
+        ),
+    ]
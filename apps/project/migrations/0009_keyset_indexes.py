@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to large tables
+    atomic = False
+
+    dependencies = [
+        ('project', '0008_query_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='client',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='client_active_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_date', '-id'], name='project_active_recent_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='project',
+            name='project_active_created_idx',
+        ),
+    ]
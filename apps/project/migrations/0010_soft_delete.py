@@ -0,0 +1,99 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:05
+
+import apps.core.softdelete
+import django.db.models.manager
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to large tables; the new
+    # nullable columns are a catalog-only change
+    atomic = False
+
+    dependencies = [
+        ('project', '0009_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='client',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='invoice',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='project',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='projectmember',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='task',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='timeentry',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='projectmember',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='deleted_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date'),
+        ),
+        AddIndexConcurrently(
+            model_name='projectmember',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['project', 'user'], name='member_active_project_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['task', '-date'], name='timeentry_active_task_idx'),
+        ),
+    ]
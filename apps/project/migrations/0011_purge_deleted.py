@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import F
+
+SOFT_DELETE_MODELS = ('client', 'invoice', 'project', 'projectmember', 'task', 'timeentry')
+
+
+def backfill_deleted_date(apps, schema_editor):
+    """Rows deactivated before deleted_date existed were deleted at their last update at the latest."""
+    for name in SOFT_DELETE_MODELS:
+        model = apps.get_model('project', name)
+        model.all_objects.filter(is_active=False, deleted_date__isnull=True).update(deleted_date=F('updated_date'))
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to large tables; the backfill
+    # runs in a transaction of its own
+    atomic = False
+
+    dependencies = [
+        ('project', '0010_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_deleted_date, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_date'], name='project_deleted_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_date'], name='task_deleted_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deleted_date'], name='timeentry_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:40
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLE = 'project_timeentry'
+OLD = 'project_timeentry_old'
+# Months created beyond the current one
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _set_aside(schema_editor, model):
+    """Rename the table to OLD and free the names of its indexes for the new one."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD}')
+    for name, constraint in constraints.items():
+        if constraint['primary_key']:
+            schema_editor.execute(f'ALTER TABLE {OLD} RENAME CONSTRAINT {name} TO {OLD}_pkey')
+        elif constraint['index'] and not constraint['unique']:
+            schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(name)}')
+
+
+def _copy_back(schema_editor, model):
+    columns = ', '.join(schema_editor.quote_name(field.column) for field in model._meta.local_concrete_fields)
+    schema_editor.execute(f'INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {OLD}')
+    schema_editor.execute(f'DROP TABLE {OLD} CASCADE')
+
+
+def partition_time_entries(apps, schema_editor):
+    """
+    Rebuild the time entry table partitioned by month on date: monthly
+    partitions from the first entry through MONTHS_AHEAD months from now,
+    and catch-alls before and after them.
+
+    The table is locked while its rows are copied into the partitions, so
+    run this outside busy hours.
+    """
+    TimeEntry = apps.get_model('project', 'TimeEntry')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(date) FROM {TABLE}')
+        first = cursor.fetchone()[0]
+    this_month = timezone.localdate().replace(day=1)
+    first = min(first, this_month).replace(day=1) if first else this_month
+    last = _add_months(this_month, MONTHS_AHEAD)
+
+    _set_aside(schema_editor, TimeEntry)
+    sql, params = schema_editor.table_sql(TimeEntry)
+    # A primary key of a partitioned table has to include the partition key
+    sql = sql.replace(' PRIMARY KEY', '', 1)
+    sql = f'{sql[:-1]}, PRIMARY KEY ("id", "date")) PARTITION BY RANGE ("date")'
+    schema_editor.execute(sql, params or None)
+    schema_editor.execute(
+        f"CREATE TABLE {TABLE}_before PARTITION OF {TABLE} FOR VALUES FROM (MINVALUE) TO ('{first.isoformat()}')"
+    )
+    month = first
+    while month <= last:
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    schema_editor.execute(
+        f"CREATE TABLE {TABLE}_after PARTITION OF {TABLE} FOR VALUES FROM ('{month.isoformat()}') TO (MAXVALUE)"
+    )
+    _copy_back(schema_editor, TimeEntry)
+    # Indexes last: building them over the copied rows beats maintaining them row by row
+    for statement in schema_editor._model_indexes_sql(TimeEntry):
+        schema_editor.execute(statement)
+    schema_editor.execute(f'ANALYZE {TABLE}')
+
+
+def unpartition_time_entries(apps, schema_editor):
+    TimeEntry = apps.get_model('project', 'TimeEntry')
+    _set_aside(schema_editor, TimeEntry)
+    schema_editor.create_model(TimeEntry)
+    _copy_back(schema_editor, TimeEntry)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0011_purge_deleted'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoiceline',
+            name='time_entry',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, related_name='invoice_line', to='project.timeentry', verbose_name='Time Entry'),
+        ),
+        migrations.RunPython(partition_time_entries, unpartition_time_entries),
+    ]
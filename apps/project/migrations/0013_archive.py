@@ -0,0 +1,122 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:20
+
+import apps.core.softdelete
+import django.db.models.deletion
+import django.db.models.manager
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_soft_delete'),
+        ('project', '0012_partition_timeentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='archived_date',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the team, tasks and time entries of the project were moved to the archive tables', null=True, verbose_name='Archived Date'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedProjectMember',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('deleted_date', models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('join_date', models.DateField(verbose_name='Join Date')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='End Date')),
+                ('billing_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Billing Rate')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_memberships', to='project.project', verbose_name='Project')),
+                ('role', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.lookupvalue', verbose_name='Role')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Team Member')),
+            ],
+            options={
+                'verbose_name': 'Archived Project Member',
+                'verbose_name_plural': 'Archived Project Members',
+                'ordering': ['project', 'user'],
+                'unique_together': {('project', 'user')},
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('deleted_date', models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('title', models.CharField(max_length=200, verbose_name='Title')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('due_date', models.DateField(blank=True, null=True, verbose_name='Due Date')),
+                ('estimated_hours', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Estimated Hours')),
+                ('actual_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=8, verbose_name='Actual Hours')),
+                ('billable', models.BooleanField(default=True, verbose_name='Billable')),
+                ('billing_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Billing Rate')),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Assigned To')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('parent_task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subtasks', to='project.archivedtask', verbose_name='Parent Task')),
+                ('priority', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.lookupvalue', verbose_name='Priority')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_tasks', to='project.project', verbose_name='Project')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.lookupvalue', verbose_name='Status')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Archived Task',
+                'verbose_name_plural': 'Archived Tasks',
+                'ordering': ['project', 'due_date', 'priority'],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTimeEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('deleted_date', models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('hours', models.DecimalField(decimal_places=2, max_digits=6, verbose_name='Hours')),
+                ('description', models.TextField(verbose_name='Description')),
+                ('billable', models.BooleanField(default=True, verbose_name='Billable')),
+                ('billing_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Billing Rate')),
+                ('billing_status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.lookupvalue', verbose_name='Billing Status')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='time_entries', to='project.archivedtask', verbose_name='Task')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Archived Time Entry',
+                'verbose_name_plural': 'Archived Time Entries',
+                'ordering': ['-date', '-created_date'],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Paths from the roots down; tasks on a parent_task cycle are never reached
+# and become roots of their own
+BACKFILL_SQL = """
+WITH RECURSIVE tree (id, path) AS (
+    SELECT id, ARRAY[id] FROM {table} WHERE parent_task_id IS NULL
+    UNION ALL
+    SELECT task.id, tree.path || task.id FROM {table} task JOIN tree ON task.parent_task_id = tree.id
+)
+UPDATE {table} SET tree_path = tree.path FROM tree WHERE {table}.id = tree.id;
+UPDATE {table} SET tree_path = ARRAY[id], parent_task_id = NULL WHERE tree_path = '{{}}';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0013_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tree_path',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), default=list, editable=False, size=None, verbose_name='Tree Path'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='tree_path',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), default=list, editable=False, help_text='Ids of the ancestors of the task and its own, root first; see apps.project.tasktree', size=None, verbose_name='Tree Path'),
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(table='project_task') + BACKFILL_SQL.format(table='project_archivedtask'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tree_path'], name='task_tree_path_idx'),
+        ),
+    ]
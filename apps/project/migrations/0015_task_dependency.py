@@ -0,0 +1,170 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:05
+
+import apps.core.softdelete
+import django.db.models.deletion
+import django.db.models.manager
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+DEPENDENCY_TYPES = [
+    ('FS', 'Finish to Start', 'The task starts after its predecessor finishes', 10),
+    ('SS', 'Start to Start', 'The task starts after its predecessor starts', 20),
+    ('FF', 'Finish to Finish', 'The task finishes after its predecessor finishes', 30),
+]
+
+
+def create_dependency_types(apps, schema_editor):
+    LookupCategory = apps.get_model('core', 'LookupCategory')
+    LookupValue = apps.get_model('core', 'LookupValue')
+    category = LookupCategory.objects.create(
+        code='DEPENDENCY_TYPE',
+        name='Dependency Type',
+        description='How a task is scheduled against its predecessor',
+        is_system=True
+    )
+    for code, name, description, sort_order in DEPENDENCY_TYPES:
+        LookupValue.objects.create(
+            category=category, code=code, name=name, description=description, sort_order=sort_order
+        )
+
+
+def remove_dependency_types(apps, schema_editor):
+    LookupCategory = apps.get_model('core', 'LookupCategory')
+    LookupCategory.objects.filter(code='DEPENDENCY_TYPE').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_soft_delete'),
+        ('project', '0014_task_tree_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='duration_days',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Duration (days)'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='early_finish',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Early Finish'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='early_start',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Early Start'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='late_finish',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Late Finish'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='late_start',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Late Start'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='total_slack',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Total Slack'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='duration_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Days the task takes in the schedule; 0 for a milestone. Defaults to the estimated hours over a working day.', null=True, verbose_name='Duration (days)'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='early_finish',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Early Finish'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='early_start',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Early Start'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='late_finish',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Late Finish'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='late_start',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Late Start'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='total_slack',
+            field=models.IntegerField(blank=True, editable=False, help_text='Days the task can slip without delaying the project; 0 on the critical path', null=True, verbose_name='Total Slack'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTaskDependency',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('deleted_date', models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('lag_days', models.IntegerField(default=0, verbose_name='Lag (days)')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('predecessor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='successor_links', to='project.archivedtask', verbose_name='Predecessor')),
+                ('successor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='predecessor_links', to='project.archivedtask', verbose_name='Successor')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.lookupvalue', verbose_name='Type')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Archived Task Dependency',
+                'verbose_name_plural': 'Archived Task Dependencies',
+                'ordering': ['successor', 'predecessor'],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True, help_text='Date and time when this object was created', verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, help_text='Date and time when this object was last updated', verbose_name='Updated Date')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this object is active. Inactive objects are treated as deleted.', verbose_name='Active')),
+                ('deleted_date', models.DateTimeField(blank=True, editable=False, help_text='Date and time when this object was soft deleted', null=True, verbose_name='Deleted Date')),
+                ('notes', models.TextField(blank=True, help_text='Optional notes about this object', verbose_name='Notes')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Additional data stored as JSON', verbose_name='Metadata')),
+                ('lag_days', models.IntegerField(default=0, help_text='Days between the linked dates; negative for a lead', verbose_name='Lag (days)')),
+                ('created_by', models.ForeignKey(help_text='User who created this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('predecessor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='successor_links', to='project.task', verbose_name='Predecessor')),
+                ('successor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predecessor_links', to='project.task', verbose_name='Successor')),
+                ('type', models.ForeignKey(limit_choices_to={'category__code': 'DEPENDENCY_TYPE'}, on_delete=django.db.models.deletion.PROTECT, related_name='task_dependencies', to='core.lookupvalue', verbose_name='Type')),
+                ('updated_by', models.ForeignKey(help_text='User who last updated this object', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Updated By')),
+            ],
+            options={
+                'verbose_name': 'Task Dependency',
+                'verbose_name_plural': 'Task Dependencies',
+                'ordering': ['successor', 'predecessor'],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+                ('objects', apps.core.softdelete.ActiveManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('predecessor', 'successor'), name='task_dependency_unique_active'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.CheckConstraint(condition=models.Q(('predecessor', models.F('successor')), _negated=True), name='task_dependency_not_self'),
+        ),
+        migrations.RunPython(create_dependency_types, remove_dependency_types),
+    ]
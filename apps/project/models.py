@@ -1,10 +1,31 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.core.models import BaseModel, LookupValue
 from decimal import Decimal
 from django.utils import timezone
+from . import scheduling, tasktree
+
+# Full-text search documents. The GIN indexes below are built on exactly these
+# expressions, so queries must filter on them unchanged to use the index.
+SEARCH_CONFIG = 'english'
+CLIENT_SEARCH_VECTOR = (
+    SearchVector('name', 'code', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('primary_contact_name', 'notes', weight='B', config=SEARCH_CONFIG)
+)
+PROJECT_SEARCH_VECTOR = (
+    SearchVector('name', 'code', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+)
+TASK_SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+)
+TIME_ENTRY_SEARCH_VECTOR = SearchVector('description', config=SEARCH_CONFIG)
 
 class Client(BaseModel):
     """
@@ -72,6 +93,11 @@ class Client(BaseModel):
         verbose_name = _('Client')
         verbose_name_plural = _('Clients')
         ordering = ['name']
+        indexes = [
+            GinIndex(CLIENT_SEARCH_VECTOR, name='project_client_search_idx'),
+            # Keyset pages of the client list: (name, id)
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True), name='client_active_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,6 +106,9 @@ class Project(BaseModel):
     """
     Represents a project in the system.
     """
+    # Deleting a project deletes its team and tasks (and their time entries)
+    soft_delete_cascade = ('memberships', 'tasks')
+
     name = models.CharField(
         max_length=200,
         verbose_name=_('Project Name'),
@@ -168,11 +197,27 @@ class Project(BaseModel):
         null=True,
         blank=True
     )
+    archived_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('Archived Date'),
+        help_text=_('When the team, tasks and time entries of the project were moved to the archive tables')
+    )
 
     class Meta:
         verbose_name = _('Project')
         verbose_name_plural = _('Projects')
         ordering = ['-created_date']
+        indexes = [
+            GinIndex(PROJECT_SEARCH_VECTOR, name='project_project_search_idx'),
+            # Open project counts and the project list only look at active rows
+            models.Index(fields=['status'], condition=models.Q(is_active=True), name='project_active_status_idx'),
+            # Keyset pages of the project list: (created_date, id) descending
+            models.Index(fields=['-created_date', '-id'], condition=models.Q(is_active=True), name='project_active_recent_idx'),
+            # Soft-deleted rows in deletion order, for purge_deleted
+            models.Index(fields=['deleted_date'], condition=models.Q(is_active=False), name='project_deleted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -235,6 +280,10 @@ class ProjectMember(BaseModel):
         verbose_name_plural = _('Project Members')
         unique_together = [('project', 'user')]
         ordering = ['project', 'user']
+        indexes = [
+            # Project teams (project detail, rate resolution)
+            models.Index(fields=['project', 'user'], condition=models.Q(is_active=True), name='member_active_project_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.role.name} on {self.project.code}"
@@ -253,6 +302,10 @@ class Task(BaseModel):
     """
     Represents a task within a project that can be assigned to team members.
     """
+    # Subtasks are left alone, as parent_task is SET_NULL on a real delete;
+    # dependencies on a deleted task no longer constrain the schedule
+    soft_delete_cascade = ('time_entries', 'predecessor_links', 'successor_links')
+
     project = models.ForeignKey(
         Project,
         on_delete=models.CASCADE,
@@ -310,6 +363,13 @@ class Task(BaseModel):
         null=True,
         blank=True
     )
+    duration_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_('Duration (days)'),
+        help_text=_('Days the task takes in the schedule; 0 for a milestone. '
+                    'Defaults to the estimated hours over a working day.')
+    )
     actual_hours = models.DecimalField(
         max_digits=8,
         decimal_places=2,
@@ -331,20 +391,80 @@ class Task(BaseModel):
         null=True,
         blank=True
     )
+    tree_path = ArrayField(
+        models.UUIDField(),
+        default=list,
+        editable=False,
+        verbose_name=_('Tree Path'),
+        help_text=_('Ids of the ancestors of the task and its own, root first; see apps.project.tasktree')
+    )
+    # Critical path schedule, maintained by apps.project.scheduling
+    early_start = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Early Start'))
+    early_finish = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Early Finish'))
+    late_start = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Late Start'))
+    late_finish = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Late Finish'))
+    total_slack = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name=_('Total Slack'),
+        help_text=_('Days the task can slip without delaying the project; 0 on the critical path')
+    )
+
+    schedule_fields = ('early_start', 'early_finish', 'late_start', 'late_finish', 'total_slack')
 
     class Meta:
         verbose_name = _('Task')
         verbose_name_plural = _('Tasks')
         ordering = ['project', 'due_date', 'priority']
+        indexes = [
+            GinIndex(TASK_SEARCH_VECTOR, name='project_task_search_idx'),
+            # "My open tasks" (dashboard, timesheet, time entry form)
+            models.Index(fields=['assigned_to', 'status'], condition=models.Q(is_active=True), name='task_active_assignee_idx'),
+            # Per-project status counts (rollups, project progress and detail)
+            models.Index(fields=['project', 'status'], condition=models.Q(is_active=True), name='task_active_project_idx'),
+            # Soft-deleted rows in deletion order, for purge_deleted
+            models.Index(fields=['deleted_date'], condition=models.Q(is_active=False), name='task_deleted_idx'),
+            # Subtrees: tree_path @> ARRAY[id]
+            GinIndex(fields=['tree_path'], name='task_tree_path_idx'),
+        ]
 
     def __str__(self):
         return f"{self.project.code} - {self.title}"
 
+    def clean(self):
+        super().clean()
+        tasktree.check_parent(self, self.parent_task)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        moved = not adding and self.has_changed('parent_task_id')
+        # actual_hours is maintained by time entry writes with F() updates,
+        # tree_path by move_subtree and the schedule by the scheduler;
+        # saving a stale instance must not overwrite any of them
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ('actual_hours', 'tree_path', *self.schedule_fields)
+            ]
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            if adding or moved:
+                self.tree_path = tasktree.path_for(self)
+            super().save(*args, **kwargs)
+            if moved:
+                tasktree.move_subtree(self, self.tree_path)
+
     @property
     def is_completed(self):
         """Check if the task is marked as completed based on status"""
         return self.status.code == 'COMPLETED'
 
+    @property
+    def is_critical(self):
+        """Whether the task is on its project's critical path"""
+        return self.total_slack is not None and self.total_slack <= 0
+
     @property
     def get_effective_billing_rate(self):
         """Get the effective billing rate (task rate, assigned member rate, project rate, or client default)"""
@@ -356,9 +476,71 @@ class Task(BaseModel):
                 return member.billing_rate
         return self.project.get_effective_billing_rate
 
+class TaskDependency(BaseModel):
+    """
+    A scheduling constraint between two tasks of the same project: finish
+    to start (the successor starts after the predecessor finishes), start
+    to start or finish to finish, shifted by ``lag_days`` (negative for a
+    lead). See apps.project.scheduling.
+    """
+    predecessor = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='successor_links',
+        verbose_name=_('Predecessor')
+    )
+    successor = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='predecessor_links',
+        verbose_name=_('Successor')
+    )
+    type = models.ForeignKey(
+        'core.LookupValue',
+        on_delete=models.PROTECT,
+        limit_choices_to={'category__code': 'DEPENDENCY_TYPE'},
+        related_name='task_dependencies',
+        verbose_name=_('Type')
+    )
+    lag_days = models.IntegerField(
+        default=0,
+        verbose_name=_('Lag (days)'),
+        help_text=_('Days between the linked dates; negative for a lead')
+    )
+
+    class Meta:
+        verbose_name = _('Task Dependency')
+        verbose_name_plural = _('Task Dependencies')
+        ordering = ['successor', 'predecessor']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['predecessor', 'successor'], condition=models.Q(is_active=True),
+                name='task_dependency_unique_active',
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(predecessor=models.F('successor')), name='task_dependency_not_self',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.predecessor.title} → {self.successor.title} ({self.type.code})"
+
+    def clean(self):
+        super().clean()
+        if self.predecessor_id and self.successor_id:
+            scheduling.check_dependency(self)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            if self.has_changed('predecessor_id', 'successor_id', 'is_active') and self.is_active:
+                scheduling.check_dependency(self)
+            super().save(*args, **kwargs)
+
 class TimeEntry(BaseModel):
     """
     Records time spent by team members on project tasks.
+
+    The table is partitioned by month on ``date``; see apps.project.partitions.
     """
     task = models.ForeignKey(
         Task,
@@ -414,17 +596,25 @@ class TimeEntry(BaseModel):
         verbose_name = _('Time Entry')
         verbose_name_plural = _('Time Entries')
         ordering = ['-date', '-created_date']
+        indexes = [
+            # Active entries of a task or project (task hours, rollups, detail pages)
+            models.Index(fields=['task', '-date'], condition=models.Q(is_active=True), name='timeentry_active_task_idx'),
+            # A user's most recent entries and their daily totals
+            models.Index(fields=['user', '-date'], name='timeentry_user_date_idx'),
+            # Unbilled billable time, scanned by invoicing
+            models.Index(
+                fields=['billing_status', 'date'],
+                condition=models.Q(billable=True, is_active=True),
+                name='timeentry_billable_idx',
+            ),
+            # Soft-deleted rows in deletion order, for purge_deleted
+            models.Index(fields=['deleted_date'], condition=models.Q(is_active=False), name='timeentry_deleted_idx'),
+            GinIndex(TIME_ENTRY_SEARCH_VECTOR, name='project_timeentry_search_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.task.project.code} - {self.date}"
 
-    def save(self, *args, **kwargs):
-        # Update task actual hours
-        if not self.pk:  # Only on creation
-            self.task.actual_hours += self.hours
-            self.task.save()
-        super().save(*args, **kwargs)
-
     @property
     def get_effective_billing_rate(self):
         """Get the effective billing rate at time of entry"""
@@ -436,3 +626,322 @@ class TimeEntry(BaseModel):
             return Decimal('0.00')
         rate = self.get_effective_billing_rate
         return rate * self.hours if rate else Decimal('0.00')
+
+
+class ProjectRollup(models.Model):
+    """
+    Denormalized per-project totals maintained incrementally from Task and
+    TimeEntry writes (see signals.py). Use the ``rebuild_rollups`` management
+    command to reconcile it with the source tables.
+    """
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup',
+        verbose_name=_('Project')
+    )
+    hours = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Hours'),
+        help_text=_('Hours logged on active time entries')
+    )
+    billable_hours = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Billable Hours')
+    )
+    billable_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Billable Amount'),
+        help_text=_('Billable hours at their effective billing rates')
+    )
+    unbilled_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Unbilled Amount'),
+        help_text=_('Billable amount of time entries that are still unbilled')
+    )
+    task_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Task Count'),
+        help_text=_('Number of active tasks')
+    )
+    task_status_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_('Task Status Counts'),
+        help_text=_('Number of active tasks keyed by status code')
+    )
+    updated_date = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Updated Date')
+    )
+
+    class Meta:
+        verbose_name = _('Project Rollup')
+        verbose_name_plural = _('Project Rollups')
+
+    def __str__(self):
+        return f"Rollup for {self.project_id}"
+
+    @property
+    def completed_task_count(self):
+        return self.task_status_counts.get('COMPLETED', 0)
+
+    @property
+    def budget_used_percent(self):
+        budget = self.project.budget_amount
+        if not budget:
+            return None
+        return self.billable_amount / budget * 100
+
+
+class Invoice(BaseModel):
+    """
+    An invoice issued to a client for billable time entries. Generated by
+    ``services.generate_invoices``, which marks the invoiced entries BILLED.
+    """
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.PROTECT,
+        related_name='invoices',
+        verbose_name=_('Client')
+    )
+    number = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name=_('Invoice Number')
+    )
+    issue_date = models.DateField(
+        default=timezone.now,
+        verbose_name=_('Issue Date')
+    )
+    due_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Due Date')
+    )
+    period_end = models.DateField(
+        verbose_name=_('Period End'),
+        help_text=_('Last date of the time entries included on this invoice')
+    )
+    hours = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Hours')
+    )
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name=_('Total Amount')
+    )
+
+    class Meta:
+        verbose_name = _('Invoice')
+        verbose_name_plural = _('Invoices')
+        ordering = ['-issue_date', '-number']
+
+    def __str__(self):
+        return f"{self.number} - {self.client}"
+
+
+class InvoiceLine(models.Model):
+    """
+    A single invoiced time entry, with the rate and amount frozen at the
+    time the invoice was generated.
+    """
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.CASCADE,
+        related_name='lines',
+        verbose_name=_('Invoice')
+    )
+    time_entry = models.OneToOneField(
+        TimeEntry,
+        on_delete=models.PROTECT,
+        # Time entries are partitioned by date (see apps.project.partitions),
+        # so the database cannot enforce a key to their id alone
+        db_constraint=False,
+        related_name='invoice_line',
+        verbose_name=_('Time Entry')
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.PROTECT,
+        related_name='invoice_lines',
+        verbose_name=_('Project')
+    )
+    date = models.DateField(
+        verbose_name=_('Date')
+    )
+    description = models.TextField(
+        blank=True,
+        verbose_name=_('Description')
+    )
+    hours = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        verbose_name=_('Hours')
+    )
+    rate = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name=_('Rate')
+    )
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name=_('Amount')
+    )
+
+    class Meta:
+        verbose_name = _('Invoice Line')
+        verbose_name_plural = _('Invoice Lines')
+        ordering = ['invoice', 'date', 'id']
+
+    def __str__(self):
+        return f"{self.invoice.number} - {self.date} - {self.hours}h"
+
+
+# Archive tables (see apps.project.archive). Each has the columns of its hot
+# table, so that rows move between the two with INSERT ... SELECT; they are
+# read-only copies and leave out the validators and help texts.
+
+class ArchivedProjectMember(BaseModel):
+    """A ``ProjectMember`` of an archived project."""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.PROTECT,
+        related_name='archived_memberships',
+        verbose_name=_('Project')
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='+', verbose_name=_('Team Member')
+    )
+    role = models.ForeignKey('core.LookupValue', on_delete=models.PROTECT, related_name='+', verbose_name=_('Role'))
+    join_date = models.DateField(verbose_name=_('Join Date'))
+    end_date = models.DateField(null=True, blank=True, verbose_name=_('End Date'))
+    billing_rate = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name=_('Billing Rate')
+    )
+
+    class Meta:
+        verbose_name = _('Archived Project Member')
+        verbose_name_plural = _('Archived Project Members')
+        unique_together = [('project', 'user')]
+        ordering = ['project', 'user']
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.role.name} on {self.project.code}"
+
+
+class ArchivedTask(BaseModel):
+    """A ``Task`` of an archived project."""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.PROTECT,
+        related_name='archived_tasks',
+        verbose_name=_('Project')
+    )
+    parent_task = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subtasks',
+        verbose_name=_('Parent Task')
+    )
+    title = models.CharField(max_length=200, verbose_name=_('Title'))
+    description = models.TextField(blank=True, verbose_name=_('Description'))
+    status = models.ForeignKey('core.LookupValue', on_delete=models.PROTECT, related_name='+', verbose_name=_('Status'))
+    priority = models.ForeignKey(
+        'core.LookupValue', on_delete=models.PROTECT, related_name='+', verbose_name=_('Priority')
+    )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        verbose_name=_('Assigned To')
+    )
+    due_date = models.DateField(null=True, blank=True, verbose_name=_('Due Date'))
+    estimated_hours = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, verbose_name=_('Estimated Hours')
+    )
+    duration_days = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Duration (days)'))
+    actual_hours = models.DecimalField(
+        max_digits=8, decimal_places=2, default=Decimal('0.00'), verbose_name=_('Actual Hours')
+    )
+    billable = models.BooleanField(default=True, verbose_name=_('Billable'))
+    billing_rate = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name=_('Billing Rate')
+    )
+    tree_path = ArrayField(models.UUIDField(), default=list, editable=False, verbose_name=_('Tree Path'))
+    early_start = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Early Start'))
+    early_finish = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Early Finish'))
+    late_start = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Late Start'))
+    late_finish = models.DateField(null=True, blank=True, editable=False, verbose_name=_('Late Finish'))
+    total_slack = models.IntegerField(null=True, blank=True, editable=False, verbose_name=_('Total Slack'))
+
+    class Meta:
+        verbose_name = _('Archived Task')
+        verbose_name_plural = _('Archived Tasks')
+        ordering = ['project', 'due_date', 'priority']
+
+    def __str__(self):
+        return f"{self.project.code} - {self.title}"
+
+
+class ArchivedTimeEntry(BaseModel):
+    """A ``TimeEntry`` of an archived project. Not partitioned."""
+    task = models.ForeignKey(
+        ArchivedTask,
+        on_delete=models.PROTECT,
+        related_name='time_entries',
+        verbose_name=_('Task')
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='+', verbose_name=_('User')
+    )
+    date = models.DateField(verbose_name=_('Date'))
+    hours = models.DecimalField(max_digits=6, decimal_places=2, verbose_name=_('Hours'))
+    description = models.TextField(verbose_name=_('Description'))
+    billable = models.BooleanField(default=True, verbose_name=_('Billable'))
+    billing_rate = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name=_('Billing Rate')
+    )
+    billing_status = models.ForeignKey(
+        'core.LookupValue', on_delete=models.PROTECT, related_name='+', verbose_name=_('Billing Status')
+    )
+
+    class Meta:
+        verbose_name = _('Archived Time Entry')
+        verbose_name_plural = _('Archived Time Entries')
+        ordering = ['-date', '-created_date']
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.task.project.code} - {self.date}"
+
+
+class ArchivedTaskDependency(BaseModel):
+    """A ``TaskDependency`` of an archived project."""
+    predecessor = models.ForeignKey(
+        ArchivedTask, on_delete=models.PROTECT, related_name='successor_links', verbose_name=_('Predecessor')
+    )
+    successor = models.ForeignKey(
+        ArchivedTask, on_delete=models.PROTECT, related_name='predecessor_links', verbose_name=_('Successor')
+    )
+    type = models.ForeignKey('core.LookupValue', on_delete=models.PROTECT, related_name='+', verbose_name=_('Type'))
+    lag_days = models.IntegerField(default=0, verbose_name=_('Lag (days)'))
+
+    class Meta:
+        verbose_name = _('Archived Task Dependency')
+        verbose_name_plural = _('Archived Task Dependencies')
+        ordering = ['successor', 'predecessor']
+
+    def __str__(self):
+        return f"{self.predecessor.title} → {self.successor.title} ({self.type.code})"
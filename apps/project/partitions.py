@@ -0,0 +1,252 @@
+"""
+Monthly range partitions of the time entry table.
+
+``project_timeentry`` is partitioned by RANGE on ``date`` (migration 0012):
+one partition per calendar month (``project_timeentry_y2026m10``) between
+two catch-alls, ``project_timeentry_before`` and ``project_timeentry_after``,
+which take any date outside the monthly range so that no entry is ever
+rejected. Both are normally empty: ``ensure_partitions`` moves their rows
+into the months it creates.
+
+PostgreSQL skips the partitions a query cannot match given its date bounds,
+and reads the partitions of an ``ORDER BY date DESC LIMIT n`` query newest
+first, stopping once it has its rows. Each month is vacuumed, analyzed and
+indexed on its own, so maintenance work stays proportional to a month of
+entries however large the table grows; ``detach_partitions`` takes whole
+months out of the table without a DELETE.
+
+What partitioning changes:
+
+* the primary key is ``(id, date)``. Django still addresses rows by id, and
+  a lookup by id probes each partition's primary key index;
+* a foreign key to a time entry cannot be enforced by the database, so
+  ``InvoiceLine.time_entry`` has ``db_constraint=False``;
+* CREATE INDEX CONCURRENTLY is not available on a partitioned table: add
+  TimeEntry indexes with a plain ``AddIndex`` outside busy hours.
+"""
+import json
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+TABLE = 'project_timeentry'
+BEFORE = f'{TABLE}_before'
+AFTER = f'{TABLE}_after'
+
+# start/end are None for the open ends of the catch-alls
+Partition = namedtuple('Partition', ['name', 'start', 'end'])
+
+_BOUND = re.compile(r"FROM \((?P<start>[^)]*)\) TO \((?P<end>[^)]*)\)")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def _bound(value):
+    value = value.strip()
+    return None if value in ('MINVALUE', 'MAXVALUE') else date.fromisoformat(value.strip("'"))
+
+
+def _literal(value, open_end):
+    return open_end if value is None else f"'{value.isoformat()}'"
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [TABLE])
+        return cursor.fetchone()[0] == 'p'
+
+
+def list_partitions(using=DEFAULT_DB_ALIAS):
+    """The partitions of the time entry table, oldest first."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound)
+        partitions.append(Partition(name, _bound(match['start']), _bound(match['end'])))
+    return sorted(partitions, key=lambda partition: (partition.start is not None, partition.start))
+
+
+def _monthly(partitions):
+    return [partition for partition in partitions if partition.name not in (BEFORE, AFTER)]
+
+
+def _reattach(cursor, catch_all, start, end):
+    """Attach the detached ``catch_all`` again for the range ``start``-``end``."""
+    cursor.execute(
+        f'ALTER TABLE {TABLE} ATTACH PARTITION {catch_all} '
+        f'FOR VALUES FROM ({_literal(start, "MINVALUE")}) TO ({_literal(end, "MAXVALUE")})'
+    )
+
+
+def _split(cursor, catch_all, months, start, end):
+    """
+    Create the partitions of ``months`` out of the range of ``catch_all``,
+    moving its rows for those months into them, and attach ``catch_all``
+    again for what is left (``start``-``end``).
+    """
+    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {catch_all}')
+    for month in months:
+        cursor.execute(
+            f'CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+    low, high = months[0], add_months(months[-1], 1)
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {catch_all} WHERE date >= %s AND date < %s', [low, high])
+    cursor.execute(f'DELETE FROM {catch_all} WHERE date >= %s AND date < %s', [low, high])
+    _reattach(cursor, catch_all, start, end)
+
+
+def ensure_partitions(first, last, lock_timeout=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Create the monthly partitions from the month of ``first`` through the
+    month of ``last`` that do not exist yet; returns their names. Months can
+    only be added next to the existing ones, taken from the catch-alls.
+    """
+    monthly = _monthly(list_partitions(using))
+    low, high = monthly[0].start, monthly[-1].end
+    before = []
+    month = month_start(first)
+    while month < low:
+        before.append(month)
+        month = add_months(month, 1)
+    after = []
+    month = high
+    while month <= month_start(last):
+        after.append(month)
+        month = add_months(month, 1)
+    if not before and not after:
+        return []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [f'{lock_timeout}ms'])
+        if before:
+            _split(cursor, BEFORE, before, None, before[0])
+        if after:
+            _split(cursor, AFTER, after, add_months(after[-1], 1), None)
+    return [partition_name(month) for month in before + after]
+
+
+def detach_partitions(before, drop=False, lock_timeout=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Detach the monthly partitions that end on or before ``before``, oldest
+    first, and drop them if ``drop``; returns their names. The entries in
+    them leave the application: totals already derived from them stay as
+    they are. Later entries dated in those months go to the ``before``
+    catch-all. The newest month is never detached.
+    """
+    monthly = _monthly(list_partitions(using))[:-1]
+    old = [partition for partition in monthly if partition.end <= before]
+    if not old:
+        return []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [f'{lock_timeout}ms'])
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {BEFORE}')
+        for partition in old:
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {partition.name}')
+            if drop:
+                cursor.execute(f'DROP TABLE {partition.name}')
+        _reattach(cursor, BEFORE, None, old[-1].end)
+    return [partition.name for partition in old]
+
+
+def partition_scans(queryset):
+    """
+    The partitions ``queryset`` reads when it runs: those left in its plan
+    after pruning, minus those the executor never started. Runs the query.
+    """
+    plan = json.loads(queryset.explain(format='json', analyze=True, timing=False))
+    scanned = set()
+
+    def walk(node):
+        name = node.get('Relation Name', '')
+        if name.startswith(f'{TABLE}_') and node.get('Actual Loops', 0) > 0:
+            scanned.add(name)
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return scanned
+
+
+def overlapping(partitions, first=None, last=None):
+    """Names of the ``partitions`` that can hold dates from ``first`` through ``last``."""
+    return {
+        partition.name for partition in partitions
+        if (first is None or partition.end is None or partition.end > first)
+        and (last is None or partition.start is None or partition.start <= last)
+    }
+
+
+def pruning_checks(today=None):
+    """
+    ``(name, queryset, first date, last date)`` for the time entry queries of
+    the dashboard, invoicing, exports and the timesheet. Each should read
+    only the partitions of its date window; for the dashboard's most recent
+    entries the window starts at the oldest row returned, if it returned as
+    many rows as it asked for.
+
+    Queries without a date bound, such as a project's recent entries (found
+    through the task index of every partition), cannot be pruned.
+    """
+    from .models import TimeEntry
+    from .selectors import _dashboard_querysets, filter_time_entries
+    from .services import unbilled_time_entries
+
+    today = today or timezone.localdate()
+    month = month_start(today)
+    month_end = add_months(month, 1) - timedelta(days=1)
+    week_start = today - timedelta(days=today.weekday())
+    checks = []
+    latest = TimeEntry.objects.order_by('-date').first()
+    if latest is not None:
+        recent = _dashboard_querysets(latest.user)['recent_time_entries']
+        dates = [entry.date for entry in recent]
+        # Short of rows, the query had to read every partition
+        first = min(dates) if len(dates) == recent.query.high_mark else None
+        checks.append(('dashboard recent entries', recent, first, None))
+    checks += [
+        ('invoicing unbilled entries', unbilled_time_entries(month_end).order_by(), None, month_end),
+        (
+            'export of the month',
+            filter_time_entries(TimeEntry.all_objects.all(), {'date_from': month.isoformat(), 'date_to': month_end.isoformat()}),
+            month, month_end,
+        ),
+        (
+            'timesheet week',
+            TimeEntry.objects.filter(date__in=[week_start + timedelta(days=n) for n in range(7)]),
+            week_start, week_start + timedelta(days=6),
+        ),
+    ]
+    return checks
+
+
+def check_pruning(today=None, using=DEFAULT_DB_ALIAS):
+    """
+    Run ``pruning_checks``; returns ``(name, partitions read, partitions
+    outside the window)`` for each.
+    """
+    partitions = list_partitions(using)
+    results = []
+    for name, queryset, first, last in pruning_checks(today):
+        scanned = partition_scans(queryset.using(using))
+        results.append((name, scanned, scanned - overlapping(partitions, first, last)))
+    return results
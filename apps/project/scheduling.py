@@ -0,0 +1,298 @@
+"""
+Critical path scheduling of project tasks.
+
+Every active task of a project takes ``duration`` days (``duration_days``,
+or its estimated hours over ``SCHEDULE_HOURS_PER_DAY``, at least a day) and
+is constrained by its active ``TaskDependency`` rows:
+
+* finish to start (FS): it starts ``lag_days`` after its predecessor ends;
+* start to start (SS): it starts ``lag_days`` after its predecessor starts;
+* finish to finish (FF): it ends ``lag_days`` after its predecessor ends.
+
+Days are calendar days counted from the project's start date (its creation
+date while it has none). The forward pass gives each task the earliest
+start the constraints allow, and the project ends with its last task. The
+backward pass gives each task the latest start that does not delay that
+end. ``total_slack`` is the difference; the tasks without slack form the
+critical path.
+
+The schedule is stored on the tasks and maintained incrementally.
+``reschedule()`` is told which tasks changed (their duration, their
+dependencies, or whether they are active) and:
+
+* walks downstream from them and from the first tasks of the project in
+  topological order, recomputing early starts, and stops wherever a task's
+  early dates come out unchanged;
+* walks upstream from them and from the last tasks of the project in the
+  same way for the late starts: these all depend on the project end, so
+  they are only recomputed everywhere when that end moves;
+* writes the tasks whose schedule changed with one UPDATE.
+
+The graph is read with two narrow queries, since the walks need the stored
+dates of the neighbours they stop at; the work and the writes are bounded
+by the affected subgraph. Receivers in signals.py reschedule after task
+and dependency changes, and ``schedule_projects`` recomputes whole projects.
+Dependencies may not close a cycle (``check_dependency``).
+"""
+import heapq
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from apps.core.lookups import lookups
+
+DEPENDENCY_TYPES = ('FS', 'SS', 'FF')
+# Task fields the schedule depends on
+SCHEDULE_INPUTS = ('duration_days', 'estimated_hours', 'project_id', 'is_active')
+DEPENDENCY_INPUTS = ('predecessor_id', 'successor_id', 'type_id', 'lag_days', 'is_active')
+
+
+def _reaches(source, target, exclude, using):
+    """Whether active dependencies other than ``exclude`` lead from task ``source`` to task ``target``."""
+    from .models import TaskDependency
+    table = TaskDependency._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'WITH RECURSIVE downstream(id) AS ('
+            f'SELECT %s::uuid UNION SELECT link.successor_id FROM {table} link '
+            f'JOIN downstream ON link.predecessor_id = downstream.id '
+            f'WHERE link.is_active AND link.id IS DISTINCT FROM %s) '
+            f'SELECT EXISTS (SELECT 1 FROM downstream WHERE id = %s)',
+            [source, exclude, target],
+        )
+        return cursor.fetchone()[0]
+
+
+def check_dependency(dependency, lock=False):
+    """
+    Raise ValidationError unless ``dependency`` links two tasks of the same
+    project without making a task depend on itself. With ``lock``, the
+    project row is locked first, so that concurrent links cannot close a
+    cycle between them.
+    """
+    from .models import Project
+    using = dependency._state.db or DEFAULT_DB_ALIAS
+    predecessor, successor = dependency.predecessor, dependency.successor
+    if predecessor.project_id != successor.project_id:
+        raise ValidationError({'successor': _('Dependent tasks must belong to the same project.')})
+    if lock:
+        Project.all_objects.using(using).select_for_update().filter(pk=successor.project_id).exists()
+    if predecessor.pk == successor.pk or _reaches(successor.pk, predecessor.pk, dependency.pk, using):
+        raise ValidationError({'predecessor': _('The dependency would make the task depend on itself.')})
+
+
+def _topological_order(nodes, successors):
+    """Position of every node in a topological order of the graph."""
+    indegree = dict.fromkeys(nodes, 0)
+    for links in successors.values():
+        for node, _kind, _lag in links:
+            indegree[node] += 1
+    ready = [node for node, count in indegree.items() if not count]
+    order = {}
+    while ready:
+        node = ready.pop()
+        order[node] = len(order)
+        for other, _kind, _lag in successors.get(node, ()):
+            indegree[other] -= 1
+            if not indegree[other]:
+                ready.append(other)
+    if len(order) != len(indegree):
+        raise ValidationError(_('The task dependencies of the project form a cycle.'))
+    return order
+
+
+def _walk(starts, seeds, order, neighbours, compute, values, upstream=False):
+    """
+    Recompute ``values`` from ``starts`` along ``neighbours``, in topological
+    order (reversed ``upstream``). A node whose value is unchanged stops the
+    walk, unless it is one of the ``seeds``. Returns the nodes that changed.
+    """
+    sign = -1 if upstream else 1
+    heap = [(sign * order[node], node) for node in starts]
+    heapq.heapify(heap)
+    queued, changed = set(starts), set()
+    while heap:
+        _, node = heapq.heappop(heap)
+        value = compute(node)
+        if value != values[node]:
+            values[node] = value
+            changed.add(node)
+        elif node not in seeds:
+            continue
+        for other, _kind, _lag in neighbours.get(node, ()):
+            if other not in queued:
+                queued.add(other)
+                heapq.heappush(heap, (sign * order[other], other))
+    return changed
+
+
+def _write(base, rows, using):
+    """
+    Store the schedule ``rows`` of (id, early start, early finish, late
+    start, late finish, slack), dates in days from ``base``.
+    """
+    from .models import Task
+    table = connections[using].ops.quote_name(Task._meta.db_table)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET early_start = %s::date + s.early_start, early_finish = %s::date + s.early_finish, '
+            f'late_start = %s::date + s.late_start, late_finish = %s::date + s.late_finish, '
+            f'total_slack = s.total_slack '
+            f'FROM unnest(%s::uuid[], %s::integer[], %s::integer[], %s::integer[], %s::integer[], %s::integer[]) '
+            f'AS s(id, early_start, early_finish, late_start, late_finish, total_slack) '
+            f'WHERE {table}.id = s.id',
+            [base] * 4 + [list(column) for column in zip(*rows)],
+        )
+        return cursor.rowcount
+
+
+def _load(project_id, base, using):
+    """
+    The active tasks of ``project_id`` and the dependencies between them,
+    keyed by task id: durations, stored early and late starts, and stored
+    schedules, all in days from ``base``. Ids are read as text and dates as
+    day numbers: building UUID and date objects for thousands of rows would
+    cost more than the schedule itself.
+    """
+    from .models import Task, TaskDependency
+    quote = connections[using].ops.quote_name
+    tasks, links = quote(Task._meta.db_table), quote(TaskDependency._meta.db_table)
+    durations, early, late, stored = {}, {}, {}, {}
+    predecessors, successors = {}, {}
+    kinds = {str(lookups.pk('DEPENDENCY_TYPE', code)): code for code in DEPENDENCY_TYPES}
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT id::text, '
+            f'coalesce(duration_days, greatest(ceil(estimated_hours / %s), 1)::integer, 1), '
+            f'early_start - %s, early_finish - %s, late_start - %s, late_finish - %s, total_slack '
+            f'FROM {tasks} WHERE project_id = %s AND is_active',
+            [settings.SCHEDULE_HOURS_PER_DAY, base, base, base, base, project_id],
+        )
+        for pk, days, *schedule in cursor.fetchall():
+            durations[pk] = days
+            early[pk] = schedule[0]
+            late[pk] = schedule[2]
+            stored[pk] = tuple(schedule)
+        cursor.execute(
+            f'SELECT link.predecessor_id::text, link.successor_id::text, link.type_id::text, link.lag_days '
+            f'FROM {links} link JOIN {tasks} task ON task.id = link.successor_id '
+            f'WHERE task.project_id = %s AND task.is_active AND link.is_active',
+            [project_id],
+        )
+        for predecessor, successor, type_id, lag in cursor.fetchall():
+            if predecessor in durations:
+                predecessors.setdefault(successor, []).append((predecessor, kinds[type_id], lag))
+                successors.setdefault(predecessor, []).append((successor, kinds[type_id], lag))
+    return durations, early, late, stored, predecessors, successors
+
+
+def reschedule(project_id, tasks=(), using=DEFAULT_DB_ALIAS):
+    """
+    Bring the schedule of ``project_id`` up to date after ``tasks`` changed,
+    or recompute all of it with ``tasks=None``; see the module docstring.
+    Returns the number of tasks whose schedule was written.
+    """
+    from .models import Project
+    with transaction.atomic(using=using, savepoint=False):
+        # Locking the project serializes concurrent reschedules and links
+        project = (
+            Project.all_objects.using(using).select_for_update()
+            .filter(pk=project_id).values_list('start_date', 'created_date').first()
+        )
+        if project is None:
+            return 0
+        base = project[0] or timezone.localdate(project[1])
+
+        durations, early, late, stored, predecessors, successors = _load(project_id, base, using)
+        order = _topological_order(durations, successors)
+        seeds = set(durations) if tasks is None else {str(pk) for pk in tasks if str(pk) in durations}
+        seeds |= {pk for pk, schedule in stored.items() if schedule[0] is None or schedule[2] is None}
+
+        def early_start(node):
+            start = 0
+            for other, kind, lag in predecessors.get(node, ()):
+                if kind == 'FS':
+                    start = max(start, early[other] + durations[other] + lag)
+                elif kind == 'SS':
+                    start = max(start, early[other] + lag)
+                else:
+                    start = max(start, early[other] + durations[other] + lag - durations[node])
+            return start
+
+        firsts = [pk for pk in durations if pk not in predecessors]
+        changed = _walk(seeds.union(firsts), seeds, order, successors, early_start, early)
+        end = max((early[pk] + durations[pk] for pk in durations), default=0)
+
+        def late_start(node):
+            finish = end
+            for other, kind, lag in successors.get(node, ()):
+                if kind == 'FS':
+                    finish = min(finish, late[other] - lag)
+                elif kind == 'SS':
+                    finish = min(finish, late[other] - lag + durations[node])
+                else:
+                    finish = min(finish, late[other] + durations[other] - lag)
+            return finish - durations[node]
+
+        lasts = [pk for pk in durations if pk not in successors]
+        changed |= _walk(seeds.union(lasts), seeds, order, predecessors, late_start, late, upstream=True)
+
+        # Finishes are the last day of a task, or its start for a milestone
+        updates = []
+        for pk in changed | seeds:
+            last_day = max(durations[pk] - 1, 0)
+            schedule = (early[pk], early[pk] + last_day, late[pk], late[pk] + last_day, late[pk] - early[pk])
+            if schedule != stored[pk]:
+                updates.append((pk, *schedule))
+        return _write(base, updates, using) if updates else 0
+
+
+def task_changed(task, deleted=False, using=DEFAULT_DB_ALIAS):
+    """Reschedule after ``task`` was saved, or deleted for real, if that changes the schedule."""
+    if not deleted and not task.has_changed(*SCHEDULE_INPUTS):
+        return
+    previous = task.get_loaded_value('project_id', task.project_id)
+    for project_id in {task.project_id, previous}:
+        reschedule(project_id, [task.pk], using=using)
+
+
+def dependency_changed(dependency, deleted=False, using=DEFAULT_DB_ALIAS):
+    """Reschedule after ``dependency`` was saved, or deleted for real, if that changes the schedule."""
+    from .models import Task
+    if not deleted and not dependency.has_changed(*DEPENDENCY_INPUTS):
+        return
+    task_ids = {
+        dependency.predecessor_id, dependency.successor_id,
+        dependency.get_loaded_value('predecessor_id', dependency.predecessor_id),
+        dependency.get_loaded_value('successor_id', dependency.successor_id),
+    }
+    _reschedule_tasks(Task.all_objects.using(using).filter(pk__in=task_ids), using)
+
+
+def apply_soft_delete(model, pks, using=DEFAULT_DB_ALIAS):
+    """Reschedule after tasks or dependencies ``pks`` were soft deleted or restored in bulk."""
+    from .models import Task, TaskDependency
+    if model is Task:
+        links = TaskDependency.all_objects.filter(Q(predecessor_id__in=pks) | Q(successor_id__in=pks))
+        task_ids = set(pks)
+    elif model is TaskDependency:
+        links = TaskDependency.all_objects.filter(pk__in=pks)
+        task_ids = set()
+    else:
+        return
+    for predecessor, successor in links.using(using).values_list('predecessor_id', 'successor_id'):
+        task_ids.update((predecessor, successor))
+    _reschedule_tasks(Task.all_objects.using(using).filter(pk__in=task_ids), using)
+
+
+def _reschedule_tasks(tasks, using):
+    by_project = {}
+    for pk, project_id in tasks.values_list('pk', 'project_id'):
+        by_project.setdefault(project_id, []).append(pk)
+    for project_id, task_ids in by_project.items():
+        reschedule(project_id, task_ids, using=using)
+
@@ -1,6 +1,387 @@
-"""
-Complex database queries and data retrieval logic.
-Similar to services.py but focused on data selection.
-"""
-
-# Create your selectors here
+"""
+Complex database queries and data retrieval logic.
+Similar to services.py but focused on data selection.
+"""
+import asyncio
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import (
+    BooleanField, Count, DecimalField, ExpressionWrapper, F, Func, IntegerField, Max, OuterRef, Prefetch, Q, Subquery,
+    Sum, Value
+)
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.dateparse import parse_date
+
+from apps.core.lookups import lookups
+from .constants import OPEN_PROJECT_STATUSES, OPEN_TASK_STATUSES
+from .models import (
+    CLIENT_SEARCH_VECTOR, PROJECT_SEARCH_VECTOR, SEARCH_CONFIG, TASK_SEARCH_VECTOR, TIME_ENTRY_SEARCH_VECTOR,
+    ArchivedProjectMember, ArchivedTask, ArchivedTimeEntry, Client, Project, ProjectMember, Task, TaskDependency,
+    TimeEntry,
+)
+
+HOURS_FIELD = DecimalField(max_digits=12, decimal_places=2)
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+def subquery_aggregate(queryset, group_by, aggregate, output_field):
+    """
+    Wrap an aggregate over ``queryset`` in a correlated subquery.
+
+    ``queryset`` must already be filtered against an ``OuterRef`` and
+    ``group_by`` must name the field it is correlated on. Missing groups
+    yield zero instead of NULL.
+    """
+    subquery = (
+        queryset.order_by()
+        .values(group_by)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(
+        Subquery(subquery, output_field=output_field),
+        Value(0, output_field=output_field),
+        output_field=output_field,
+    )
+
+
+def project_progress(queryset=None):
+    """
+    Annotate projects with task progress, logged hours and budget burn.
+
+    Each project row gets:
+        task_count / completed_task_count: active tasks and those completed
+        logged_hours: hours from active time entries
+        budget_spent: billable hours at the project (or client) rate
+
+    Aggregates are correlated subqueries, so a page of N projects costs one
+    query regardless of N and the paginator's COUNT does not compute them.
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+
+    tasks = Task.objects.filter(project=OuterRef('pk'), is_active=True)
+    entries = TimeEntry.objects.filter(task__project=OuterRef('pk'), is_active=True)
+    completed_id = lookups.pk('TASK_STATUS', 'COMPLETED')
+
+    return queryset.select_related(
+        'client', 'status', 'priority', 'manager'
+    ).annotate(
+        task_count=subquery_aggregate(tasks, 'project', Count('pk'), IntegerField()),
+        completed_task_count=subquery_aggregate(
+            tasks.filter(status_id=completed_id), 'project', Count('pk'), IntegerField()
+        ),
+        logged_hours=subquery_aggregate(entries, 'task__project', Sum('hours'), HOURS_FIELD),
+    ).annotate(
+        budget_spent=ExpressionWrapper(
+            subquery_aggregate(
+                entries.filter(billable=True), 'task__project', Sum('hours'), HOURS_FIELD
+            ) * Coalesce('billing_rate', 'client__default_billing_rate', Value(Decimal('0.00'))),
+            output_field=AMOUNT_FIELD,
+        ),
+    )
+
+
+def filter_projects(queryset, params):
+    """
+    Apply the project list filters from query parameters.
+
+    Supports ``search`` (full-text over name, code and description, or the
+    client's name and code), ``status`` (status code) and ``client`` (id).
+    """
+    search = params.get('search', '')
+    status = params.get('status', '')
+    client = params.get('client', '')
+
+    if search:
+        queryset = search_filter(queryset, search, PROJECT_SEARCH_VECTOR, client=(Client, CLIENT_SEARCH_VECTOR))
+    if status:
+        queryset = queryset.filter(status_id=lookups.pk('PROJECT_STATUS', status))
+    if client:
+        queryset = queryset.filter(client_id=client)
+    return queryset
+
+
+def filter_tasks(queryset, params, user):
+    """
+    Apply the task list filters from query parameters.
+
+    Supports ``search`` (full-text over title and description, or the
+    project's name, code and description), ``status``
+    (status code), ``project`` (id) and ``assigned`` (user id, or ``me``).
+    """
+    search = params.get('search', '')
+    status = params.get('status', '')
+    project = params.get('project', '')
+    assigned = params.get('assigned', '')
+
+    if search:
+        queryset = search_filter(queryset, search, TASK_SEARCH_VECTOR, project=(Project, PROJECT_SEARCH_VECTOR))
+    if status:
+        queryset = queryset.filter(status_id=lookups.pk('TASK_STATUS', status))
+    if project:
+        queryset = queryset.filter(project_id=project)
+    if assigned == 'me':
+        queryset = queryset.filter(assigned_to=user)
+    elif assigned:
+        queryset = queryset.filter(assigned_to_id=assigned)
+    return queryset.filter(is_active=True)
+
+
+def filter_time_entries(queryset, params):
+    """
+    Apply the time entry filters of ``TimeEntryAdmin.list_filter`` from
+    query parameters: ``date_from``/``date_to`` (ISO dates), ``user`` (id),
+    ``project`` (id), ``billable`` and ``is_active`` (``1``/``0``) and
+    ``billing_status`` (status code), and ``search`` over descriptions.
+    Only active entries are included
+    unless ``is_active`` is ``0`` or ``all``.
+    """
+    if params.get('search'):
+        queryset = search_filter(queryset, params['search'], TIME_ENTRY_SEARCH_VECTOR)
+    date_from = parse_date(params.get('date_from') or '')
+    date_to = parse_date(params.get('date_to') or '')
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if params.get('user'):
+        queryset = queryset.filter(user_id=params['user'])
+    if params.get('project'):
+        queryset = queryset.filter(task__project_id=params['project'])
+    if params.get('billable') in ('0', '1'):
+        queryset = queryset.filter(billable=params['billable'] == '1')
+    if params.get('billing_status'):
+        queryset = queryset.filter(billing_status_id=lookups.pk('BILLING_STATUS', params['billing_status']))
+    is_active = params.get('is_active') or '1'
+    if is_active in ('0', '1'):
+        queryset = queryset.filter(is_active=is_active == '1')
+    return queryset
+
+
+class AnyOf(Func):
+    """
+    ``expression = ANY(ARRAY(subquery))``. PostgreSQL checks ``IN
+    (subquery)`` row by row when it is OR-ed with other conditions; the
+    array is computed once, so the condition can use an index and be
+    combined with the others in a BitmapOr.
+    """
+    template = '%(expressions)s)'
+    arg_joiner = ' = ANY('
+    output_field = BooleanField()
+
+    def __init__(self, expression, queryset):
+        super().__init__(expression, ArraySubquery(queryset))
+
+
+def _search_query(query):
+    return SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def search_filter(queryset, query, vector, **related):
+    """
+    Narrow ``queryset`` to the rows whose search document ``vector`` matches
+    ``query`` (web search syntax), or whose foreign key named in ``related``
+    points to a matching row: ``project=(Project, PROJECT_SEARCH_VECTOR)``.
+    The documents are the expressions the GIN indexes are built on, so every
+    part of the condition is answered from an index.
+    """
+    search_query = _search_query(query)
+    condition = Q(document=search_query)
+    for field, (model, related_vector) in related.items():
+        matching = model.objects.alias(document=related_vector).filter(document=search_query).order_by()
+        condition |= AnyOf(F(f'{field}_id'), matching.values('pk'))
+    return queryset.alias(document=vector).filter(condition)
+
+
+def search(query, user, limit=10):
+    """
+    Ranked full-text search over active clients, projects, tasks and time
+    entries (only ``user``'s own unless they are staff).
+
+    ``query`` uses web search syntax ("quoted phrases", or, -excluded).
+    Each result list holds at most ``limit`` objects ordered by rank, with
+    the rank in ``rank``. Filtering on the same vector expressions the GIN
+    indexes are built on lets each of the queries use its index.
+    """
+    search_query = _search_query(query)
+    time_entries = TimeEntry.objects.all() if user.is_staff else TimeEntry.objects.filter(user=user)
+
+    def ranked(queryset, vector):
+        return list(
+            queryset.alias(document=vector)
+            .filter(is_active=True, document=search_query)
+            .annotate(rank=SearchRank(vector, search_query))
+            .order_by('-rank', 'pk')[:limit]
+        )
+
+    return {
+        'clients': ranked(Client.objects.all(), CLIENT_SEARCH_VECTOR),
+        'projects': ranked(
+            Project.objects.select_related('client', 'status'), PROJECT_SEARCH_VECTOR
+        ),
+        'tasks': ranked(
+            Task.objects.select_related('project', 'status', 'assigned_to'), TASK_SEARCH_VECTOR
+        ),
+        'time_entries': ranked(
+            time_entries.select_related('task', 'task__project', 'user'), TIME_ENTRY_SEARCH_VECTOR
+        ),
+    }
+
+
+def _dashboard_querysets(user):
+    return {
+        'active_projects': Project.objects.filter(
+            is_active=True,
+            status_id__in=lookups.pks('PROJECT_STATUS', OPEN_PROJECT_STATUSES)
+        ),
+        'my_tasks': Task.objects.filter(
+            is_active=True,
+            assigned_to=user,
+            status_id__in=lookups.pks('TASK_STATUS', OPEN_TASK_STATUSES)
+        ),
+        'recent_time_entries': (
+            TimeEntry.objects.filter(user=user)
+            .select_related('task', 'task__project')
+            .order_by('-date')[:5]
+        ),
+        'unbilled_hours': TimeEntry.objects.filter(
+            user=user,
+            billable=True,
+            billing_status_id=lookups.pk('BILLING_STATUS', 'UNBILLED')
+        ),
+    }
+
+
+def dashboard_summary(user):
+    """Counts and recent activity shown on a user's dashboard."""
+    querysets = _dashboard_querysets(user)
+    return {
+        'active_projects': querysets['active_projects'].count(),
+        'my_tasks': querysets['my_tasks'].count(),
+        'recent_time_entries': list(querysets['recent_time_entries']),
+        'unbilled_hours': querysets['unbilled_hours'].aggregate(total=Sum('hours'))['total'] or 0,
+    }
+
+
+async def adashboard_summary(user):
+    """Async ``dashboard_summary``; the four queries are awaited together."""
+    # Lookup pks may need loading, which is synchronous database work
+    querysets = await sync_to_async(_dashboard_querysets)(user)
+    active_projects, my_tasks, recent_time_entries, unbilled = await asyncio.gather(
+        querysets['active_projects'].acount(),
+        querysets['my_tasks'].acount(),
+        _alist(querysets['recent_time_entries']),
+        querysets['unbilled_hours'].aaggregate(total=Sum('hours')),
+    )
+    return {
+        'active_projects': active_projects,
+        'my_tasks': my_tasks,
+        'recent_time_entries': recent_time_entries,
+        'unbilled_hours': unbilled['total'] or 0,
+    }
+
+
+def with_subtask_counts(queryset):
+    """Annotate tasks with ``subtask_count`` and ``completed_subtask_count`` (active subtasks)."""
+    completed_id = lookups.pk('TASK_STATUS', 'COMPLETED')
+    active_subtasks = Q(subtasks__is_active=True)
+    return queryset.annotate(
+        subtask_count=Count('subtasks', filter=active_subtasks),
+        completed_subtask_count=Count(
+            'subtasks', filter=active_subtasks & Q(subtasks__status_id=completed_id)
+        ),
+    )
+
+
+def project_detail(project_id, archived=False):
+    """
+    Querysets behind the project detail page, keyed by context name; from
+    the archive tables if the project is ``archived``.
+
+    ``tasks`` is every active task of the project, for the page to lay out
+    as the work breakdown with ``tasktree.flatten``: one query whatever the
+    depth of the tree.
+    """
+    members, tasks, entries = (
+        (ArchivedProjectMember, ArchivedTask, ArchivedTimeEntry) if archived
+        else (ProjectMember, Task, TimeEntry)
+    )
+    return {
+        'team_members': members.objects.filter(
+            project_id=project_id, end_date__isnull=True
+        ).select_related('user', 'role'),
+        'tasks': tasks.objects.filter(
+            project_id=project_id
+        ).select_related('status', 'priority', 'assigned_to'),
+        'recent_time_entries': entries.objects.filter(
+            task__project_id=project_id
+        ).select_related('user', 'task').order_by('-date')[:5],
+    }
+
+
+def project_schedule(project_id):
+    """
+    Active tasks of a project in schedule order (see ``scheduling``), with
+    their active ``predecessor_links``, for the schedule page.
+    """
+    links = TaskDependency.objects.filter(predecessor__is_active=True).select_related('predecessor', 'type')
+    return Task.objects.filter(project_id=project_id).select_related('status', 'assigned_to').prefetch_related(
+        Prefetch('predecessor_links', queryset=links)
+    ).order_by(F('early_start').asc(nulls_last=True), 'late_start', 'title')
+
+
+# Last-modified times for conditional GETs. Each is a single indexed lookup
+# covering everything the corresponding page shows. Writes to a project's
+# tasks, members and time entries all touch its rollup row (see
+# services._increment_rollup), so the rollup's updated_date stands in for
+# them. None means the object does not exist.
+
+def project_last_modified(project_id):
+    return Project.objects.filter(pk=project_id).values_list(
+        Greatest('updated_date', 'rollup__updated_date', 'client__updated_date'), flat=True
+    ).first()
+
+
+def task_last_modified(task_id):
+    return Task.objects.filter(pk=task_id).values_list(
+        Greatest('updated_date', 'project__updated_date', 'project__rollup__updated_date'), flat=True
+    ).first()
+
+
+def client_last_modified(client_id):
+    return Client.objects.filter(pk=client_id).values_list(
+        Greatest('updated_date', Max('projects__updated_date'), Max('projects__rollup__updated_date')),
+        flat=True,
+    ).first()
+
+
+def time_entry_last_modified(queryset):
+    """
+    When the time entry in ``queryset`` last changed, counting the rows its
+    rate is resolved from (see ``billing``): its task, the task assignee's
+    project membership, the project and the client.
+    """
+    member = ProjectMember.all_objects.filter(
+        project_id=OuterRef('task__project_id'), user_id=OuterRef('task__assigned_to_id')
+    ).order_by('-updated_date').values('updated_date')[:1]
+    return queryset.values_list(
+        Greatest(
+            'updated_date', 'task__updated_date', Subquery(member),
+            'task__project__updated_date', 'task__project__client__updated_date',
+        ),
+        flat=True,
+    ).first()
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def aevaluate(querysets):
+    """Evaluate a dict of querysets concurrently into a dict of lists."""
+    results = await asyncio.gather(*(_alist(queryset) for queryset in querysets.values()))
+    return dict(zip(querysets, results))
@@ -1,6 +1,669 @@
-"""
-Business logic and service layer functionality.
-Keep your views thin by moving complex logic here.
-"""
-
-# Create your services here
+"""
+Business logic and service layer functionality.
+Keep your views thin by moving complex logic here.
+"""
+import itertools
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import (
+    BigIntegerField, Case, Count, DecimalField, F, Func, IntegerField, Max, OuterRef, Q, Sum, Value, When
+)
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce, Substr
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from apps.core.lookups import lookups
+from .billing import RateResolver, effective_rate, with_billing_amounts
+from .cache import invalidate_all_dashboards, invalidate_dashboards
+from .constants import OPEN_TASK_STATUSES
+from .models import Client, Invoice, InvoiceLine, Project, ProjectMember, ProjectRollup, Task, TimeEntry
+from .selectors import subquery_aggregate
+
+ZERO = Decimal('0.00')
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+# Task hours
+
+def apply_time_entry_hours(entry, deleted=False):
+    """
+    Keep ``Task.actual_hours`` in step with a saved or deleted time entry.
+
+    Covers creation, hour edits, moves between tasks, soft deletes and
+    restores. Each affected task gets one ``actual_hours = actual_hours + x``
+    UPDATE, so concurrent entries on the same task never lose hours.
+    """
+    deltas = {}
+    if not entry.is_new and entry.get_loaded_value('is_active'):
+        task_id = entry.get_loaded_value('task_id')
+        deltas[task_id] = deltas.get(task_id, ZERO) - entry.get_loaded_value('hours')
+    if not deleted and entry.is_active:
+        deltas[entry.task_id] = deltas.get(entry.task_id, ZERO) + entry.hours
+
+    for task_id, delta in sorted(deltas.items(), key=lambda item: str(item[0])):
+        if delta:
+            Task.all_objects.filter(pk=task_id).update(actual_hours=F('actual_hours') + delta)
+
+
+def recalculate_task_hours(task_ids=None, batch_size=1000):
+    """
+    Reset ``Task.actual_hours`` to the sum of active time entry hours.
+
+    Works through tasks in primary key batches, rewriting only tasks whose
+    stored total has drifted. Returns the number of tasks corrected.
+    """
+    logged = subquery_aggregate(
+        TimeEntry.objects.filter(task=OuterRef('pk'), is_active=True),
+        'task', Sum('hours'), Task._meta.get_field('actual_hours'),
+    )
+    tasks = Task.all_objects.order_by('pk').values_list('pk', flat=True)
+    if task_ids is not None:
+        tasks = tasks.filter(pk__in=task_ids)
+
+    corrected = 0
+    batch = []
+    for task_id in tasks.iterator(chunk_size=batch_size):
+        batch.append(task_id)
+        if len(batch) >= batch_size:
+            corrected += _recalculate_batch(batch, logged)
+            batch = []
+    if batch:
+        corrected += _recalculate_batch(batch, logged)
+    return corrected
+
+
+def _recalculate_batch(task_ids, logged):
+    drifted = list(
+        Task.all_objects.filter(pk__in=task_ids)
+        .annotate(logged=logged)
+        .exclude(actual_hours=F('logged'))
+        .values_list('pk', flat=True)
+    )
+    if not drifted:
+        return 0
+    return Task.all_objects.filter(pk__in=drifted).update(actual_hours=logged)
+
+
+# Timesheets
+
+MAX_HOURS_PER_DAY = Decimal('24.00')
+
+
+def submit_time_entries(user, entries):
+    """
+    Validate and create a batch of time entries for ``user`` in one pass.
+
+    ``entries`` is a sequence of dicts with ``task_id``, ``date``, ``hours``,
+    ``description`` and optionally ``billable``. Tasks are fetched in one
+    query, existing daily totals in one aggregate and member rates in one
+    query; entries are inserted with ``bulk_create`` and task hours and
+    project rollups are adjusted with one UPDATE per table and project.
+
+    Entries can only go on open tasks assigned to ``user``, as in the
+    timesheet grid. Raises ValidationError keyed by entry index (as a
+    string) when any entry is invalid; nothing is written in that case.
+    Returns the created entries.
+    """
+    tasks = Task.objects.filter(
+        pk__in={entry['task_id'] for entry in entries},
+        assigned_to=user,
+        status_id__in=lookups.pks('TASK_STATUS', OPEN_TASK_STATUSES),
+    ).select_related('project__client').order_by().in_bulk()
+    dates = {entry['date'] for entry in entries}
+    daily_hours = dict(
+        TimeEntry.objects.filter(user=user, date__in=dates, is_active=True)
+        .order_by()
+        .values('date')
+        .annotate(total=Sum('hours'))
+        .values_list('date', 'total')
+    )
+
+    errors = {}
+    for index, entry in enumerate(entries):
+        entry_errors = []
+        hours = entry['hours']
+        if entry['task_id'] not in tasks:
+            entry_errors.append(_('Select an open task assigned to you.'))
+        if hours <= 0:
+            entry_errors.append(_('Hours must be greater than 0'))
+        elif hours > MAX_HOURS_PER_DAY:
+            entry_errors.append(_('Hours cannot exceed 24'))
+        if not entry.get('description', '').strip():
+            entry_errors.append(_('A description is required.'))
+        daily_hours[entry['date']] = daily_hours.get(entry['date'], ZERO) + hours
+        if daily_hours[entry['date']] > MAX_HOURS_PER_DAY:
+            entry_errors.append(
+                _('More than 24 hours would be logged on %(date)s.') % {'date': entry['date']}
+            )
+        if entry_errors:
+            errors[str(index)] = entry_errors
+    if errors:
+        raise ValidationError(errors)
+
+    unbilled = lookups.get('BILLING_STATUS', 'UNBILLED')
+    non_billable = lookups.get('BILLING_STATUS', 'NON_BILLABLE')
+    time_entries = []
+    for entry in entries:
+        task = tasks[entry['task_id']]
+        billable = entry.get('billable', task.billable)
+        time_entries.append(TimeEntry(
+            task=task,
+            user=user,
+            date=entry['date'],
+            hours=entry['hours'],
+            description=entry['description'],
+            billable=billable,
+            billing_status=unbilled if billable else non_billable,
+            created_by=user,
+            updated_by=user,
+        ))
+
+    with transaction.atomic():
+        created = TimeEntry.objects.bulk_create(time_entries)
+        _apply_bulk_task_hours(created)
+        _apply_bulk_rollups(created, RateResolver.for_tasks(tasks.values()))
+        invalidate_dashboards(user.pk)
+    return created
+
+
+def _apply_bulk_task_hours(entries):
+    """Add the hours of new entries to their tasks with a single UPDATE."""
+    deltas = {}
+    for entry in entries:
+        deltas[entry.task_id] = deltas.get(entry.task_id, ZERO) + entry.hours
+    if not deltas:
+        return
+    Task.all_objects.filter(pk__in=deltas).update(
+        actual_hours=F('actual_hours') + Case(
+            *[When(pk=task_id, then=Value(delta)) for task_id, delta in deltas.items()],
+            output_field=Task._meta.get_field('actual_hours'),
+        )
+    )
+
+
+def _apply_bulk_rollups(entries, resolver):
+    """Add the totals of new entries to their project rollups, one UPDATE per project."""
+    deltas = {}
+    for entry in entries:
+        state = _time_entry_state(entry)
+        state['rate'] = state['billing_rate'] or resolver.task_rate(entry.task)
+        totals = _time_entry_totals(state)
+        if totals is None:
+            continue
+        project_deltas = deltas.setdefault(entry.task.project_id, {})
+        for field, value in totals.items():
+            project_deltas[field] = project_deltas.get(field, ZERO) + value
+    for project_id, project_deltas in deltas.items():
+        _increment_rollup(project_id, **project_deltas)
+
+
+# Project rollups
+
+def _time_entry_totals(entry):
+    """Contribution of a single time entry to its project's rollup."""
+    if not entry['is_active']:
+        return None
+    hours = entry['hours']
+    billable_hours = hours if entry['billable'] else ZERO
+    billable_amount = billable_hours * (entry['rate'] or ZERO)
+    unbilled = entry['billing_status_id'] == lookups.pk('BILLING_STATUS', 'UNBILLED')
+    return {
+        'hours': hours,
+        'billable_hours': billable_hours,
+        'billable_amount': billable_amount,
+        'unbilled_amount': billable_amount if unbilled else ZERO,
+    }
+
+
+def _time_entry_state(entry, loaded=False):
+    """Rollup-relevant values of a time entry, either current or as loaded."""
+    fields = ('task_id', 'hours', 'billable', 'billing_rate', 'billing_status_id', 'is_active')
+    if loaded:
+        return {field: entry.get_loaded_value(field) for field in fields}
+    return {field: getattr(entry, field) for field in fields}
+
+
+def _resolve_entry_rate(state, tasks, resolver):
+    if state['billing_rate']:
+        return state['billing_rate']
+    task = tasks.get(state['task_id'])
+    return resolver.task_rate(task) if task else None
+
+
+def _increment_rollup(project_id, hours=ZERO, billable_hours=ZERO, billable_amount=ZERO,
+                      unbilled_amount=ZERO, task_count=0, status_deltas=None, create=True):
+    """
+    Apply deltas to a project's rollup row with a single UPDATE.
+
+    A missing row is created first unless ``create`` is False, which is used
+    while deleting so a cascading project delete does not resurrect it.
+    Without deltas the row is only touched: its ``updated_date`` doubles as
+    the version of everything shown on the project's pages (see
+    ``selectors.project_last_modified``).
+    """
+    updates = {'updated_date': timezone.now()}
+    for field, delta in (
+        ('hours', hours),
+        ('billable_hours', billable_hours),
+        ('billable_amount', billable_amount),
+        ('unbilled_amount', unbilled_amount),
+        ('task_count', task_count),
+    ):
+        if delta:
+            updates[field] = F(field) + delta
+    status_deltas = {code: delta for code, delta in (status_deltas or {}).items() if delta}
+    if status_deltas:
+        counts = F('task_status_counts')
+        for code, delta in status_deltas.items():
+            counts = _jsonb_increment(counts, code, delta)
+        updates['task_status_counts'] = counts
+    if len(updates) == 1:
+        touch_project_rollups([project_id])
+        return
+
+    if not ProjectRollup.objects.filter(project_id=project_id).update(**updates) and create:
+        ProjectRollup.objects.get_or_create(project_id=project_id)
+        ProjectRollup.objects.filter(project_id=project_id).update(**updates)
+
+
+def touch_project_rollups(project_ids):
+    """Mark the projects' pages as changed without altering their totals."""
+    ProjectRollup.objects.filter(project_id__in=project_ids).update(updated_date=timezone.now())
+
+
+def _jsonb_increment(expression, key, delta):
+    """Expression adding ``delta`` to the integer stored under ``key`` in a JSON object."""
+    current = Coalesce(
+        Cast(KeyTextTransform(key, 'task_status_counts'), IntegerField()), Value(0)
+    )
+    path = '{"%s"}' % key.replace('\\', '\\\\').replace('"', '\\"')
+    return Func(
+        expression,
+        Value(path),
+        Func(current + delta, function='to_jsonb'),
+        function='jsonb_set',
+        output_field=ProjectRollup._meta.get_field('task_status_counts'),
+    )
+
+
+def apply_time_entry_change(entry, deleted=False):
+    """
+    Move a saved or deleted time entry's contribution between project rollups.
+
+    The previous contribution is computed from the values the entry was
+    loaded with and subtracted; the new one is added. Rates are resolved at
+    the time of the change, so later rate edits are picked up by rebuilding.
+    """
+    old = None if entry.is_new else _time_entry_state(entry, loaded=True)
+    new = None if deleted else _time_entry_state(entry)
+
+    task_ids = {state['task_id'] for state in (old, new) if state and state['task_id']}
+    tasks = Task.all_objects.select_related('project__client').in_bulk(task_ids)
+    resolver = RateResolver.for_tasks(tasks.values())
+
+    deltas = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None or state['task_id'] not in tasks:
+            continue
+        # Every project the entry was or is on is touched, even without deltas
+        project_deltas = deltas.setdefault(tasks[state['task_id']].project_id, {})
+        state['rate'] = _resolve_entry_rate(state, tasks, resolver)
+        totals = _time_entry_totals(state)
+        if totals is None:
+            continue
+        for field, value in totals.items():
+            project_deltas[field] = project_deltas.get(field, ZERO) + sign * value
+
+    for project_id, project_deltas in deltas.items():
+        _increment_rollup(project_id, create=not deleted, **project_deltas)
+
+
+def apply_task_change(task, deleted=False):
+    """
+    Update task counts on the project rollup after a task is saved or deleted.
+
+    Changes that move hours or amounts between projects or rates (project,
+    billing rate or assignee edits) rebuild the affected rollups instead.
+    """
+    if not task.is_new and task.has_changed('project_id', 'billing_rate', 'assigned_to_id'):
+        rebuild_project_rollups({task.project_id, task.get_loaded_value('project_id')})
+        return
+
+    old_status = task.get_loaded_value('status_id')
+    if task.is_new or not task.get_loaded_value('is_active'):
+        old_status = None
+    new_status = task.status_id if task.is_active and not deleted else None
+    if old_status == new_status:
+        touch_project_rollups([task.project_id])
+        return
+
+    status_deltas = {}
+    task_count = 0
+    for status_id, sign in ((old_status, -1), (new_status, 1)):
+        if status_id is None:
+            continue
+        status = lookups.by_pk(status_id)
+        code = status.code if status else str(status_id)
+        status_deltas[code] = status_deltas.get(code, 0) + sign
+        task_count += sign
+    _increment_rollup(
+        task.project_id, task_count=task_count, status_deltas=status_deltas, create=not deleted
+    )
+
+
+def rebuild_project_rollups(project_ids=None, batch_size=500):
+    """
+    Recompute rollups from the source tables with set-based aggregates.
+
+    Projects are processed in batches of ``batch_size``; each batch costs
+    three queries plus one upsert regardless of the number of entries.
+    Archived projects keep the rollup they had when they were archived (see
+    ``apps.project.archive``). Returns the number of rollup rows written.
+    """
+    projects = Project.all_objects.filter(archived_date=None).order_by('pk').values_list('pk', flat=True)
+    if project_ids is not None:
+        projects = projects.filter(pk__in=[pk for pk in project_ids if pk])
+
+    written = 0
+    batch = []
+    for project_id in projects.iterator(chunk_size=batch_size):
+        batch.append(project_id)
+        if len(batch) >= batch_size:
+            written += _rebuild_batch(batch)
+            batch = []
+    if batch:
+        written += _rebuild_batch(batch)
+    return written
+
+
+def _rebuild_batch(project_ids):
+    unbilled_id = lookups.pk('BILLING_STATUS', 'UNBILLED')
+    billable = Q(billable=True)
+    entries = (
+        TimeEntry.objects.filter(task__project_id__in=project_ids, is_active=True)
+        .annotate(rate=effective_rate())
+        .annotate(amount=F('hours') * Coalesce(F('rate'), Value(ZERO)))
+        .order_by()
+        .values('task__project_id')
+        .annotate(
+            total_hours=Sum('hours'),
+            total_billable_hours=Sum('hours', filter=billable),
+            total_billable_amount=Sum('amount', filter=billable, output_field=AMOUNT_FIELD),
+            total_unbilled_amount=Sum(
+                'amount',
+                filter=billable & Q(billing_status_id=unbilled_id),
+                output_field=AMOUNT_FIELD,
+            ),
+        )
+    )
+    entry_totals = {row['task__project_id']: row for row in entries}
+
+    status_counts = {}
+    tasks = (
+        Task.objects.filter(project_id__in=project_ids, is_active=True)
+        .order_by()
+        .values('project_id', 'status_id')
+        .annotate(count=Count('pk'))
+    )
+    for row in tasks:
+        status = lookups.by_pk(row['status_id'])
+        code = status.code if status else str(row['status_id'])
+        status_counts.setdefault(row['project_id'], {})[code] = row['count']
+
+    now = timezone.now()
+    rollups = []
+    for project_id in project_ids:
+        totals = entry_totals.get(project_id, {})
+        counts = status_counts.get(project_id, {})
+        rollups.append(ProjectRollup(
+            project_id=project_id,
+            hours=totals.get('total_hours') or ZERO,
+            billable_hours=totals.get('total_billable_hours') or ZERO,
+            billable_amount=totals.get('total_billable_amount') or ZERO,
+            unbilled_amount=totals.get('total_unbilled_amount') or ZERO,
+            task_count=sum(counts.values()),
+            task_status_counts=counts,
+            updated_date=now,
+        ))
+    ProjectRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=[
+            'hours', 'billable_hours', 'billable_amount', 'unbilled_amount',
+            'task_count', 'task_status_counts', 'updated_date',
+        ],
+    )
+    return len(rollups)
+
+
+def rebuild_client_rollups(client):
+    """Rebuild the rollups of every project of a client."""
+    rebuild_project_rollups(Project.all_objects.filter(client=client).values_list('pk', flat=True))
+
+
+def apply_soft_delete(model, pks):
+    """
+    Bring task hours, rollups and dashboards up to date after rows of
+    ``model`` were soft deleted or restored, together with the rows
+    cascading from them (see ``apps.core.softdelete``).
+
+    A single time entry, member, or task without time entries changes
+    nothing else, so its contribution is moved like a save would; other
+    deletes rebuild the affected tasks and rollups.
+    """
+    if len(pks) == 1 and _apply_single_soft_delete(model, pks[0]):
+        return
+    task_ids = None
+    if model is Project:
+        project_ids = list(pks)
+        task_ids = Task.all_objects.filter(project_id__in=pks).values('pk')
+    elif model is Task:
+        task_ids = pks
+        project_ids = Task.all_objects.filter(pk__in=pks).values_list('project_id', flat=True).distinct()
+    elif model is TimeEntry:
+        rows = set(TimeEntry.all_objects.filter(pk__in=pks).values_list('task_id', 'task__project_id'))
+        task_ids = {task_id for task_id, _ in rows}
+        project_ids = {project_id for _, project_id in rows}
+    elif model is ProjectMember:
+        project_ids = ProjectMember.all_objects.filter(pk__in=pks).values_list('project_id', flat=True).distinct()
+    else:
+        return
+    if task_ids is not None:
+        recalculate_task_hours(task_ids)
+    rebuild_project_rollups(list(project_ids))
+    invalidate_all_dashboards()
+
+
+def _apply_single_soft_delete(model, pk):
+    """
+    Apply the soft delete or restore of a single row as deltas; returns
+    False when the row cascaded to rows that need a rebuild.
+    """
+    if model is TimeEntry:
+        entry = TimeEntry.all_objects.select_related('task__project__client').get(pk=pk)
+        sign = 1 if entry.is_active else -1
+        state = dict(_time_entry_state(entry), is_active=True)
+        state['rate'] = _resolve_entry_rate(state, {entry.task_id: entry.task}, RateResolver.for_tasks([entry.task]))
+        Task.all_objects.filter(pk=entry.task_id).update(actual_hours=F('actual_hours') + sign * entry.hours)
+        totals = _time_entry_totals(state)
+        _increment_rollup(
+            entry.task.project_id, create=entry.is_active,
+            **{field: sign * value for field, value in totals.items()},
+        )
+        invalidate_dashboards(entry.user_id)
+    elif model is Task:
+        # Its time entries went with it and move hours and amounts
+        if TimeEntry.all_objects.filter(task_id=pk).exists():
+            return False
+        task = Task.all_objects.get(pk=pk)
+        status = lookups.by_pk(task.status_id)
+        sign = 1 if task.is_active else -1
+        _increment_rollup(
+            task.project_id, task_count=sign, create=task.is_active,
+            status_deltas={status.code if status else str(task.status_id): sign},
+        )
+        invalidate_dashboards(task.assigned_to_id)
+    elif model is ProjectMember:
+        member = ProjectMember.all_objects.get(pk=pk)
+        # A member's own rate prices their entries; without it nothing moves
+        if member.billing_rate is not None:
+            rebuild_project_rollups([member.project_id])
+        else:
+            touch_project_rollups([member.project_id])
+        invalidate_dashboards(member.user_id)
+    else:
+        return False
+    return True
+
+
+# Invoicing
+
+def unbilled_time_entries(period_end, clients=None):
+    """Active, billable, UNBILLED time entries dated on or before ``period_end``."""
+    queryset = TimeEntry.objects.filter(
+        is_active=True,
+        billable=True,
+        date__lte=period_end,
+        billing_status_id=lookups.pk('BILLING_STATUS', 'UNBILLED'),
+    )
+    if clients is not None:
+        queryset = queryset.filter(task__project__client__in=clients)
+    return queryset
+
+
+def preview_invoices(period_end, clients=None):
+    """Per-client entry counts, hours and amounts that would be invoiced, in one query."""
+    return (
+        with_billing_amounts(unbilled_time_entries(period_end, clients))
+        .order_by('task__project__client__code')
+        .values('task__project__client__code')
+        .annotate(entries=Count('pk'), hours=Sum('hours'), amount=Sum('billing_amount'))
+    )
+
+
+def generate_invoices(period_end, clients=None, issue_date=None, user=None, chunk_size=2000):
+    """
+    Invoice every client with unbilled time up to ``period_end``.
+
+    Each client's invoice is created in its own transaction, so a failure
+    leaves earlier invoices in place. Returns the created invoices.
+    """
+    client_ids = (
+        unbilled_time_entries(period_end, clients)
+        .order_by()
+        .values('task__project__client_id')
+        .distinct()
+    )
+    return [
+        create_invoice(client, period_end, issue_date=issue_date, user=user, chunk_size=chunk_size)
+        for client in Client.all_objects.filter(pk__in=client_ids).order_by('code')
+    ]
+
+
+def create_invoice(client, period_end, issue_date=None, user=None, chunk_size=2000):
+    """
+    Invoice a client's unbilled time entries up to ``period_end``.
+
+    Entries are streamed from a server-side cursor with their rates resolved
+    in SQL, written as invoice lines in chunks and flipped to BILLED with one
+    UPDATE per chunk and rate, which also freezes the rate on the entry.
+    Bulk updates skip the model signals, so project rollups are adjusted
+    here. Raises ValidationError, and writes nothing, if another process
+    bills any of the entries first.
+    """
+    issue_date = issue_date or timezone.localdate()
+    with transaction.atomic():
+        invoice = Invoice.objects.create(
+            client=client,
+            number=_next_invoice_number(issue_date),
+            issue_date=issue_date,
+            due_date=_invoice_due_date(client.payment_terms, issue_date),
+            period_end=period_end,
+            created_by=user,
+            updated_by=user,
+        )
+        rows = (
+            with_billing_amounts(unbilled_time_entries(period_end, [client]))
+            .order_by('date', 'pk')
+            .values_list(
+                'pk', 'task__project_id', 'date', 'description', 'hours',
+                'effective_rate', 'billing_amount',
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+        project_amounts = {}
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            lines = [
+                InvoiceLine(
+                    invoice=invoice,
+                    time_entry_id=entry_id,
+                    project_id=project_id,
+                    date=entry_date,
+                    description=description,
+                    hours=hours,
+                    rate=rate,
+                    amount=amount,
+                )
+                for entry_id, project_id, entry_date, description, hours, rate, amount in chunk
+            ]
+            _mark_billed(lines, user)
+            InvoiceLine.objects.bulk_create(lines)
+            for line in lines:
+                invoice.hours += line.hours
+                invoice.total_amount += line.amount
+                project_amounts[line.project_id] = project_amounts.get(line.project_id, ZERO) + line.amount
+
+        for project_id, amount in sorted(project_amounts.items(), key=lambda item: str(item[0])):
+            _increment_rollup(project_id, unbilled_amount=-amount, create=False)
+        invoice.save(update_fields=['hours', 'total_amount', 'updated_date'])
+        # Unbilled hours of everyone who logged time on this invoice changed
+        invalidate_all_dashboards()
+    return invoice
+
+
+def _mark_billed(lines, user):
+    unbilled_id = lookups.pk('BILLING_STATUS', 'UNBILLED')
+    billed_id = lookups.pk('BILLING_STATUS', 'BILLED')
+    by_rate = {}
+    for line in lines:
+        by_rate.setdefault(line.rate, []).append(line.time_entry_id)
+    now = timezone.now()
+    for rate, entry_ids in by_rate.items():
+        updated = TimeEntry.all_objects.filter(
+            pk__in=entry_ids, billing_status_id=unbilled_id
+        ).update(billing_status_id=billed_id, billing_rate=rate, updated_by=user, updated_date=now)
+        if updated != len(entry_ids):
+            raise ValidationError(_('Some time entries were billed by another process; no invoice was created.'))
+
+
+def _next_invoice_number(issue_date):
+    """
+    The next number of the issue date's year. Must run inside the invoice's
+    transaction: the per-year advisory lock held until it ends keeps
+    concurrent runs from taking the same number.
+    """
+    prefix = f'INV-{issue_date.year}-'
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [prefix])
+    # Sequences outgrow their zero padding, so compare them as numbers
+    last = Invoice.all_objects.filter(number__regex=rf'^{prefix}[0-9]+$').aggregate(
+        last=Max(Cast(Substr('number', len(prefix) + 1), BigIntegerField()))
+    )['last']
+    return f'{prefix}{(last or 0) + 1:05d}'
+
+
+def _invoice_due_date(payment_terms, issue_date):
+    """Due date from payment terms such as "Net 30" or "Due on Receipt"."""
+    terms = (payment_terms or '').lower()
+    match = re.search(r'net\s*(\d+)', terms)
+    if match:
+        return issue_date + timedelta(days=int(match.group(1)))
+    if 'receipt' in terms:
+        return issue_date
+    return None
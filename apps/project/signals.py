@@ -0,0 +1,103 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.purge import post_purge
+from apps.core.softdelete import post_restore, post_soft_delete
+from . import cache, scheduling, services, tasktree
+from .models import Client, Project, ProjectMember, ProjectRollup, Task, TaskDependency, TimeEntry
+
+
+@receiver(post_save, sender=TimeEntry)
+def time_entry_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        services.apply_time_entry_hours(instance)
+        services.apply_time_entry_change(instance)
+        cache.invalidate_dashboards(instance.user_id, instance.get_loaded_value('user_id'))
+
+
+@receiver(post_delete, sender=TimeEntry)
+def time_entry_deleted(sender, instance, **kwargs):
+    services.apply_time_entry_hours(instance, deleted=True)
+    services.apply_time_entry_change(instance, deleted=True)
+    cache.invalidate_dashboards(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        services.apply_task_change(instance)
+        cache.invalidate_dashboards(instance.assigned_to_id, instance.get_loaded_value('assigned_to_id'))
+        scheduling.task_changed(instance, using=using)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, using, **kwargs):
+    services.apply_task_change(instance, deleted=True)
+    cache.invalidate_dashboards(instance.assigned_to_id)
+    tasktree.detach_subtrees(Task, [instance.pk], using=using)
+    scheduling.task_changed(instance, deleted=True, using=using)
+
+
+@receiver(post_purge, sender=Task)
+def tasks_purged(sender, pks, using, **kwargs):
+    tasktree.detach_subtrees(Task, pks, using=using)
+
+
+@receiver(post_save, sender=TaskDependency)
+def task_dependency_saved(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        scheduling.dependency_changed(instance, using=using)
+
+
+@receiver(post_delete, sender=TaskDependency)
+def task_dependency_deleted(sender, instance, using, **kwargs):
+    scheduling.dependency_changed(instance, deleted=True, using=using)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, using, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.has_changed('status_id', 'is_active'):
+        cache.invalidate_all_dashboards()
+    if created:
+        ProjectRollup.objects.get_or_create(project=instance)
+    elif instance.has_changed('billing_rate', 'client_id'):
+        services.rebuild_project_rollups([instance.pk])
+    if not created and instance.has_changed('start_date'):
+        scheduling.reschedule(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    cache.invalidate_all_dashboards()
+
+
+@receiver(post_save, sender=Client)
+def client_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created and instance.has_changed('default_billing_rate'):
+        services.rebuild_client_rollups(instance)
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def project_member_changed(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    if signal is post_delete:
+        # A member's own rate priced their entries; without it they fall back
+        if instance.billing_rate is not None:
+            services.rebuild_project_rollups([instance.project_id])
+        else:
+            services.touch_project_rollups([instance.project_id])
+    elif instance.has_changed('billing_rate', 'user_id', 'project_id'):
+        services.rebuild_project_rollups({instance.project_id, instance.get_loaded_value('project_id')})
+    else:
+        services.touch_project_rollups([instance.project_id])
+
+
+@receiver(post_soft_delete)
+@receiver(post_restore)
+def rows_soft_deleted_or_restored(sender, pks, using, **kwargs):
+    services.apply_soft_delete(sender, pks)
+    scheduling.apply_soft_delete(sender, pks, using=using)
@@ -0,0 +1,145 @@
+"""
+Materialized paths of the task hierarchy.
+
+Every task stores in ``tree_path`` the ids of its ancestors and its own,
+root first, so a whole subtree is one indexed query (the GIN index on
+``tree_path`` answers ``tree_path @> ARRAY[id]``) however deep it is, and
+a task's depth is the length of its path minus one.
+
+Paths are maintained by the application:
+
+* ``Task.save()`` sets the path of a new task from its parent's, and
+  rewrites the paths of a moved task's whole subtree with one UPDATE
+  (``move_subtree``);
+* a real delete or a purge leaves the subtasks without a parent
+  (``parent_task`` is SET_NULL), and ``detach_subtrees`` cuts the deleted
+  tasks out of their descendants' paths (see ``signals.py``);
+* soft deletes change nothing: inactive tasks keep their place, and
+  queries filter them out as usual;
+* writers that bypass ``save()`` (``bulk_create``, COPY, raw SQL) must
+  set ``tree_path`` themselves, as seed_benchmark_data does.
+
+``flatten`` turns the rows of one subtree query into the work breakdown:
+depth-first, with hours and completion rolled up from each task's subtree.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.translation import gettext as _
+
+ZERO = Decimal('0.00')
+
+
+def _cycle_error():
+    return ValidationError({'parent_task': _('A task cannot be moved under itself or one of its subtasks.')})
+
+
+def check_parent(task, parent):
+    """Raise ValidationError if ``parent`` is ``task`` or one of its descendants."""
+    if parent is not None and (parent.pk == task.pk or task.pk in parent.tree_path):
+        raise _cycle_error()
+
+
+def path_for(task):
+    """
+    The ``tree_path`` of ``task`` under its current ``parent_task_id``.
+    Locks the parent row, so that concurrent moves cannot build a cycle.
+    """
+    if task.parent_task_id is None:
+        return [task.pk]
+    parent_path = (
+        type(task).all_objects.using(task._state.db or DEFAULT_DB_ALIAS).select_for_update()
+        .filter(pk=task.parent_task_id).values_list('tree_path', flat=True).get()
+    )
+    if task.pk in parent_path:
+        raise _cycle_error()
+    return list(parent_path) + [task.pk]
+
+
+def move_subtree(task, path, using=None):
+    """Give ``task`` the ``path`` and rebase the paths of its descendants onto it."""
+    table = type(task)._meta.db_table
+    with connections[using or task._state.db or DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET tree_path = %s::uuid[] || tree_path[array_position(tree_path, %s) + 1:] '
+            f'WHERE tree_path @> ARRAY[%s]::uuid[]',
+            [path, task.pk, task.pk],
+        )
+        return cursor.rowcount
+
+
+def detach_subtrees(model, pks, using=DEFAULT_DB_ALIAS):
+    """
+    Cut the deleted tasks ``pks`` out of the paths of their descendants:
+    each keeps the part of its path below the deepest deleted ancestor.
+    """
+    table = model._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET tree_path = tree_path['
+            f'(SELECT max(array_position(tree_path, deleted)) FROM unnest(%s::uuid[]) AS deleted) + 1:] '
+            f'WHERE tree_path && %s::uuid[]',
+            [list(pks), list(pks)],
+        )
+        return cursor.rowcount
+
+
+def subtree(task, queryset=None):
+    """``task`` and all of its descendants, from ``queryset`` (default: active tasks of its model)."""
+    queryset = type(task).objects.all() if queryset is None else queryset
+    return queryset.filter(tree_path__contains=[task.pk])
+
+
+def flatten(tasks):
+    """
+    The ``tasks`` of one or more subtrees, with their ``status`` loaded,
+    depth-first, siblings in the order given. A task whose parent is not
+    among ``tasks`` (say, it was soft deleted) hangs under its nearest
+    ancestor that is, or starts a tree of its own. Each task gets:
+
+    * ``depth``: levels below the top of its tree in ``tasks``;
+    * ``children``: its child tasks;
+    * ``subtree_estimated_hours`` and ``subtree_actual_hours``: its own
+      hours plus those of its descendants;
+    * ``subtask_count`` and ``completed_subtask_count``: its descendants,
+      and how many of them are completed, for ``completion`` (a percentage;
+      a task without subtasks is 100 when completed, else 0).
+    """
+    tasks = list(tasks)
+    by_id = {task.pk: task for task in tasks}
+    roots = []
+    for task in tasks:
+        task.children = []
+    for task in tasks:
+        parent = by_id.get(task.parent_task_id)
+        if parent is None:
+            parent = next((by_id[pk] for pk in reversed(task.tree_path[:-1]) if pk in by_id), None)
+        (parent.children if parent is not None else roots).append(task)
+
+    ordered = []
+    # Iterative depth-first walk; children are rolled up on the way back
+    stack = [(root, 0, False) for root in reversed(roots)]
+    while stack:
+        task, depth, visited = stack.pop()
+        if not visited:
+            task.depth = depth
+            ordered.append(task)
+            stack.append((task, depth, True))
+            stack.extend((child, depth + 1, False) for child in reversed(task.children))
+            continue
+        task.subtree_estimated_hours = (task.estimated_hours or ZERO) + sum(
+            (child.subtree_estimated_hours for child in task.children), ZERO
+        )
+        task.subtree_actual_hours = (task.actual_hours or ZERO) + sum(
+            (child.subtree_actual_hours for child in task.children), ZERO
+        )
+        task.subtask_count = sum(child.subtask_count + 1 for child in task.children)
+        task.completed_subtask_count = sum(
+            child.completed_subtask_count + (child.status.code == 'COMPLETED') for child in task.children
+        )
+        if task.subtask_count:
+            task.completion = round(100 * task.completed_subtask_count / task.subtask_count)
+        else:
+            task.completion = 100 if task.status.code == 'COMPLETED' else 0
+    return ordered
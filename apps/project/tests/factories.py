@@ -1,12 +1,81 @@
-"""Model factories for testing."""
-
-from factory.django import DjangoModelFactory
-from factory import Faker
-
-# Create your factories here
-# Example:
-# class YourModelFactory(DjangoModelFactory):
-#     name = Faker('name')
-#
-#     class Meta:
-#         model = YourModel
+"""Model factories for testing."""
+import itertools
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from apps.core.lookups import lookups
+from apps.project import models
+
+_sequence = itertools.count(1)
+
+
+def lookup(category_code, value_code):
+    return lookups.get(category_code, value_code)
+
+
+def make_user(**kwargs):
+    n = next(_sequence)
+    kwargs.setdefault('username', f'user{n}')
+    kwargs.setdefault('email', f'user{n}@example.com')
+    kwargs.setdefault('first_name', 'Test')
+    kwargs.setdefault('last_name', f'User {n}')
+    password = kwargs.pop('password', 'password')
+    user = get_user_model()(**kwargs)
+    user.set_password(password)
+    user.save()
+    return user
+
+
+def make_client(**kwargs):
+    n = next(_sequence)
+    kwargs.setdefault('name', f'Client {n}')
+    kwargs.setdefault('code', f'CL{n}')
+    return models.Client.objects.create(**kwargs)
+
+
+def make_project(**kwargs):
+    n = next(_sequence)
+    kwargs.setdefault('name', f'Project {n}')
+    kwargs.setdefault('code', f'PR{n}')
+    if 'client' not in kwargs:
+        kwargs['client'] = make_client()
+    if 'manager' not in kwargs:
+        kwargs['manager'] = make_user()
+    kwargs.setdefault('status', lookup('PROJECT_STATUS', 'ACTIVE'))
+    kwargs.setdefault('priority', lookup('PRIORITY', 'MEDIUM'))
+    return models.Project.objects.create(**kwargs)
+
+
+def make_member(project, user, **kwargs):
+    kwargs.setdefault('role', lookup('PROJECT_ROLE', 'DEV'))
+    return models.ProjectMember.objects.create(project=project, user=user, **kwargs)
+
+
+def make_task(**kwargs):
+    n = next(_sequence)
+    kwargs.setdefault('title', f'Task {n}')
+    if 'project' not in kwargs:
+        kwargs['project'] = make_project()
+    kwargs.setdefault('status', lookup('TASK_STATUS', 'TODO'))
+    kwargs.setdefault('priority', lookup('PRIORITY', 'MEDIUM'))
+    return models.Task.objects.create(**kwargs)
+
+
+def make_dependency(predecessor, successor, type='FS', **kwargs):
+    return models.TaskDependency.objects.create(
+        predecessor=predecessor, successor=successor, type=lookup('DEPENDENCY_TYPE', type), **kwargs
+    )
+
+
+def make_time_entry(**kwargs):
+    if 'task' not in kwargs:
+        kwargs['task'] = make_task()
+    if 'user' not in kwargs:
+        kwargs['user'] = make_user()
+    kwargs.setdefault('date', date.today())
+    kwargs.setdefault('hours', Decimal('1.00'))
+    kwargs.setdefault('description', 'Work')
+    kwargs.setdefault('billing_status', lookup('BILLING_STATUS', 'UNBILLED'))
+    return models.TimeEntry.objects.create(**kwargs)
@@ -1,4 +1,182 @@
-from django.test import TestCase
-from rest_framework.test import APIClient
-
-# Create your API tests here
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.lookups import lookups
+from apps.project.models import ProjectRollup, TimeEntry
+from .factories import lookup, make_member, make_project, make_task, make_time_entry, make_user
+
+# Create your API tests here
+
+
+class TimesheetApiTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.project = make_project(billing_rate=Decimal('50.00'))
+        self.tasks = [make_task(project=self.project, assigned_to=self.user) for _ in range(3)]
+        self.url = reverse('project:api:timesheet')
+
+    def week(self, hours=Decimal('2.00')):
+        return [
+            {'task_id': str(task.pk), 'date': date(2026, 10, 12 + day).isoformat(),
+             'hours': str(hours), 'description': 'Work'}
+            for task in self.tasks for day in range(5)
+        ]
+
+    def test_submits_a_week_in_constant_queries(self):
+        # Tasks, daily totals, insert, task hours, member rates, one rollup
+        # update, plus the savepoint pair of the test transaction
+        with self.assertNumQueries(8):
+            response = self.client.post(self.url, {'entries': self.week()}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data['entries']), 15)
+        for task in self.tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.actual_hours, Decimal('10.00'))
+        rollup = ProjectRollup.objects.get(project=self.project)
+        self.assertEqual(rollup.hours, Decimal('30.00'))
+        self.assertEqual(rollup.unbilled_amount, Decimal('1500.00'))
+
+    def test_invalid_entries_reject_the_whole_batch(self):
+        entries = self.week(hours=Decimal('9.00'))
+        response = self.client.post(self.url, {'entries': entries}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # The third task's entries push each day past 24 hours
+        self.assertEqual(sorted(response.data['entries'], key=int), [str(i) for i in range(10, 15)])
+        self.assertFalse(TimeEntry.objects.exists())
+
+    def test_only_open_tasks_assigned_to_the_user_are_accepted(self):
+        unassigned = make_task(project=self.project, assigned_to=make_user())
+        closed = make_task(project=self.project, assigned_to=self.user, status=lookup('TASK_STATUS', 'COMPLETED'))
+        entries = [
+            {'task_id': str(task.pk), 'date': '2026-10-12', 'hours': '1.00', 'description': 'Work'}
+            for task in (self.tasks[0], unassigned, closed)
+        ]
+        response = self.client.post(self.url, {'entries': entries}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['entries']), ['1', '2'])
+        self.assertFalse(TimeEntry.objects.exists())
+
+
+class ResourceApiTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user(is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.project = make_project(billing_rate=Decimal('80.00'))
+        make_member(self.project, self.user)
+        make_member(self.project, make_user())
+        self.task = make_task(project=self.project, assigned_to=self.user)
+
+    def test_fields_limit_the_columns_loaded(self):
+        url = reverse('project:api:project-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'code,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': str(self.project.pk), 'code': self.project.code, 'status': 'ACTIVE'}])
+        select = next(query['sql'] for query in queries if 'project_project' in query['sql'])
+        self.assertNotIn('"description"', select)
+
+    def test_includes_are_loaded_in_constant_queries(self):
+        for _ in range(3):
+            project = make_project()
+            make_member(project, make_user())
+        url = reverse('project:api:project-list')
+        # Projects joined to client and manager, plus one prefetch of members
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'include': 'client,manager,members'})
+        self.assertEqual(response.status_code, 200)
+        first = next(item for item in response.data['results'] if item['id'] == str(self.project.pk))
+        self.assertEqual(first['client']['code'], self.project.client.code)
+        self.assertEqual(len(first['members']), 2)
+
+    def test_unknown_include_is_rejected(self):
+        response = self.client.get(reverse('project:api:project-list'), {'include': 'invoices'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_time_entries_are_paged_by_date_and_id(self):
+        for day in range(1, 6):
+            for _ in range(2):
+                make_time_entry(task=self.task, user=self.user, date=date(2026, 10, day))
+        url = reverse('project:api:timeentry-list')
+        seen = []
+        response = self.client.get(url, {'page_size': 3, 'fields': 'date'})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            seen += [(item['date'], item['id']) for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [(item['date'], item['id']) for item in previous.data['results']],
+            seen[6:9],
+        )
+
+    def test_time_entries_include_billing_amounts_and_filters(self):
+        make_time_entry(task=self.task, user=self.user, date=date(2026, 10, 1), hours=Decimal('2.00'))
+        make_time_entry(task=self.task, user=self.user, date=date(2026, 9, 1))
+        url = reverse('project:api:timeentry-list')
+        response = self.client.get(url, {'date_from': '2026-10-01'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(Decimal(response.data['results'][0]['billing_amount']), Decimal('160.00'))
+
+    def test_non_staff_see_only_their_own_time_entries(self):
+        other = make_user()
+        make_time_entry(task=self.task, user=self.user)
+        mine = make_time_entry(task=self.task, user=other)
+        self.client.force_authenticate(other)
+        response = self.client.get(reverse('project:api:timeentry-list'))
+        self.assertEqual([item['id'] for item in response.data['results']], [str(mine.pk)])
+
+    def test_tasks_use_the_task_list_filters(self):
+        make_task(project=self.project)
+        response = self.client.get(reverse('project:api:task-list'), {'assigned': 'me'})
+        self.assertEqual([item['id'] for item in response.data['results']], [str(self.task.pk)])
+
+    def test_tasks_cannot_move_under_their_subtasks(self):
+        subtask = make_task(project=self.project, parent_task=self.task)
+        url = reverse('project:api:task-detail', args=[self.task.pk])
+        response = self.client.patch(url, {'parent_task': subtask.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent_task', response.data)
+
+    def test_task_dependencies_reschedule_and_reject_cycles(self):
+        url = reverse('project:api:taskdependency-list')
+        successor = make_task(project=self.project, duration_days=2)
+        response = self.client.post(url, {
+            'predecessor': self.task.pk, 'successor': successor.pk, 'type': 'FS', 'lag_days': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        successor.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertEqual((successor.early_start - self.task.early_start).days, 2)
+        self.assertEqual(successor.total_slack, 0)
+
+        response = self.client.post(url, {
+            'predecessor': successor.pk, 'successor': self.task.pk, 'type': 'SS',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('predecessor', response.data)
+
+    def test_creates_time_entry_for_current_user(self):
+        response = self.client.post(reverse('project:api:timeentry-list'), {
+            'task': self.task.pk, 'date': '2026-10-12', 'hours': '1.50', 'description': 'Review',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        entry = TimeEntry.objects.get(pk=response.data['id'])
+        self.assertEqual(entry.user, self.user)
+        self.assertEqual(entry.billing_status.code, 'UNBILLED')
+        self.assertEqual(entry.created_by, self.user)
@@ -1,3 +1,797 @@
-from django.test import TestCase
-
-# Create your model tests here
+from datetime import date, timedelta
+from io import StringIO
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.lookups import lookups
+from apps.core.pagination import KeysetPaginator
+from apps.project import archive, capacity, partitions, scheduling, tasktree
+from apps.project.billing import RateResolver, with_billing_amounts
+from apps.project.cache import GLOBAL_VERSION_KEY
+from apps.project.models import (
+    ArchivedProjectMember, ArchivedTask, ArchivedTaskDependency, ArchivedTimeEntry, Invoice, Project, ProjectMember,
+    ProjectRollup, Task, TaskDependency, TimeEntry,
+)
+from apps.project.services import (
+    generate_invoices, rebuild_project_rollups, recalculate_task_hours, unbilled_time_entries,
+)
+from .factories import (
+    lookup, make_client, make_dependency, make_member, make_project, make_task, make_time_entry, make_user,
+)
+
+# Create your model tests here
+
+
+class ProjectRollupTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.project = make_project(billing_rate=Decimal('100.00'))
+        self.task = make_task(project=self.project)
+
+    def rollup(self):
+        return ProjectRollup.objects.get(project=self.project)
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup()
+        rebuild_project_rollups([self.project.pk])
+        rebuilt = self.rollup()
+        for field in ('hours', 'billable_hours', 'billable_amount', 'unbilled_amount', 'task_count'):
+            self.assertEqual(getattr(incremental, field), getattr(rebuilt, field), field)
+        # Incremental updates may leave statuses at zero; rebuilds omit them
+        self.assertEqual(
+            {code: count for code, count in incremental.task_status_counts.items() if count},
+            rebuilt.task_status_counts,
+        )
+
+    def test_time_entries_update_rollup(self):
+        entry = make_time_entry(task=self.task, hours=Decimal('2.00'))
+        make_time_entry(task=self.task, hours=Decimal('1.00'), billable=False)
+        rollup = self.rollup()
+        self.assertEqual(rollup.hours, Decimal('3.00'))
+        self.assertEqual(rollup.billable_hours, Decimal('2.00'))
+        self.assertEqual(rollup.billable_amount, Decimal('200.00'))
+        self.assertEqual(rollup.unbilled_amount, Decimal('200.00'))
+
+        entry.hours = Decimal('4.00')
+        entry.billing_status = lookup('BILLING_STATUS', 'BILLED')
+        entry.save()
+        rollup = self.rollup()
+        self.assertEqual(rollup.hours, Decimal('5.00'))
+        self.assertEqual(rollup.billable_amount, Decimal('400.00'))
+        self.assertEqual(rollup.unbilled_amount, Decimal('0.00'))
+
+        entry.delete()
+        self.assertEqual(self.rollup().hours, Decimal('1.00'))
+        self.assertMatchesRebuild()
+
+    def test_moving_an_entry_between_projects(self):
+        other_task = make_task()
+        entry = make_time_entry(task=self.task, hours=Decimal('3.00'))
+        entry.task = other_task
+        entry.save()
+        self.assertEqual(self.rollup().hours, Decimal('0.00'))
+        self.assertEqual(ProjectRollup.objects.get(project=other_task.project).hours, Decimal('3.00'))
+
+    def test_task_status_counts(self):
+        make_task(project=self.project)
+        self.task.status = lookup('TASK_STATUS', 'COMPLETED')
+        self.task.save()
+        rollup = self.rollup()
+        self.assertEqual(rollup.task_count, 2)
+        self.assertEqual(rollup.task_status_counts, {'TODO': 1, 'COMPLETED': 1})
+        self.assertEqual(rollup.completed_task_count, 1)
+
+        self.task.delete()
+        self.assertEqual(self.rollup().task_status_counts, {'TODO': 1, 'COMPLETED': 0})
+        self.assertMatchesRebuild()
+        Task.all_objects.filter(pk=self.task.pk).restore()
+        self.assertEqual(self.rollup().task_status_counts, {'TODO': 1, 'COMPLETED': 1})
+        self.assertMatchesRebuild()
+
+    def test_single_soft_deletes_apply_deltas(self):
+        entry = make_time_entry(task=self.task, hours=Decimal('2.00'))
+        member = make_member(self.project, make_user())
+        cache.delete(GLOBAL_VERSION_KEY)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+            self.assertEqual(self.rollup().billable_amount, Decimal('0.00'))
+            self.assertEqual(Task.objects.get(pk=self.task.pk).actual_hours, Decimal('0.00'))
+            TimeEntry.all_objects.filter(pk=entry.pk).restore()
+            self.assertEqual(self.rollup().billable_amount, Decimal('200.00'))
+            self.assertEqual(Task.objects.get(pk=self.task.pk).actual_hours, Decimal('2.00'))
+            member.delete()
+        # Neither a rebuild nor a reset of every dashboard
+        self.assertFalse([query for query in queries if 'ON CONFLICT' in query['sql']])
+        self.assertIsNone(cache.get(GLOBAL_VERSION_KEY))
+        self.assertMatchesRebuild()
+
+        # The task's time entries go with it, so the task rebuilds
+        self.task.delete()
+        self.assertEqual(self.rollup().hours, Decimal('0.00'))
+        self.assertMatchesRebuild()
+
+    def test_rate_changes_rebuild_amounts(self):
+        user = make_user()
+        self.task.assigned_to = user
+        self.task.save()
+        make_time_entry(task=self.task, user=user, hours=Decimal('1.00'))
+        member = make_member(self.project, user, billing_rate=Decimal('150.00'))
+        self.assertEqual(self.rollup().billable_amount, Decimal('150.00'))
+        member.billing_rate = Decimal('120.00')
+        member.save()
+        self.assertEqual(self.rollup().billable_amount, Decimal('120.00'))
+        self.assertMatchesRebuild()
+        member.force_delete()
+        self.assertEqual(self.rollup().billable_amount, Decimal('100.00'))
+        self.assertMatchesRebuild()
+
+
+class TaskActualHoursTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.task = make_task()
+
+    def actual_hours(self, task=None):
+        task = task or self.task
+        task.refresh_from_db(fields=['actual_hours'])
+        return task.actual_hours
+
+    def test_entry_lifecycle_updates_actual_hours(self):
+        entry = make_time_entry(task=self.task, hours=Decimal('2.00'))
+        make_time_entry(task=self.task, hours=Decimal('1.50'))
+        self.assertEqual(self.actual_hours(), Decimal('3.50'))
+
+        entry.hours = Decimal('3.00')
+        entry.save()
+        self.assertEqual(self.actual_hours(), Decimal('4.50'))
+
+        entry.delete()
+        self.assertEqual(self.actual_hours(), Decimal('1.50'))
+
+        entry.restore()
+        self.assertEqual(self.actual_hours(), Decimal('4.50'))
+
+        other = make_task(project=self.task.project)
+        entry.task = other
+        entry.save()
+        self.assertEqual(self.actual_hours(), Decimal('1.50'))
+        self.assertEqual(self.actual_hours(other), Decimal('3.00'))
+
+    def test_saving_a_stale_task_keeps_actual_hours(self):
+        stale = type(self.task).objects.get(pk=self.task.pk)
+        make_time_entry(task=self.task, hours=Decimal('2.00'))
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.actual_hours(), Decimal('2.00'))
+
+    def test_recalculate_repairs_drift(self):
+        make_time_entry(task=self.task, hours=Decimal('2.00'))
+        type(self.task).objects.filter(pk=self.task.pk).update(actual_hours=Decimal('9.00'))
+        self.assertEqual(recalculate_task_hours(), 1)
+        self.assertEqual(self.actual_hours(), Decimal('2.00'))
+        self.assertEqual(recalculate_task_hours(), 0)
+
+
+class TaskTreeTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.project = make_project()
+        self.root = make_task(project=self.project, estimated_hours=Decimal('1.00'))
+        self.child = make_task(project=self.project, parent_task=self.root, estimated_hours=Decimal('2.00'))
+        self.grandchild = make_task(
+            project=self.project, parent_task=self.child, estimated_hours=Decimal('4.00'),
+            status=lookup('TASK_STATUS', 'COMPLETED'),
+        )
+
+    def path(self, task):
+        task.refresh_from_db(fields=['tree_path'])
+        return task.tree_path
+
+    def test_new_tasks_extend_their_parents_path(self):
+        self.assertEqual(self.path(self.root), [self.root.pk])
+        self.assertEqual(self.path(self.grandchild), [self.root.pk, self.child.pk, self.grandchild.pk])
+
+    def test_moving_a_task_rewrites_its_subtree(self):
+        other = make_task(project=self.project)
+        self.child.parent_task = other
+        self.child.save()
+        self.assertEqual(self.path(self.grandchild), [other.pk, self.child.pk, self.grandchild.pk])
+
+        self.child.parent_task = None
+        self.child.save()
+        self.assertEqual(self.path(self.child), [self.child.pk])
+        self.assertEqual(self.path(self.grandchild), [self.child.pk, self.grandchild.pk])
+
+    def test_a_task_cannot_move_under_its_subtree(self):
+        self.root.parent_task = self.grandchild
+        with self.assertRaises(ValidationError):
+            self.root.full_clean()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.root.save()
+        self.assertEqual(self.path(self.root), [self.root.pk])
+
+    def test_deleting_a_task_detaches_its_subtree(self):
+        self.child.delete()
+        self.assertEqual(self.path(self.grandchild), [self.root.pk, self.child.pk, self.grandchild.pk])
+        self.child.force_delete()
+        self.grandchild.refresh_from_db()
+        self.assertIsNone(self.grandchild.parent_task_id)
+        self.assertEqual(self.grandchild.tree_path, [self.grandchild.pk])
+
+    def test_subtree_is_one_query_with_rolled_up_hours(self):
+        make_time_entry(task=self.grandchild, hours=Decimal('3.00'))
+        with self.assertNumQueries(1):
+            tree = tasktree.flatten(tasktree.subtree(self.root).select_related('status').order_by('title'))
+        self.assertEqual([task.depth for task in tree], [0, 1, 2])
+        root, child, grandchild = tree
+        self.assertEqual(root.subtree_estimated_hours, Decimal('7.00'))
+        self.assertEqual(root.subtree_actual_hours, Decimal('3.00'))
+        self.assertEqual((root.subtask_count, root.completed_subtask_count, root.completion), (2, 1, 50))
+        self.assertEqual(child.subtree_estimated_hours, Decimal('6.00'))
+        self.assertEqual(grandchild.completion, 100)
+
+
+class SchedulingTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.start = date(2026, 11, 2)
+        self.project = make_project(start_date=self.start)
+        self.design = make_task(project=self.project, title='Design', duration_days=3)
+        self.build = make_task(project=self.project, title='Build', duration_days=5)
+        self.docs = make_task(project=self.project, title='Docs', duration_days=2)
+        self.review = make_task(project=self.project, title='Review', duration_days=1)
+        make_dependency(self.design, self.build)
+        make_dependency(self.design, self.docs, 'SS', lag_days=1)
+        make_dependency(self.build, self.review)
+        make_dependency(self.docs, self.review, 'FF')
+
+    def schedule(self, task):
+        task.refresh_from_db()
+        start = lambda day: None if day is None else (day - self.start).days
+        return (start(task.early_start), start(task.early_finish), start(task.late_start), task.total_slack)
+
+    def test_dates_slack_and_critical_path(self):
+        self.assertEqual(self.schedule(self.design), (0, 2, 0, 0))
+        self.assertEqual(self.schedule(self.build), (3, 7, 3, 0))
+        self.assertEqual(self.schedule(self.docs), (1, 2, 7, 6))
+        self.assertEqual(self.schedule(self.review), (8, 8, 8, 0))
+        critical = Task.objects.filter(project=self.project, total_slack=0).order_by('early_start')
+        self.assertEqual(list(critical), [self.design, self.build, self.review])
+        self.assertEqual(scheduling.reschedule(self.project.pk, tasks=None), 0)
+
+    def test_changes_reschedule_only_what_they_affect(self):
+        self.docs.duration_days = 10
+        self.docs.save()
+        self.assertEqual(self.schedule(self.docs), (1, 10, 1, 0))
+        self.assertEqual(self.schedule(self.review), (10, 10, 10, 0))
+        self.assertEqual(self.schedule(self.build), (3, 7, 5, 2))
+
+        unrelated = make_task(project=self.project, duration_days=2)
+        self.assertEqual(self.schedule(unrelated), (0, 1, 9, 9))
+        # Only the task itself and the tasks downstream of it move
+        self.build.title = 'Build it'
+        self.build.save()
+        self.build.duration_days = 6
+        with CaptureQueriesContext(connection) as queries:
+            self.build.save()
+        update = next(query['sql'] for query in queries if 'unnest' in query['sql'])
+        self.assertNotIn(str(unrelated.pk), update)
+        self.assertEqual(self.schedule(self.build), (3, 8, 4, 1))
+
+    def test_deleting_a_task_or_dependency_releases_its_successors(self):
+        self.build.delete()
+        self.assertEqual(self.schedule(self.review), (2, 2, 2, 0))
+        self.build.restore()
+        self.assertEqual(self.schedule(self.review), (8, 8, 8, 0))
+        TaskDependency.objects.get(successor=self.build).force_delete()
+        self.assertEqual(self.schedule(self.build), (0, 4, 0, 0))
+        self.assertEqual(self.schedule(self.review), (5, 5, 5, 0))
+
+    def test_moving_the_project_start_moves_the_schedule(self):
+        self.project.start_date = self.start + timedelta(days=7)
+        self.project.save()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.early_start, self.start + timedelta(days=15))
+
+    def test_dependencies_cannot_form_cycles_or_cross_projects(self):
+        with self.assertRaises(ValidationError), transaction.atomic():
+            make_dependency(self.review, self.design)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            make_dependency(self.design, make_task())
+        dependency = TaskDependency(predecessor=self.review, successor=self.docs, type=lookup('DEPENDENCY_TYPE', 'FS'))
+        with self.assertRaises(ValidationError):
+            dependency.full_clean()
+
+    def test_schedule_projects_command(self):
+        Task.objects.filter(project=self.project).update(early_start=None, total_slack=None)
+        out = StringIO()
+        call_command('schedule_projects', self.project.code, stdout=out)
+        self.assertIn('Rescheduled 4 task(s) in 1 project(s)', out.getvalue())
+        self.assertEqual(self.schedule(self.review), (8, 8, 8, 0))
+        with self.assertRaises(CommandError):
+            call_command('schedule_projects', 'NOPE', stdout=out)
+
+
+class CapacityTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.today = date(2026, 10, 21)
+        self.alice = make_user(first_name='Alice')
+        self.bob = make_user(first_name='Bob', weekly_capacity_hours=Decimal('20.00'))
+        self.carol = make_user(first_name='Carol', weekly_capacity_hours=Decimal('0.00'))
+        # Started weeks ago: remaining work is planned from the current week on
+        project = make_project(start_date=date(2026, 10, 5))
+        task = make_task(project=project, assigned_to=self.alice, estimated_hours=Decimal('100.00'), duration_days=28)
+        for day in (12, 13, 14):
+            make_time_entry(task=task, user=self.alice, date=date(2026, 10, day), hours=Decimal('10.00'))
+        make_task(project=project, assigned_to=self.bob, estimated_hours=Decimal('50.00'), duration_days=21)
+        make_task(project=project, assigned_to=self.bob, estimated_hours=Decimal('80.00'),
+                  status=lookup('TASK_STATUS', 'COMPLETED'))
+        make_task(project=project, assigned_to=self.carol, estimated_hours=Decimal('8.00'), duration_days=60,
+                  due_date=date(2026, 10, 21))
+
+    def report(self):
+        return capacity.utilization([self.alice, self.bob, self.carol], date(2026, 10, 14), 4, today=self.today)
+
+    def test_load_utilization_and_over_allocation_per_week(self):
+        report = self.report()
+        self.assertEqual(report['weeks'], [date(2026, 10, 12) + timedelta(weeks=n) for n in range(4)])
+        self.assertEqual(report['current'], 1)
+        self.assertEqual(report['logged'][0], [30.0, 0.0, 0.0, 0.0])
+        self.assertEqual(report['load'], [[30.0, 35.0, 35.0, 0.0], [0.0, 50.0, 0.0, 0.0], [0.0, 8.0, 0.0, 0.0]])
+        self.assertEqual(report['utilization'][:2], [[75.0, 87.5, 87.5, 0.0], [0.0, 250.0, 0.0, 0.0]])
+        self.assertEqual(report['utilization'][2], [None] * 4)
+        self.assertEqual(report['over'], [[0.0] * 4, [0.0, 30.0, 0.0, 0.0], [0.0, 8.0, 0.0, 0.0]])
+        self.assertEqual(report['heat'], [[2, 3, 3, 0], [0, 5, 0, 0], [0, 5, 0, 0]])
+        self.assertEqual(report['totals']['load'], [30.0, 93.0, 35.0, 0.0])
+        self.assertEqual(report['totals']['utilization'][1], 155.0)
+
+    def test_forecast_counts_the_whole_backlog(self):
+        report = capacity.utilization([self.alice, self.bob, self.carol], date(2026, 10, 12), 1, today=self.today)
+        self.assertEqual(report['current'], None)
+        self.assertEqual(report['load'], [[30.0], [0.0], [0.0]])
+        self.assertEqual(report['backlog'], [70.0, 50.0, 8.0])
+        self.assertEqual(report['backlog_weeks'], [1.75, 2.5, None])
+        self.assertEqual(self.report()['overbooked'], [0, 1, 1])
+
+    def test_two_queries_whatever_the_size(self):
+        self.report()
+        with self.assertNumQueries(2):
+            self.report()
+        rows = capacity.heatmap(self.report())
+        self.assertEqual(rows[1]['cells'][1], (date(2026, 10, 19), 50.0, 250.0, 30.0, 5))
+
+
+class BillingRateTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        client = make_client(default_billing_rate=Decimal('50.00'))
+        self.project = make_project(client=client)
+        self.member_user = make_user()
+        make_member(self.project, self.member_user, billing_rate=Decimal('80.00'))
+        self.entries = [
+            # entry rate wins
+            make_time_entry(task=make_task(project=self.project), billing_rate=Decimal('200.00')),
+            # task rate
+            make_time_entry(task=make_task(project=self.project, billing_rate=Decimal('120.00'))),
+            # assignee's member rate
+            make_time_entry(task=make_task(project=self.project, assigned_to=self.member_user)),
+            # zero rates fall through to the client default
+            make_time_entry(
+                task=make_task(project=self.project, billing_rate=Decimal('0.00')),
+                hours=Decimal('2.00'),
+            ),
+            make_time_entry(task=make_task(project=self.project), billable=False),
+        ]
+
+    def test_sql_and_python_resolvers_match_model(self):
+        expected = {
+            entry.pk: (entry.get_effective_billing_rate, entry.billable_amount)
+            for entry in TimeEntry.objects.all()
+        }
+        with self.assertNumQueries(1):
+            annotated = {
+                entry.pk: (entry.effective_rate, entry.billing_amount)
+                for entry in with_billing_amounts(TimeEntry.objects.all())
+            }
+        self.assertEqual(annotated, expected)
+
+        entries = list(TimeEntry.objects.select_related('task__project__client'))
+        with self.assertNumQueries(1):
+            resolver = RateResolver.for_tasks(entry.task for entry in entries)
+            resolved = {
+                entry.pk: (resolver.entry_rate(entry), resolver.amount(entry))
+                for entry in entries
+            }
+        self.assertEqual(resolved, expected)
+        self.assertEqual(
+            [resolved[entry.pk][1] for entry in self.entries],
+            [Decimal('200.00'), Decimal('120.00'), Decimal('80.00'), Decimal('100.00'), Decimal('0.00')],
+        )
+
+
+class InvoiceTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.client_org = make_client(code='ACME', default_billing_rate=Decimal('100.00'), payment_terms='Net 30')
+        self.project = make_project(client=self.client_org)
+        self.task = make_task(project=self.project)
+        self.today = date(2026, 3, 31)
+
+    def test_invoices_unbilled_entries_and_adjusts_rollup(self):
+        billed = [
+            make_time_entry(task=self.task, date=self.today, hours=Decimal('2.00')),
+            make_time_entry(task=self.task, date=self.today, hours=Decimal('1.50'), billing_rate=Decimal('150.00')),
+        ]
+        later = make_time_entry(task=self.task, date=self.today + timedelta(days=1))
+        make_time_entry(task=self.task, date=self.today, billable=False,
+                        billing_status=lookup('BILLING_STATUS', 'NON_BILLABLE'))
+
+        [invoice] = generate_invoices(self.today, issue_date=self.today, chunk_size=1)
+
+        self.assertEqual(invoice.number, 'INV-2026-00001')
+        self.assertEqual(invoice.due_date, date(2026, 4, 30))
+        self.assertEqual(invoice.hours, Decimal('3.50'))
+        self.assertEqual(invoice.total_amount, Decimal('425.00'))
+        self.assertEqual(invoice.lines.count(), 2)
+        entries = TimeEntry.objects.in_bulk([entry.pk for entry in billed + [later]])
+        for entry in billed:
+            self.assertEqual(entries[entry.pk].billing_status.code, 'BILLED')
+        self.assertEqual(entries[billed[0].pk].billing_rate, Decimal('100.00'))
+        self.assertEqual(entries[later.pk].billing_status.code, 'UNBILLED')
+
+        rollup = ProjectRollup.objects.get(project=self.project)
+        self.assertEqual(rollup.unbilled_amount, Decimal('100.00'))
+        rebuild_project_rollups([self.project.pk])
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.unbilled_amount, Decimal('100.00'))
+        self.assertEqual(rollup.billable_amount, Decimal('525.00'))
+
+        # Nothing left to invoice for the period
+        self.assertEqual(generate_invoices(self.today), [])
+
+    def test_command_dry_run_writes_nothing(self):
+        make_time_entry(task=self.task, date=self.today)
+        call_command('generate_invoices', '--through', '2026-03-31', '--dry-run', stdout=StringIO())
+        self.assertFalse(Invoice.objects.exists())
+        out = StringIO()
+        call_command('generate_invoices', '--through', '2026-03-31', '--client', 'ACME', stdout=out)
+        self.assertIn('ACME: 1.00h, 100.00', out.getvalue())
+
+    def test_numbers_keep_counting_past_the_padding(self):
+        for number in ('INV-2026-99999', 'INV-2026-100000', 'INV-2025-200000'):
+            Invoice.objects.create(client=self.client_org, number=number, issue_date=self.today,
+                                   period_end=self.today)
+        make_time_entry(task=self.task, date=self.today)
+        [invoice] = generate_invoices(self.today, issue_date=self.today)
+        self.assertEqual(invoice.number, 'INV-2026-100001')
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.project = make_project(billing_rate=Decimal('100.00'))
+        self.member = make_member(self.project, make_user())
+        self.task = make_task(project=self.project)
+        self.subtask = make_task(project=self.project, parent_task=self.task)
+        self.entries = [make_time_entry(task=self.task, hours=Decimal('2.00')) for _ in range(3)]
+
+    def test_managers(self):
+        self.entries[0].delete()
+        self.assertEqual(TimeEntry.objects.count(), 2)
+        self.assertEqual(TimeEntry.all_objects.count(), 3)
+        self.assertIsNotNone(TimeEntry.all_objects.get(pk=self.entries[0].pk).deleted_date)
+        self.assertEqual(Task.all_objects.get(pk=self.task.pk).actual_hours, Decimal('4.00'))
+
+    def test_project_delete_cascades_in_one_update_per_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.project.delete()
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        for table in ('project_project', 'project_projectmember', 'project_task', 'project_timeentry'):
+            self.assertEqual(sum(sql.startswith(f'UPDATE "{table}" SET "is_active"') for sql in updates), 1, table)
+
+        self.assertFalse(self.project.is_active)
+        for model in (ProjectMember, Task, TimeEntry):
+            rows = model.all_objects.filter(is_active=False)
+            self.assertEqual(rows.exclude(deleted_date=self.project.deleted_date).count(), 0)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(TimeEntry.objects.exists())
+        rollup = ProjectRollup.objects.get(project=self.project)
+        self.assertEqual((rollup.hours, rollup.task_count), (Decimal('0.00'), 0))
+
+    def test_restore_brings_back_only_what_the_cascade_deleted(self):
+        self.entries[0].delete()
+        self.project.delete()
+        Project.all_objects.filter(pk=self.project.pk).restore()
+
+        self.assertEqual(ProjectMember.objects.count(), 1)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(set(TimeEntry.objects.values_list('pk', flat=True)), {entry.pk for entry in self.entries[1:]})
+        self.assertIsNone(Project.objects.get(pk=self.project.pk).deleted_date)
+        self.assertEqual(ProjectRollup.objects.get(project=self.project).hours, Decimal('4.00'))
+        self.assertEqual(Task.objects.get(pk=self.task.pk).actual_hours, Decimal('4.00'))
+
+    def test_task_delete_keeps_subtasks(self):
+        self.task.delete()
+        self.assertEqual(list(Task.objects.all()), [self.subtask])
+        self.assertFalse(TimeEntry.objects.exists())
+        self.assertEqual(Task.all_objects.get(pk=self.task.pk).actual_hours, Decimal('0.00'))
+        self.task.restore()
+        self.assertEqual(TimeEntry.objects.count(), 3)
+        # The instance is in step with the row, so saving it changes nothing
+        self.task.save()
+        self.assertEqual(ProjectRollup.objects.get(project=self.project).hours, Decimal('6.00'))
+
+
+class PurgeDeletedTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.project = make_project()
+        make_member(self.project, make_user())
+        self.task = make_task(project=self.project)
+        self.subtask = make_task(project=self.project, parent_task=self.task)
+        self.entries = [make_time_entry(task=self.task) for _ in range(3)]
+        self.project.delete()
+        self.other = make_task()
+        self.other.delete()
+        # The project was deleted 100 days ago, the other task just now
+        for model in (Project, ProjectMember, Task, TimeEntry):
+            model.all_objects.filter(deleted_date=self.project.deleted_date).update(
+                deleted_date=self.project.deleted_date - timedelta(days=100)
+            )
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_deleted', '--pause', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_purges_expired_rows_in_dependency_order(self):
+        self.purge('--days', '30', '--batch-size', '1')
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(ProjectRollup.objects.filter(project=self.project).exists())
+        self.assertFalse(ProjectMember.all_objects.exists())
+        self.assertFalse(TimeEntry.all_objects.exists())
+        self.assertEqual(list(Task.all_objects.all()), [self.other])
+
+    def test_keeps_rows_still_referenced_by_rows_within_their_window(self):
+        # Time entries are kept for two years, so their task and project stay
+        output = self.purge()
+        self.assertEqual(TimeEntry.all_objects.count(), 3)
+        self.assertEqual(list(Task.all_objects.filter(project=self.project)), [self.task])
+        self.assertTrue(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(ProjectMember.all_objects.exists())
+        self.assertIn('project.task', output)
+        self.assertRegex(output, r'project\.project\s+purged\s+0\s+kept\s+1')
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.purge('--days', '30', '--dry-run')
+        self.assertRegex(output, r'project\.timeentry\s+would purge\s+3')
+        self.assertEqual(TimeEntry.all_objects.count(), 3)
+        self.assertTrue(Project.all_objects.filter(pk=self.project.pk).exists())
+        with self.assertRaises(CommandError):
+            self.purge('--model', 'project.projectrollup')
+
+
+class ProjectArchiveTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        ended = date.today() - timedelta(days=400)
+        self.project = make_project(status=lookup('PROJECT_STATUS', 'COMPLETED'), end_date=ended)
+        self.member = make_member(self.project, make_user())
+        self.task = make_task(project=self.project)
+        self.subtask = make_task(project=self.project, parent_task=self.task)
+        paid = lookup('BILLING_STATUS', 'PAID')
+        self.entries = [make_time_entry(task=self.task, date=ended, billing_status=paid) for _ in range(3)]
+        self.entries[0].delete()
+        self.live_task = make_task()
+        rebuild_project_rollups()
+
+    def assertForeignKeysHold(self):
+        # Foreign keys are deferred to the commit, which a test never reaches
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+    def test_archive_tables_have_the_columns_of_the_hot_tables(self):
+        for hot, archived in archive.ARCHIVED_MODELS:
+            self.assertEqual(
+                [field.column for field in hot._meta.concrete_fields],
+                [field.column for field in archived._meta.concrete_fields],
+            )
+
+    def test_only_old_completed_projects_without_unbilled_time_are_archivable(self):
+        self.assertEqual(list(archive.archivable_projects()), [self.project])
+        self.assertEqual(list(archive.archivable_projects(days=500)), [])
+        make_time_entry(task=self.task, date=self.project.end_date)
+        self.assertEqual(list(archive.archivable_projects()), [])
+
+    def test_archive_and_restore_move_every_row(self):
+        dependency = make_dependency(self.task, make_task(project=self.project))
+        rollup = ProjectRollup.objects.get(project=self.project)
+        out = StringIO()
+        call_command('archive_projects', stdout=out)
+        self.assertIn('Archived 1 project(s): members 1, tasks 3, time entries 3', out.getvalue())
+        self.assertForeignKeysHold()
+
+        self.assertFalse(Task.all_objects.filter(project=self.project).exists())
+        self.assertFalse(TimeEntry.all_objects.filter(task=self.task).exists())
+        self.assertEqual(list(Task.all_objects.all()), [self.live_task])
+        self.assertEqual(ArchivedTask.objects.get(pk=self.subtask.pk).parent_task_id, self.task.pk)
+        self.assertEqual(ArchivedTimeEntry.objects.count(), 2)
+        self.assertEqual(ArchivedTimeEntry.all_objects.count(), 3)
+        self.assertEqual(ArchivedProjectMember.objects.get().pk, self.member.pk)
+        self.assertEqual(ArchivedTaskDependency.objects.get().pk, dependency.pk)
+        self.project.refresh_from_db()
+        self.assertIsNotNone(self.project.archived_date)
+        # The rollup of an archived project is frozen
+        rebuild_project_rollups()
+        self.assertEqual(ProjectRollup.objects.get(project=self.project).hours, rollup.hours)
+
+        call_command('restore_project', self.project.code, stdout=out)
+        self.assertForeignKeysHold()
+        self.assertFalse(ArchivedTimeEntry.all_objects.exists())
+        self.assertEqual(
+            set(TimeEntry.all_objects.values_list('pk', 'is_active')),
+            {(entry.pk, entry.pk != self.entries[0].pk) for entry in self.entries},
+        )
+        self.assertEqual(Task.objects.get(pk=self.subtask.pk).parent_task, self.task)
+        self.assertEqual(TaskDependency.objects.get().pk, dependency.pk)
+        self.assertEqual(ProjectRollup.objects.get(project=self.project).hours, rollup.hours)
+        with self.assertRaises(CommandError):
+            call_command('restore_project', self.project.code, stdout=out)
+
+
+class TimeEntryPartitionTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.month = partitions.month_start(date.today())
+
+    def partition_of(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM project_timeentry WHERE id = %s', [entry.pk])
+            return cursor.fetchone()[0]
+
+    def test_new_months_take_their_rows_from_the_catch_alls(self):
+        later = make_time_entry(date=partitions.add_months(self.month, 8))
+        earlier = make_time_entry(date=partitions.add_months(self.month, -2))
+        self.assertEqual(self.partition_of(later), partitions.AFTER)
+        self.assertEqual(self.partition_of(earlier), partitions.BEFORE)
+
+        created = partitions.ensure_partitions(earlier.date, later.date)
+        self.assertIn(partitions.partition_name(earlier.date.replace(day=1)), created)
+        self.assertEqual(self.partition_of(later), partitions.partition_name(later.date.replace(day=1)))
+        self.assertEqual(self.partition_of(earlier), partitions.partition_name(earlier.date.replace(day=1)))
+        self.assertEqual(partitions.ensure_partitions(earlier.date, later.date), [])
+        self.assertEqual(TimeEntry.objects.count(), 2)
+
+    def test_detached_months_leave_the_table(self):
+        old_month = partitions.add_months(self.month, -2)
+        partitions.ensure_partitions(old_month, self.month)
+        entry = make_time_entry(date=old_month)
+        kept = make_time_entry(date=partitions.add_months(self.month, -1))
+
+        self.assertEqual(partitions.detach_partitions(partitions.add_months(self.month, -1)),
+                         [partitions.partition_name(old_month)])
+        self.assertEqual(list(TimeEntry.all_objects.all()), [kept])
+        # Entries can still be recorded for the detached month
+        self.assertEqual(self.partition_of(make_time_entry(date=entry.date)), partitions.BEFORE)
+
+    def test_date_windows_are_pruned(self):
+        for months in (-1, 0, 1):
+            make_time_entry(date=partitions.add_months(self.month, months))
+        month_entries = TimeEntry.objects.filter(date__gte=self.month, date__lt=partitions.add_months(self.month, 1))
+        self.assertEqual(partitions.partition_scans(month_entries), {partitions.partition_name(self.month)})
+
+        out = StringIO()
+        call_command('timeentry_partitions', '--check', stdout=out)
+        self.assertIn('dashboard recent entries: reads', out.getvalue())
+        self.assertIn('Every checked query is pruned', out.getvalue())
+
+
+class QueryIndexTests(TestCase):
+    """The planner can serve the hot list and dashboard queries from their indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        lookups.clear()
+        users = [make_user() for _ in range(10)]
+        projects = [make_project() for _ in range(6)]
+        statuses = [lookup('TASK_STATUS', code) for code in ('TODO', 'IN_PROGRESS', 'COMPLETED')]
+        tasks = Task.objects.bulk_create([
+            Task(project=projects[n % 6], title=f'Task {n}', status=statuses[n % 3],
+                 priority=lookup('PRIORITY', 'MEDIUM'), assigned_to=users[n % 10])
+            for n in range(60)
+        ])
+        billing_statuses = [lookup('BILLING_STATUS', code) for code in ('UNBILLED', 'BILLED', 'PAID')]
+        start = date(2025, 1, 1)
+        TimeEntry.objects.bulk_create([
+            TimeEntry(task=tasks[n % 60], user=users[n % 10], date=start + timedelta(days=n % 365),
+                      hours=Decimal('1.00'), description='Seeded', billing_status=billing_statuses[n % 3])
+            for n in range(3000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE project_task, project_timeentry, project_project')
+        cls.user = users[0]
+        cls.project = projects[0]
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            # The seeded tables are small enough for sequential scans to win
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            # Plans of partitioned tables name the partitions' copies of the index
+            cursor.execute(
+                'SELECT c.relname FROM pg_partition_tree(%s::regclass) t JOIN pg_class c ON c.oid = t.relid',
+                [index_name],
+            )
+            names = [index_name] + [name for name, in cursor.fetchall()]
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in names), f'{index_name} not used in {plan}')
+
+    def test_recent_entries_of_a_user(self):
+        self.assertUsesIndex(
+            TimeEntry.objects.filter(user=self.user).order_by('-date')[:5], 'timeentry_user_date_idx'
+        )
+
+    def test_unbilled_entries(self):
+        self.assertUsesIndex(unbilled_time_entries(date(2025, 6, 30)).order_by(), 'timeentry_billable_idx')
+
+    def test_open_tasks_of_a_user(self):
+        self.assertUsesIndex(
+            Task.objects.filter(
+                is_active=True, assigned_to=self.user,
+                status_id__in=lookups.pks('TASK_STATUS', ('TODO', 'IN_PROGRESS')),
+            ).order_by(),
+            'task_active_assignee_idx',
+        )
+
+    def test_task_status_counts_of_a_project(self):
+        self.assertUsesIndex(
+            Task.objects.filter(project=self.project, is_active=True)
+            .order_by().values('status').annotate(count=Count('pk')),
+            'task_active_project_idx',
+        )
+
+    def test_deep_project_list_page(self):
+        paginator = KeysetPaginator(Project.objects.filter(is_active=True), ('-created_date', '-id'), 2)
+        cursor = paginator.page().next_cursor
+        queryset, _ = paginator.seek(cursor)
+        self.assertUsesIndex(queryset[:3], 'project_active_recent_idx')
+
+
+class SeedBenchmarkDataTests(TestCase):
+    options = {
+        'seed': 7, 'time_entries': 400, 'users': 8, 'clients': 3, 'projects': 6, 'tasks_per_project': 5,
+        'end_date': date(2026, 3, 31), 'batch_size': 150,
+    }
+
+    def seed(self, **options):
+        call_command('seed_benchmark_data', stdout=StringIO(), **{**self.options, **options})
+        return list(
+            TimeEntry.all_objects.filter(task__project__code__startswith='S7-')
+            .order_by('pk').values_list('pk', 'task_id', 'user__username', 'date', 'hours', 'billing_status_id')
+        )
+
+    def test_same_seed_generates_the_same_data(self):
+        savepoint = transaction.savepoint()
+        first = self.seed()
+        transaction.savepoint_rollback(savepoint)
+        self.assertEqual(len(first), 400)
+        self.assertEqual(self.seed(no_copy=True), first)
+
+    def test_derived_totals_match_the_entries(self):
+        self.seed()
+        for task in Task.all_objects.filter(project__code__startswith='S7-').annotate(logged=Sum(
+            'time_entries__hours', filter=Q(time_entries__is_active=True)
+        )):
+            self.assertEqual(task.actual_hours, task.logged or Decimal('0.00'))
+        self.assertFalse(Task.all_objects.filter(parent_task__parent_task__parent_task__isnull=False).exists())
+        with self.assertRaises(CommandError):
+            self.seed()
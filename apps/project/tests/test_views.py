@@ -1,4 +1,687 @@
-from django.test import TestCase, Client
-from django.urls import reverse
-
-# Create your view tests here
+import io
+import json
+import os
+import tempfile
+import uuid
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.lookups import lookups
+from apps.project import archive, selectors, views
+from apps.project.management.commands.benchmark_views import compare
+from apps.project.models import PROJECT_SEARCH_VECTOR, SEARCH_CONFIG, TASK_SEARCH_VECTOR, Project, Task, TimeEntry
+from .factories import (
+    lookup, make_client, make_dependency, make_member, make_project, make_task, make_time_entry, make_user,
+)
+
+# Create your view tests here
+
+
+class ProjectListViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def _make_projects(self, count):
+        client = make_client(default_billing_rate=Decimal('100.00'))
+        for _ in range(count):
+            project = make_project(client=client, budget_amount=Decimal('1000.00'))
+            done = make_task(project=project, status=lookup('TASK_STATUS', 'COMPLETED'))
+            make_task(project=project)
+            make_time_entry(task=done, hours=Decimal('2.50'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self._make_projects(2)
+        self.client.get(reverse('project:project_list'))
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('project:project_list'))
+        self._make_projects(6)
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.get(reverse('project:project_list'))
+
+    def test_rows_are_annotated_with_progress(self):
+        self._make_projects(1)
+        response = self.client.get(reverse('project:project_list'))
+        project = response.context['projects'][0]
+        self.assertEqual(project.task_count, 2)
+        self.assertEqual(project.completed_task_count, 1)
+        self.assertEqual(project.logged_hours, Decimal('2.50'))
+        self.assertEqual(project.budget_spent, Decimal('250.00'))
+
+
+class KeysetListViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def walk(self, url, name, params=None):
+        """Follow next cursors to the end, returning every row and the last response."""
+        rows, params = [], dict(params or {})
+        while True:
+            response = self.client.get(url, params)
+            rows += list(response.context[name])
+            if not response.context['page_obj'].has_next:
+                return rows, response
+            params['cursor'] = response.context['page_obj'].next_cursor
+
+    def test_task_pages_follow_the_task_ordering(self):
+        projects = [make_project() for _ in range(2)]
+        for n in range(25):
+            make_task(
+                project=projects[n % 2],
+                due_date=None if n % 5 == 0 else date(2026, 11, 1 + n % 4),
+                priority=lookup('PRIORITY', ('LOW', 'HIGH', 'MEDIUM')[n % 3]),
+            )
+        expected = list(Task.objects.filter(is_active=True).order_by(
+            '-project__created_date', 'project_id', 'due_date', 'priority__sort_order', 'id'
+        ))
+        tasks, response = self.walk(reverse('project:task_list'), 'tasks')
+        self.assertEqual(tasks, expected)
+        self.assertIn('approximate_count', response.context)
+
+        previous = self.client.get(reverse('project:task_list'), {
+            'cursor': response.context['page_obj'].previous_cursor,
+        })
+        self.assertEqual(list(previous.context['tasks']), expected[:20])
+
+    def test_pages_run_no_count_query(self):
+        for _ in range(12):
+            make_client()
+        with CaptureQueriesContext(connection) as queries:
+            clients, _ = self.walk(reverse('project:client_list'), 'clients')
+        self.assertEqual([c.name for c in clients], sorted(c.name for c in clients))
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT COUNT(*)')])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('project:project_list'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.project = make_project()
+        self.task = make_task(project=self.project)
+
+    def revalidate(self, url):
+        # The first visit sets the CSRF cookie, which the ETag covers
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        return response['ETag']
+
+    def assertNotModified(self, url, etag, queries):
+        # The session, the user and the last-modified lookup; nothing is rendered
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for url in (
+            reverse('project:project_detail', args=[self.project.pk]),
+            reverse('project:task_detail', args=[self.task.pk]),
+            reverse('project:client_detail', args=[self.project.client.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertNotModified(url, self.revalidate(url), 3)
+
+    def test_changes_to_dependent_rows_change_the_etag(self):
+        url = reverse('project:project_detail', args=[self.project.pk])
+        etag = self.revalidate(url)
+        entry = make_time_entry(task=self.task)
+        etag = self.assertChanged(url, etag)
+        entry.description = 'Reworded'
+        entry.save()
+        etag = self.assertChanged(url, etag)
+        self.task.title = 'Renamed'
+        self.task.save()
+        etag = self.assertChanged(url, etag)
+        make_member(self.project, make_user())
+        self.assertChanged(url, etag)
+
+    def assertChanged(self, url, etag):
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_etag_is_per_user(self):
+        url = reverse('project:task_detail', args=[self.task.pk])
+        etag = self.revalidate(url)
+        self.client.force_login(make_user())
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 200)
+
+    def test_api_detail_answers_conditional_gets(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        url = reverse('project:api:project-detail', args=[self.project.pk])
+        etag = api.get(url, {'include': 'client'})['ETag']
+        response = api.get(url, {'include': 'client'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = api.get(url, {'include': 'manager'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_api_time_entries_change_with_their_rates(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        member = make_member(self.project, self.user, billing_rate=Decimal('150.00'))
+        self.task.assigned_to = self.user
+        self.task.save()
+        entry = make_time_entry(task=self.task, user=self.user)
+        url = reverse('project:api:timeentry-detail', args=[entry.pk])
+        etag = api.get(url)['ETag']
+        self.assertEqual(api.get(url, headers={'if-none-match': etag}).status_code, 304)
+        member.billing_rate = Decimal('120.00')
+        member.save()
+        response = api.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['billing_amount'], '120.00')
+
+
+@override_settings(SQL_QUERY_BUDGET_MODE='fail')
+class TaskDetailViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.client = Client()
+        self.client.force_login(make_user())
+        project = make_project()
+        self.root = make_task(project=project, due_date=date(2026, 12, 1), estimated_hours=Decimal('1.00'))
+        self.child = make_task(project=project, parent_task=self.root, estimated_hours=Decimal('2.00'))
+        self.grandchild = make_task(
+            project=project, parent_task=self.child, due_date=date(2026, 11, 1), estimated_hours=Decimal('4.00'),
+        )
+
+    def test_subtasks_of_deleted_subtasks_roll_up_into_the_task(self):
+        self.child.delete()
+        response = self.client.get(reverse('project:task_detail', args=[self.root.pk]))
+        rollup = response.context['rollup']
+        self.assertEqual(rollup.pk, self.root.pk)
+        self.assertEqual(rollup.subtree_estimated_hours, Decimal('5.00'))
+        self.assertEqual([(task.pk, task.depth) for task in response.context['subtasks']], [(self.grandchild.pk, 1)])
+
+
+class QueryBudgetTests(TestCase):
+    """The main pages stay within SQL_QUERY_BUDGETS with several rows of everything."""
+
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user(is_staff=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+        client = make_client()
+        for _ in range(3):
+            project = make_project(client=client, manager=self.user)
+            make_member(project, self.user)
+            parent = make_task(project=project, assigned_to=self.user)
+            for _ in range(3):
+                task = make_task(project=project, parent_task=parent, assigned_to=self.user,
+                                 status=lookup('TASK_STATUS', 'IN_PROGRESS'))
+                make_time_entry(task=task, user=self.user)
+                make_dependency(parent, task)
+        self.project, self.task, self.client_record = project, task, client
+
+    def test_pages_are_within_budget(self):
+        pages = [
+            ('project:dashboard', []),
+            ('project:client_list', []),
+            ('project:client_detail', [self.client_record.pk]),
+            ('project:project_list', []),
+            ('project:project_detail', [self.project.pk]),
+            ('project:project_schedule', [self.project.pk]),
+            ('project:task_list', []),
+            ('project:task_detail', [self.task.pk]),
+            ('project:timesheet', []),
+            ('project:utilization', []),
+        ]
+        for name, args in pages:
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name, args=args)).status_code, 200)
+        self.assertEqual(self.client.get(reverse('project:search'), {'q': 'Task'}).status_code, 200)
+        for name in ('client', 'project', 'task', 'taskdependency', 'member', 'timeentry'):
+            with self.subTest(name):
+                response = self.client.get(reverse(f'project:api:{name}-list'))
+                self.assertEqual(response.status_code, 200)
+
+
+class BenchmarkViewsTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user(is_staff=True, is_superuser=True)
+        project = make_project(manager=self.user)
+        make_member(project, self.user)
+        task = make_task(project=project, assigned_to=self.user)
+        make_time_entry(task=task, user=self.user, hours=Decimal('3.00'))
+
+    def test_every_route_is_measured_and_writes_are_rolled_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_views', requests=2, warmup=0, alloc_requests=1, output=output, stdout=io.StringIO(),
+            )
+            with open(output) as results_file:
+                results = json.load(results_file)
+            out = io.StringIO()
+            call_command(
+                'benchmark_views', requests=2, warmup=0, alloc_requests=1, route=['dashboard'],
+                baseline=output, threshold=100, stdout=out,
+            )
+        self.assertIn('No regressions', out.getvalue())
+        self.assertIn('admin_time_entries', results['routes'])
+        for name, result in results['routes'].items():
+            with self.subTest(name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries'], 0)
+                self.assertGreater(result['alloc_kib'], 0)
+        self.assertEqual(TimeEntry.objects.count(), 1)
+
+    def test_compare_flags_slower_routes_and_extra_queries(self):
+        route = {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'queries': 5, 'alloc_kib': 100.0}
+        baseline = {'routes': {'dashboard': route, 'gone': route}}
+        current = {'routes': {
+            'dashboard': {**route, 'p95_ms': 30.0, 'p99_ms': 31.0, 'queries': 6},
+            'new': route,
+        }}
+        self.assertEqual(compare(current, baseline), [
+            ('dashboard', 'p95_ms', 20.0, 30.0), ('dashboard', 'queries', 5, 6),
+        ])
+
+
+class TimesheetViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.task = make_task(assigned_to=self.user)
+        self.url = reverse('project:timesheet') + '?week=2026-10-14'
+
+    def post_grid(self, rows):
+        data = {
+            'form-TOTAL_FORMS': str(len(rows)),
+            'form-INITIAL_FORMS': '0',
+            'form-MIN_NUM_FORMS': '0',
+            'form-MAX_NUM_FORMS': '50',
+        }
+        for index, row in enumerate(rows):
+            for key, value in row.items():
+                data[f'form-{index}-{key}'] = value
+        return self.client.post(self.url, data)
+
+    def test_grid_lists_assigned_tasks_for_the_week(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(str(response.context['week_start']), '2026-10-12')
+        self.assertContains(response, self.task.title)
+
+    def test_submitting_the_grid_creates_entries(self):
+        response = self.post_grid([
+            {'task': str(self.task.pk), 'description': 'Build', 'billable': 'on',
+             'day_0': '8', 'day_1': '7.5', 'day_4': '4'},
+            {},
+        ])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.task.time_entries.count(), 3)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.actual_hours, Decimal('19.50'))
+
+
+class UtilizationViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.manager = make_user(is_staff=True)
+        self.member = make_user(weekly_capacity_hours=Decimal('10.00'))
+        self.other = make_user()
+        self.project = make_project(manager=self.manager)
+        make_member(self.project, self.member)
+        make_task(project=self.project, assigned_to=self.member, estimated_hours=Decimal('30.00'), duration_days=1)
+        self.client = Client()
+        self.url = reverse('project:utilization')
+
+    def test_staff_see_the_team_and_can_filter_by_project(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(self.url, {'weeks': '8'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['report']['weeks']), 8)
+        self.assertEqual(len(response.context['rows']), 3)
+        row = next(row for row in response.context['rows'] if row['user'] == self.member)
+        self.assertEqual((row['backlog'], row['backlog_weeks'], row['overbooked']), (30.0, 3.0, 1))
+        self.assertContains(response, 'heat-5')
+
+        response = self.client.get(self.url, {'project': str(self.project.pk), 'start': '2026-10-14'})
+        self.assertEqual([row['user'] for row in response.context['rows']], [self.member])
+        self.assertEqual(response.context['report']['weeks'][0], date(2026, 10, 12))
+
+    def test_out_of_range_starts_fall_back_to_the_current_weeks(self):
+        self.client.force_login(self.other)
+        default = self.client.get(self.url).context['report']['weeks']
+        for start in ('9999-12-27', '0001-01-01'):
+            response = self.client.get(self.url, {'start': start, 'weeks': '52'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['report']['weeks'][0], default[0])
+
+    def test_others_only_see_themselves(self):
+        self.client.force_login(self.other)
+        response = self.client.get(self.url, {'weeks': 'many'})
+        self.assertEqual([row['user'] for row in response.context['rows']], [self.other])
+        self.assertNotContains(response, self.member.get_full_name())
+
+
+class TimeEntryAdminTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user(is_staff=True, is_superuser=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def _make_entries(self, count):
+        project = make_project(client=make_client(default_billing_rate=Decimal('90.00')))
+        for _ in range(count):
+            make_time_entry(task=make_task(project=project, assigned_to=self.user), user=self.user)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        url = reverse('admin:project_timeentry_changelist')
+        self._make_entries(2)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self._make_entries(6)
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(url)
+        self.assertContains(response, '90.00')
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.project = make_project(client=make_client(default_billing_rate=Decimal('100.00')))
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_time_entry_csv_is_filtered_and_streamed(self):
+        task = make_task(project=self.project, assigned_to=self.user)
+        make_time_entry(task=task, user=self.user, hours=Decimal('1.50'), description='Mine')
+        make_time_entry(task=task, user=self.user, billable=False, description='Internal')
+        make_time_entry(task=task, description='Someone else')
+
+        response = self.client.get(reverse('project:timeentry_export'), {'billable': '1'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        with self.assertNumQueries(1):
+            lines = self._content(response).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('Date,User,Client,Project,Task'))
+        self.assertIn('Mine,1.50,True,UNBILLED,100.00,150.00', lines[1])
+
+    def test_task_xlsx_is_a_workbook(self):
+        make_task(project=self.project, title='Design <review> & sign-off')
+        response = self.client.get(reverse('project:task_export'), {'format': 'xlsx', 'status': 'TODO'})
+        with zipfile.ZipFile(io.BytesIO(self._content(response))) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 2)
+        self.assertIn('Design &lt;review&gt; &amp; sign-off', sheet)
+
+    def test_project_csv_uses_the_list_filters(self):
+        make_time_entry(task=make_task(project=self.project), hours=Decimal('2.00'))
+        make_project(status=lookup('PROJECT_STATUS', 'COMPLETED'))
+        response = self.client.get(reverse('project:project_export'), {'status': self.project.status.code})
+        lines = self._content(response).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('Code,Name,Client,Status'))
+        self.assertTrue(lines[1].startswith(f'{self.project.code},{self.project.name},{self.project.client.code}'))
+        self.assertTrue(lines[1].endswith(',2.00,200.00'))
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(reverse('project:project_export'), {'client': 'not-a-uuid'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('project:task_export'), {'project': 'not-a-uuid'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('project:task_export'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ArchivedProjectViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.project = make_project(
+            status=lookup('PROJECT_STATUS', 'COMPLETED'),
+            client=make_client(default_billing_rate=Decimal('100.00')),
+        )
+        make_member(self.project, self.user, billing_rate=Decimal('120.00'))
+        task = make_task(project=self.project, title='Archived task', assigned_to=self.user)
+        make_time_entry(task=task, user=self.user, hours=Decimal('2.00'), description='Mine')
+        make_time_entry(task=task, description='Someone else')
+        archive.archive_projects([self.project.pk])
+
+    def test_detail_page_is_read_only(self):
+        response = self.client.get(reverse('project:project_detail', args=[self.project.pk]))
+        self.assertContains(response, 'Archived task')
+        self.assertContains(response, 'This project was archived on')
+        self.assertContains(response, reverse('project:archived_timeentry_export', args=[self.project.pk]))
+        self.assertNotContains(response, reverse('project:project_edit', args=[self.project.pk]))
+
+    def test_time_entries_are_exported_at_archived_member_rates(self):
+        url = reverse('project:archived_timeentry_export', args=[self.project.pk])
+        lines = b''.join(self.client.get(url).streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Mine,2.00,True,UNBILLED,120.00,240.00', lines[1])
+
+        archive.restore_projects([self.project.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_results_are_ranked_and_active_only(self):
+        project = make_project(name='Warehouse migration')
+        in_description = make_task(project=project, title='Cleanup', description='Migrate the invoices')
+        in_title = make_task(project=project, title='Invoice migration', description='Move data')
+        make_task(project=project, title='Old invoice export', is_active=False)
+
+        response = self.client.get(reverse('project:search'), {'q': 'invoice'})
+        self.assertEqual(response.status_code, 200)
+        results = response.context['results']
+        self.assertEqual(results['tasks'], [in_title, in_description])
+        self.assertEqual(results['projects'], [])
+        self.assertEqual(
+            self.client.get(reverse('project:search'), {'q': 'warehouse'}).context['results']['projects'],
+            [project],
+        )
+
+    def test_time_entries_are_searched_for_their_owner(self):
+        task = make_task(title='Cleanup')
+        own = make_time_entry(task=task, user=self.user, description='Reconciled the ledger')
+        make_time_entry(task=task, description='Reconciled the ledger again')
+        results = self.client.get(reverse('project:search'), {'q': 'ledger'}).context['results']
+        self.assertEqual(results['time_entries'], [own])
+
+    def test_list_searches_use_the_documents(self):
+        client = make_client(name='Harbor Logistics')
+        project = make_project(client=client, name='Dock scheduling')
+        other = make_project(name='Payroll', description='Quarterly harbor fees')
+        task = make_task(project=project, title='Crane booking')
+        make_task(project=other, title='Unrelated')
+        make_time_entry(task=task, user=self.user, description='Booked the cranes')
+
+        def found(url, query):
+            return list(self.client.get(reverse(url), {'search': query}).context['object_list'])
+
+        self.assertEqual(found('project:client_list', 'harbor'), [client])
+        self.assertCountEqual(found('project:project_list', 'harbor'), [project, other])
+        self.assertCountEqual(found('project:task_list', 'dock'), [task])
+        self.assertEqual(found('project:task_list', 'crane'), [task])
+        response = self.client.get(reverse('project:api:timeentry-list'), {'search': 'crane'})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_related_matches_are_answered_from_indexes(self):
+        queryset = selectors.search_filter(
+            Task.all_objects.all(), 'dock', TASK_SEARCH_VECTOR, project=(Project, PROJECT_SEARCH_VECTOR)
+        ).order_by()
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn('project_task_search_idx', plan)
+        # Matching projects are looked up once, not checked task by task
+        self.assertIn('InitPlan', plan)
+        self.assertNotIn('SubPlan', plan)
+        queryset = selectors.filter_time_entries(
+            TimeEntry.all_objects.all(), {'search': 'crane', 'is_active': 'all'}
+        ).order_by()
+        # Each partition has its own copy of project_timeentry_search_idx
+        self.assertIn('_to_tsvector_idx', queryset.explain())
+
+    def test_task_search_uses_the_gin_index(self):
+        make_task(title='Indexed task')
+        queryset = (
+            Task.all_objects.alias(document=TASK_SEARCH_VECTOR)
+            .filter(document=SearchQuery('indexed', config=SEARCH_CONFIG))
+            .order_by()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('project_task_search_idx', queryset.explain())
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        django_cache.clear()
+        self.user = make_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('project:dashboard')
+        self.task = make_task(assigned_to=self.user)
+
+    def dashboard(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(self.url).context
+
+    def test_cached_until_the_users_data_changes(self):
+        self.assertEqual(self.dashboard()['unbilled_hours'], 0)
+        with CaptureQueriesContext(connection) as cached:
+            self.dashboard()
+        # Only the session and user lookups remain
+        self.assertEqual(len(cached.captured_queries), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_time_entry(task=self.task, user=self.user, hours=Decimal('3.00'))
+        context = self.dashboard()
+        self.assertEqual(context['unbilled_hours'], Decimal('3.00'))
+        self.assertEqual(len(context['recent_time_entries']), 1)
+
+        # Other users' writes leave this dashboard cached
+        with self.captureOnCommitCallbacks(execute=True):
+            make_time_entry(task=self.task)
+        with self.assertNumQueries(2):
+            self.dashboard()
+
+    def test_stale_copy_is_served_while_another_request_rebuilds(self):
+        self.dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_time_entry(task=self.task, user=self.user, hours=Decimal('2.00'))
+        django_cache.add(f'project:dashboard:{self.user.pk}:lock', 1)
+        self.assertEqual(self.dashboard()['unbilled_hours'], 0)
+        django_cache.delete(f'project:dashboard:{self.user.pk}:lock')
+        self.assertEqual(self.dashboard()['unbilled_hours'], Decimal('2.00'))
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        lookups.clear()
+        django_cache.clear()
+        self.user = make_user()
+        self.project = make_project()
+        parent = make_task(project=self.project, title='Parent task', assigned_to=self.user)
+        make_task(project=self.project, parent_task=parent, status=lookup('TASK_STATUS', 'COMPLETED'))
+        make_task(project=self.project, parent_task=parent)
+        make_time_entry(task=parent, user=self.user, hours=Decimal('1.25'))
+
+    def request(self, path='/'):
+        request = AsyncRequestFactory().get(path)
+        request.session = {}
+
+        async def auser():
+            return self.user
+        request.auser = auser
+        return request
+
+    async def test_dashboard_matches_sync_summary(self):
+        expected = await sync_to_async(selectors.dashboard_summary)(self.user)
+        self.assertEqual(await selectors.adashboard_summary(self.user), expected)
+        response = await views.dashboard_async(self.request())
+        self.assertContains(response, 'Parent task')
+
+    async def test_project_detail(self):
+        view = views.ProjectDetailAsyncView.as_view()
+        response = await view(self.request(), pk=self.project.pk)
+        self.assertContains(response, 'Parent task')
+        self.assertContains(response, '2 subtasks')
+        self.assertContains(response, '50%')
+        with self.assertRaises(Http404):
+            await view(self.request(), pk=uuid.uuid4())
+
+    async def test_archived_project_detail(self):
+        await sync_to_async(archive.archive_projects)([self.project.pk])
+        response = await views.ProjectDetailAsyncView.as_view()(self.request(), pk=self.project.pk)
+        self.assertContains(response, 'Parent task')
+        self.assertContains(response, '2 subtasks')
+        self.assertContains(response, 'This project was archived on')
+
+    def test_sync_project_detail_queries_do_not_grow_with_tasks(self):
+        self.client.force_login(self.user)
+        url = reverse('project:project_detail', args=[self.project.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for _ in range(3):
+            make_task(project=self.project, parent_task=make_task(project=self.project))
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.get(url)
+
+    def test_project_detail_renders_a_deep_breakdown_in_one_query(self):
+        self.client.force_login(self.user)
+        url = reverse('project:project_detail', args=[self.project.pk])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        parent = None
+        for level in range(5):
+            parent = make_task(project=self.project, parent_task=parent, title=f'Level {level}',
+                               estimated_hours=Decimal('2.00'))
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(url)
+        self.assertContains(response, 'padding-left: 5rem')
+        self.assertContains(response, '4 subtasks')
+        self.assertContains(response, '/ 10.0 est')
@@ -1,11 +1,23 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, include
 from . import views
 
 app_name = 'project'
 
+# ASGI deployments serve the read-heavy pages from their async variants
+if settings.ASYNC_VIEWS:
+    dashboard_view = views.dashboard_async
+    project_detail_view = views.ProjectDetailAsyncView.as_view()
+else:
+    dashboard_view = views.dashboard
+    project_detail_view = views.ProjectDetailView.as_view()
+
 urlpatterns = [
+    path('api/', include('apps.project.api.urls')),
+
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', dashboard_view, name='dashboard'),
+    path('search/', views.SearchView.as_view(), name='search'),
 
     # Client URLs
     path('clients/', views.ClientListView.as_view(), name='client_list'),
@@ -15,10 +27,13 @@ urlpatterns = [
 
     # Project URLs
     path('projects/', views.ProjectListView.as_view(), name='project_list'),
+    path('projects/export/', views.ProjectExportView.as_view(), name='project_export'),
     path('projects/create/', views.ProjectCreateView.as_view(), name='project_create'),
-    path('projects/<uuid:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
+    path('projects/<uuid:pk>/', project_detail_view, name='project_detail'),
     path('projects/<uuid:pk>/edit/', views.ProjectUpdateView.as_view(), name='project_edit'),
+    path('projects/<uuid:pk>/schedule/', views.ProjectScheduleView.as_view(), name='project_schedule'),
     path('projects/<uuid:pk>/delete/', views.ProjectDeleteView.as_view(), name='project_delete'),
+    path('projects/<uuid:pk>/archive/time-entries/export/', views.ArchivedTimeEntryExportView.as_view(), name='archived_timeentry_export'),
 
     # Project Member URLs
     path('projects/<uuid:project_id>/members/add/', views.ProjectMemberCreateView.as_view(), name='project_member_add'),
@@ -26,6 +41,7 @@ urlpatterns = [
     # Task URLs
     path('projects/<uuid:project_id>/tasks/create/', views.TaskCreateView.as_view(), name='project_task_create'),
     path('tasks/', views.TaskListView.as_view(), name='task_list'),
+    path('tasks/export/', views.TaskExportView.as_view(), name='task_export'),
     path('tasks/create/', views.TaskCreateView.as_view(), name='task_create'),
     path('tasks/<uuid:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
     path('tasks/<uuid:pk>/edit/', views.TaskUpdateView.as_view(), name='task_edit'),
@@ -35,6 +51,9 @@ urlpatterns = [
     # Time Entry URLs
     path('tasks/<uuid:task_id>/time-entries/create/', views.TimeEntryCreateView.as_view(), name='task_timeentry_create'),
     path('time-entries/add/', views.TimeEntryCreateView.as_view(), name='timeentry_create'),
+    path('time-entries/export/', views.TimeEntryExportView.as_view(), name='timeentry_export'),
+    path('time-entries/timesheet/', views.TimesheetView.as_view(), name='timesheet'),
+    path('utilization/', views.UtilizationView.as_view(), name='utilization'),
     path('time-entries/<uuid:pk>/edit/', views.TimeEntryUpdateView.as_view(), name='timeentry_edit'),
     path('time-entries/<uuid:pk>/delete/', views.TimeEntryDeleteView.as_view(), name='timeentry_delete'),
 
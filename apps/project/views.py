@@ -1,45 +1,63 @@
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.core.exceptions import ValidationError
+from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.generic import (
-    ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
+    ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
 )
-from django.db.models import Q, Sum, Count
+from django.db.models import Q, Count
 from django.utils import timezone
 from django.contrib.messages.views import SuccessMessageMixin
-from . import models, forms
+from . import cache, capacity, models, forms, exports, selectors, services, tasktree
+from .constants import OPEN_PROJECT_STATUSES, OPEN_TASK_STATUSES
+from apps.core.conditional import ConditionalGetMixin, aconditional_get
+from apps.core.lookups import lookups
+from apps.core.pagination import KeysetPaginationMixin
 from apps.core.models import LookupCategory, LookupValue
 
-class ClientListView(LoginRequiredMixin, ListView):
+class ClientListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = models.Client
+    queryset = models.Client.objects.all()
     template_name = 'project/client_list.html'
     context_object_name = 'clients'
     paginate_by = 10
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
         queryset = super().get_queryset()
         search = self.request.GET.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(primary_contact_name__icontains=search)
-            )
-        return queryset.filter(is_active=True)
+            queryset = selectors.search_filter(queryset, search, models.CLIENT_SEARCH_VECTOR)
+        return queryset.select_related('industry').annotate(
+            project_count=Count('projects', filter=Q(projects__is_active=True))
+        )
 
-class ClientDetailView(LoginRequiredMixin, DetailView):
+class ClientDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = models.Client
+    queryset = models.Client.objects.all()
     template_name = 'project/client_detail.html'
     context_object_name = 'client'
 
+    def get_last_modified(self):
+        return selectors.client_last_modified(self.kwargs['pk'])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['active_projects'] = self.object.projects.filter(
             is_active=True,
-            status__code__in=['DRAFT', 'ACTIVE', 'ON_HOLD']
-        )
+            status_id__in=lookups.pks('PROJECT_STATUS', OPEN_PROJECT_STATUSES)
+        ).select_related('status', 'manager', 'rollup')
         return context
 
 class ClientCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
@@ -67,57 +85,87 @@ class ClientUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
         form.instance.updated_by = self.request.user
         return super().form_valid(form)
 
-class ProjectListView(LoginRequiredMixin, ListView):
+class ProjectListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = models.Project
+    queryset = models.Project.objects.all()
     template_name = 'project/project_list.html'
     context_object_name = 'projects'
     paginate_by = 10
+    keyset_ordering = ('-created_date', '-id')
+    approximate_count = True
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        search = self.request.GET.get('search', '')
-        status = self.request.GET.get('status', '')
-        client = self.request.GET.get('client', '')
+        queryset = selectors.filter_projects(super().get_queryset(), self.request.GET)
+        return selectors.project_progress(queryset)
 
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(client__name__icontains=search)
-            )
-        if status:
-            queryset = queryset.filter(status__code=status)
-        if client:
-            queryset = queryset.filter(client_id=client)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['status_choices'] = lookups.values('PROJECT_STATUS')
+        context['clients'] = models.Client.objects.all()
+        return context
+
+class ProjectDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
+    model = models.Project
+    template_name = 'project/project_detail.html'
+    context_object_name = 'project'
+
+    queryset = models.Project.objects.select_related(
+        'client', 'status', 'priority', 'manager', 'rollup'
+    )
 
-        return queryset.filter(is_active=True)
+    def get_last_modified(self):
+        return selectors.project_last_modified(self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['status_choices'] = LookupCategory.objects.filter(
-            code='PROJECT_STATUS'
-        )
-        context['clients'] = models.Client.objects.filter(is_active=True)
+        context.update(selectors.project_detail(self.object.pk, archived=self.object.archived_date is not None))
+        context['tasks'] = tasktree.flatten(context['tasks'])
         return context
 
-class ProjectDetailView(LoginRequiredMixin, DetailView):
+class ProjectScheduleView(LoginRequiredMixin, DetailView):
+    """The critical path schedule of a project's tasks (see ``scheduling``)."""
     model = models.Project
-    template_name = 'project/project_detail.html'
+    template_name = 'project/project_schedule.html'
     context_object_name = 'project'
+    queryset = models.Project.objects.select_related('client')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['team_members'] = self.object.memberships.filter(
-            end_date__isnull=True
-        ).select_related('user', 'role')
-        context['tasks'] = self.object.tasks.filter(
-            parent_task__isnull=True
-        ).select_related('status', 'priority', 'assigned_to')
-        context['recent_time_entries'] = models.TimeEntry.objects.filter(
-            task__project=self.object
-        ).select_related('user', 'task').order_by('-date')[:5]
+        context['tasks'] = tasks = list(selectors.project_schedule(self.object.pk))
+        context['finish'] = max((task.early_finish for task in tasks if task.early_finish), default=None)
+        context['critical_count'] = sum(task.is_critical for task in tasks)
         return context
 
+class ProjectDetailAsyncView(View):
+    """
+    Async variant of ProjectDetailView for ASGI deployments (``ASYNC_VIEWS``).
+    The project and the three lists are fetched concurrently.
+    """
+    template_name = ProjectDetailView.template_name
+
+    async def get(self, request, pk):
+        request.user = user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        last_modified = await sync_to_async(selectors.project_last_modified)(pk)
+        return await aconditional_get(request, last_modified, lambda: self.render_page(request, pk))
+
+    async def render_page(self, request, pk):
+        querysets = await sync_to_async(selectors.project_detail)(pk)
+        try:
+            project, context = await asyncio.gather(
+                ProjectDetailView.queryset.aget(pk=pk),
+                selectors.aevaluate(querysets),
+            )
+        except models.Project.DoesNotExist:
+            raise Http404(_('No project found matching the query'))
+        if project.archived_date is not None:
+            # Rare enough not to look the project up before the lists
+            context = await selectors.aevaluate(await sync_to_async(selectors.project_detail)(pk, archived=True))
+        context['tasks'] = tasktree.flatten(context['tasks'])
+        context['project'] = context['object'] = project
+        return render(request, self.template_name, context)
+
 class ProjectCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     model = models.Project
     form_class = forms.ProjectForm
@@ -180,56 +228,100 @@ class ProjectMemberCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateVie
         form.instance.updated_by = self.request.user
         return super().form_valid(form)
 
-class TaskListView(LoginRequiredMixin, ListView):
+class TaskListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = models.Task
     template_name = 'project/task_list.html'
     context_object_name = 'tasks'
     paginate_by = 20
+    # Task.Meta.ordering spelled out: 'project' sorts by the project's own
+    # ordering and 'priority' by the lookup's sort order
+    keyset_ordering = ('-project__created_date', 'project_id', 'due_date', 'priority__sort_order', 'id')
+    approximate_count = True
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        search = self.request.GET.get('search', '')
-        status = self.request.GET.get('status', '')
-        project = self.request.GET.get('project', '')
-        assigned = self.request.GET.get('assigned', '')
-
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(project__name__icontains=search)
-            )
-        if status:
-            queryset = queryset.filter(status__code=status)
-        if project:
-            queryset = queryset.filter(project_id=project)
-        if assigned == 'me':
-            queryset = queryset.filter(assigned_to=self.request.user)
-        elif assigned:
-            queryset = queryset.filter(assigned_to_id=assigned)
-
-        return queryset.filter(is_active=True).select_related(
-            'project', 'status', 'priority', 'assigned_to'
+        queryset = selectors.filter_tasks(super().get_queryset(), self.request.GET, self.request.user)
+        return selectors.with_subtask_counts(
+            queryset.select_related('project', 'status', 'priority', 'assigned_to')
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['status_choices'] = LookupCategory.objects.filter(
-            code='TASK_STATUS'
-        )
-        context['projects'] = models.Project.objects.filter(is_active=True)
+        context['status_choices'] = lookups.values('TASK_STATUS')
+        context['projects'] = models.Project.objects.all()
         return context
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+class ExportMixin:
+    """Streams rows as a CSV or XLSX download selected by ``?format=``."""
+    export_name = 'export'
+
+    def get_rows(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in exports.EXPORT_FORMATS:
+            raise Http404(_('Unknown export format'))
+        try:
+            rows = self.get_rows()
+        except ValidationError as error:
+            return HttpResponseBadRequest('; '.join(error.messages))
+        content_type, extension = exports.EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(exports.stream(rows, export_format), content_type=content_type)
+        filename = f'{self.export_name}-{timezone.localdate():%Y%m%d}.{extension}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class ProjectExportView(LoginRequiredMixin, ExportMixin, View):
+    export_name = 'projects'
+
+    def get_rows(self):
+        return exports.project_rows(selectors.filter_projects(models.Project.objects.all(), self.request.GET))
+
+class TaskExportView(LoginRequiredMixin, ExportMixin, View):
+    export_name = 'tasks'
+
+    def get_rows(self):
+        queryset = selectors.filter_tasks(models.Task.objects.all(), self.request.GET, self.request.user)
+        return exports.task_rows(queryset)
+
+class TimeEntryExportView(LoginRequiredMixin, ExportMixin, View):
+    export_name = 'time-entries'
+
+    def get_rows(self):
+        queryset = models.TimeEntry.all_objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return exports.time_entry_rows(selectors.filter_time_entries(queryset, self.request.GET))
+
+class ArchivedTimeEntryExportView(LoginRequiredMixin, ExportMixin, View):
+    """The time entries of an archived project, filtered like TimeEntryExportView."""
+    export_name = 'archived-time-entries'
+
+    def get_rows(self):
+        project = get_object_or_404(models.Project, pk=self.kwargs['pk'], archived_date__isnull=False)
+        self.export_name = f'{project.code}-time-entries'
+        queryset = models.ArchivedTimeEntry.all_objects.filter(task__project=project)
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return exports.archived_time_entry_rows(selectors.filter_time_entries(queryset, self.request.GET))
+
+class TaskDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = models.Task
     template_name = 'project/task_detail.html'
     context_object_name = 'task'
+    queryset = models.Task.objects.select_related('project', 'parent_task', 'status', 'priority', 'assigned_to')
+
+    def get_last_modified(self):
+        return selectors.task_last_modified(self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['subtasks'] = self.object.subtasks.filter(
-            is_active=True
-        ).select_related('status', 'priority', 'assigned_to')
+        # The whole subtree in one query, rolled up under the task itself
+        tree = tasktree.flatten(
+            tasktree.subtree(self.object).select_related('status', 'priority', 'assigned_to')
+        )
+        context['rollup'] = next(node for node in tree if node.pk == self.object.pk)
+        context['subtasks'] = [node for node in tree if node is not context['rollup']]
         context['time_entries'] = self.object.time_entries.select_related(
             'user', 'billing_status'
         ).order_by('-date')
@@ -340,6 +432,127 @@ class TimeEntryDeleteView(LoginRequiredMixin, DeleteView):
         messages.success(self.request, self.success_message)
         return super().delete(request, *args, **kwargs)
 
+class SearchView(LoginRequiredMixin, TemplateView):
+    template_name = 'project/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            context['results'] = selectors.search(query, self.request.user)
+        return context
+
+class TimesheetView(LoginRequiredMixin, TemplateView):
+    """Weekly grid for logging a week of time entries in one submission."""
+    template_name = 'project/timesheet.html'
+
+    def get_week_start(self):
+        try:
+            day = date.fromisoformat(self.request.GET.get('week', ''))
+        except ValueError:
+            day = timezone.localdate()
+        return day - timedelta(days=day.weekday())
+
+    def get_task_choices(self):
+        tasks = models.Task.objects.filter(
+            assigned_to=self.request.user,
+            status_id__in=lookups.pks('TASK_STATUS', OPEN_TASK_STATUSES)
+        ).select_related('project').order_by('project__code', 'title')
+        return [(task.pk, str(task)) for task in tasks]
+
+    def get_formset(self):
+        return forms.TimesheetFormSet(
+            self.request.POST or None,
+            task_choices=self.get_task_choices(),
+            week_start=self.get_week_start(),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        week_start = self.get_week_start()
+        if 'formset' not in context:
+            context['formset'] = self.get_formset()
+        context['week_start'] = week_start
+        context['previous_week'] = week_start - timedelta(days=7)
+        context['next_week'] = week_start + timedelta(days=7)
+        return context
+
+    def post(self, request, *args, **kwargs):
+        formset = self.get_formset()
+        if formset.is_valid():
+            rows = formset.entries()
+            try:
+                created = services.submit_time_entries(request.user, [entry for row, entry in rows])
+            except ValidationError as error:
+                for key, messages_ in error.message_dict.items():
+                    row = rows[int(key)][0]
+                    for message in messages_:
+                        formset.forms[row].add_error(None, message)
+            else:
+                messages.success(request, _('%(count)d time entries were logged') % {'count': len(created)})
+                return redirect(f"{reverse('project:timesheet')}?week={formset.week_start.isoformat()}")
+        return self.render_to_response(self.get_context_data(formset=formset))
+
+class UtilizationView(LoginRequiredMixin, TemplateView):
+    """
+    Heatmap of the weekly load of the team against their capacity. Staff
+    see every active user (or the members of ``?project=``), others only
+    themselves.
+    """
+    template_name = 'project/utilization.html'
+
+    def get_range(self):
+        try:
+            weeks = int(self.request.GET.get('weeks', ''))
+        except ValueError:
+            weeks = settings.UTILIZATION_WEEKS_BEFORE + 1 + settings.UTILIZATION_WEEKS_AFTER
+        weeks = min(max(weeks, 1), settings.UTILIZATION_MAX_WEEKS)
+        try:
+            start = capacity.week_start(date.fromisoformat(self.request.GET.get('start', '')))
+        except ValueError:
+            start = None
+        # The range and the one before it must fit within the calendar
+        if start is None or not date.min + capacity.WEEK * weeks <= start <= date.max - capacity.WEEK * weeks:
+            start = capacity.week_start(timezone.localdate()) - capacity.WEEK * settings.UTILIZATION_WEEKS_BEFORE
+        return start, weeks
+
+    def get_project_id(self):
+        try:
+            return uuid.UUID(self.request.GET.get('project', ''))
+        except ValueError:
+            return None
+
+    def get_users(self, project_id):
+        users = get_user_model().objects.filter(is_active=True).only(
+            'username', 'first_name', 'last_name', 'weekly_capacity_hours'
+        ).order_by('first_name', 'last_name', 'username')
+        if not self.request.user.is_staff:
+            return users.filter(pk=self.request.user.pk)
+        if project_id:
+            users = users.filter(pk__in=models.ProjectMember.objects.filter(project_id=project_id).values('user_id'))
+        return users
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        project_id = self.get_project_id()
+        start, weeks = self.get_range()
+        report = capacity.utilization(self.get_users(project_id), start, weeks)
+        context['report'] = report
+        context['rows'] = capacity.heatmap(report)
+        context['totals'] = list(zip(
+            report['weeks'], report['totals']['load'], report['totals']['utilization'], report['totals']['over']
+        ))
+        context['previous_start'] = start - capacity.WEEK * weeks
+        context['next_start'] = start + capacity.WEEK * weeks
+        context['weeks'] = weeks
+        context['project_id'] = project_id
+        if self.request.user.is_staff:
+            context['projects'] = models.Project.objects.filter(
+                status_id__in=lookups.pks('PROJECT_STATUS', OPEN_PROJECT_STATUSES)
+            ).only('code', 'name').order_by('code')
+        return context
+
 class ProfileView(LoginRequiredMixin, UpdateView):
     template_name = 'project/profile.html'
     success_url = reverse_lazy('project:profile')
@@ -399,7 +612,7 @@ class CategoryListView(LoginRequiredMixin, ListView):
     context_object_name = 'categories'
 
     def get_queryset(self):
-        return LookupCategory.objects.filter(is_system=False)
+        return LookupCategory.all_objects.filter(is_system=False)
 
 class CategoryCreateView(LoginRequiredMixin, CreateView):
     model = LookupCategory
@@ -418,7 +631,7 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('project:categories')
 
     def get_queryset(self):
-        return LookupCategory.objects.filter(is_system=False)
+        return LookupCategory.all_objects.filter(is_system=False)
 
 class CategoryDetailView(LoginRequiredMixin, DetailView):
     model = LookupCategory
@@ -426,7 +639,7 @@ class CategoryDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'category'
 
     def get_queryset(self):
-        return LookupCategory.objects.filter(is_system=False)
+        return LookupCategory.all_objects.filter(is_system=False)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -458,7 +671,7 @@ class CategoryValueUpdateView(LoginRequiredMixin, UpdateView):
         return get_object_or_404(LookupCategory, pk=self.kwargs['category_id'], is_system=False)
 
     def get_queryset(self):
-        return LookupValue.objects.filter(category=self.get_category())
+        return LookupValue.all_objects.filter(category=self.get_category())
 
     def get_success_url(self):
         return reverse_lazy('project:category_detail', kwargs={'pk': self.kwargs['category_id']})
@@ -467,24 +680,15 @@ def dashboard(request):
     if not request.user.is_authenticated:
         return redirect('core:home')
 
-    context = {
-        'active_projects': models.Project.objects.filter(
-            is_active=True,
-            status__code__in=['DRAFT', 'ACTIVE', 'ON_HOLD']
-        ).count(),
-        'my_tasks': models.Task.objects.filter(
-            is_active=True,
-            assigned_to=request.user,
-            status__code__in=['TODO', 'IN_PROGRESS', 'REVIEW']
-        ).count(),
-        'recent_time_entries': models.TimeEntry.objects.filter(
-            user=request.user
-        ).select_related('task', 'task__project').order_by('-date')[:5],
-        'unbilled_hours': models.TimeEntry.objects.filter(
-            user=request.user,
-            billable=True,
-            billing_status__code='UNBILLED'
-        ).aggregate(total=Sum('hours'))['total'] or 0,
-    }
-    
+    context = cache.get_dashboard(request.user)
+    return render(request, 'project/dashboard.html', context)
+
+async def dashboard_async(request):
+    """Async variant of ``dashboard`` for ASGI deployments (``ASYNC_VIEWS``)."""
+    # Resolve the user once so templates do not load it synchronously
+    request.user = user = await request.auser()
+    if not user.is_authenticated:
+        return redirect('core:home')
+
+    context = await cache.aget_dashboard(user)
     return render(request, 'project/dashboard.html', context)
@@ -0,0 +1,15 @@
+"""
+ASGI deployment profile.
+
+    DJANGO_SETTINGS_MODULE=rugbee.settings.asgi \
+        uvicorn rugbee.asgi:application --workers 4
+
+Routes the dashboard and project detail pages to their async views.
+Persistent connections are not reused across async requests, so connection
+reuse belongs in a pooler such as PgBouncer in front of PostgreSQL.
+"""
+from .production import *
+
+ASYNC_VIEWS = True
+
+DATABASES['default']['CONN_MAX_AGE'] = 0
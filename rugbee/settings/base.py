@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import importlib.util
 import os
 from pathlib import Path
 from decouple import config, Config, RepositoryEnv
@@ -29,9 +30,9 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
 
     # Third party apps
-    'debug_toolbar',
     'crispy_forms',
     'crispy_bootstrap5',
     'django_bootstrap5',
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -55,7 +57,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',    
 ]
 
 ROOT_URLCONF = f'{config("DJANGO_APP_NAME")}.urls'
@@ -176,8 +177,111 @@ SECURE_REFERRER_POLICY = 'same-origin'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
-# Django Debug Toolbar
+# Django Debug Toolbar, only when asked for (by default with DEBUG) and installed
+DEBUG_TOOLBAR = (
+    config('DEBUG_TOOLBAR', default=DEBUG, cast=bool)
+    and importlib.util.find_spec('debug_toolbar') is not None
+)
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
 INTERNAL_IPS = [
     '127.0.0.1',
     'localhost',
 ]
+
+# SQL instrumentation (apps.core.middleware)
+# Query count and time of every request go to the Server-Timing header and
+# the apps.core.sql logger. Requests whose URL name has a budget are checked
+# against it: 'warn' logs overruns, 'fail' raises (use in CI and staging).
+SQL_INSTRUMENTATION = config('SQL_INSTRUMENTATION', default=True, cast=bool)
+SQL_QUERY_BUDGET_MODE = config('SQL_QUERY_BUDGET_MODE', default='warn')
+SQL_QUERY_BUDGETS = {
+    # Session and user lookups included; no page may repeat a query shape
+    'project:dashboard': {'queries': 10, 'duplicates': 0},
+    'project:client_list': {'queries': 6, 'duplicates': 0},
+    'project:client_detail': {'queries': 9, 'duplicates': 0},
+    'project:project_list': {'queries': 7, 'duplicates': 0},
+    'project:project_detail': {'queries': 9, 'duplicates': 0},
+    'project:task_list': {'queries': 10, 'duplicates': 0},
+    'project:task_detail': {'queries': 9, 'duplicates': 0},
+    'project:project_schedule': {'queries': 7, 'duplicates': 0},
+    'project:timesheet': {'queries': 6, 'duplicates': 0},
+    'project:utilization': {'queries': 8, 'duplicates': 0},
+    'project:search': {'queries': 7, 'duplicates': 0},
+    'project:api:client-list': 5,
+    'project:api:project-list': 5,
+    'project:api:task-list': 5,
+    'project:api:taskdependency-list': 5,
+    'project:api:member-list': 5,
+    'project:api:timeentry-list': 5,
+}
+
+# Lookup registry (apps.core.lookups)
+# Seconds between checks of the shared lookup version key per process
+LOOKUP_REGISTRY_CHECK_INTERVAL = config('LOOKUP_REGISTRY_CHECK_INTERVAL', default=1, cast=float)
+
+# Soft-delete retention (apps.core.purge)
+# Days a soft-deleted row is kept before purge_deleted removes it for good,
+# by model label; 'default' covers the other models and None keeps rows
+# forever. Time entries and invoices are billing records; archived rows are
+# kept as they were archived until their project is restored.
+SOFT_DELETE_RETENTION = {
+    'default': config('SOFT_DELETE_RETENTION_DAYS', default=90, cast=int),
+    'project.timeentry': 730,
+    'project.invoice': None,
+    'project.archivedprojectmember': None,
+    'project.archivedtask': None,
+    'project.archivedtimeentry': None,
+    'project.archivedtaskdependency': None,
+    'core.lookupcategory': None,
+    'core.lookupvalue': None,
+}
+
+# Project archival (apps.project.archive)
+# Days after its end date that a completed project's team, tasks and time
+# entries move to the archive tables when archive_projects runs.
+ARCHIVE_COMPLETED_PROJECTS_AFTER_DAYS = config('ARCHIVE_COMPLETED_PROJECTS_AFTER_DAYS', default=365, cast=int)
+
+# Task scheduling (apps.project.scheduling)
+# Working hours in a day of the schedule: tasks without a duration take
+# their estimated hours over this many days, at least one.
+SCHEDULE_HOURS_PER_DAY = config('SCHEDULE_HOURS_PER_DAY', default=8, cast=int)
+
+# Capacity and utilization (apps.project.capacity)
+# Weeks before and after the current one the utilization heatmap shows by
+# default; ?start= and ?weeks= select another range, of at most
+# UTILIZATION_MAX_WEEKS weeks.
+UTILIZATION_WEEKS_BEFORE = config('UTILIZATION_WEEKS_BEFORE', default=4, cast=int)
+UTILIZATION_WEEKS_AFTER = config('UTILIZATION_WEEKS_AFTER', default=12, cast=int)
+UTILIZATION_MAX_WEEKS = config('UTILIZATION_MAX_WEEKS', default=104, cast=int)
+
+# Cache
+# CACHE_BACKEND selects locmem (per process, the default), file or redis. Use
+# a shared backend (file or redis) when running more than one process so that
+# lookup and dashboard invalidations reach every worker.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'rugbee'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='rugbee'),
+    }
+}
+
+# Dashboard cache (apps.project.cache)
+# Seconds a cached dashboard is served as fresh, and how long after that a
+# stale copy may still be served while another request rebuilds it
+DASHBOARD_CACHE_FRESH = config('DASHBOARD_CACHE_FRESH', default=60, cast=int)
+DASHBOARD_CACHE_STALE = config('DASHBOARD_CACHE_STALE', default=600, cast=int)
+
+# Serve the dashboard and project detail pages from their async views. Only
+# worthwhile under ASGI (see rugbee/settings/asgi.py); under WSGI every async
+# view is run through async_to_sync.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
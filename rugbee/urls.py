@@ -36,9 +36,11 @@ urlpatterns = [
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
 ]
 
-if settings.DEBUG:
+if settings.DEBUG_TOOLBAR:
     urlpatterns += [
         path('__debug__/', include('debug_toolbar.urls')),
     ]
+
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)